@@ -0,0 +1,122 @@
+#!/usr/bin/env python3
+"""
+Usage: poetry run backfill FR "DE->FR" --data-type production --start 2022-01-01 --end 2022-12-31
+"""
+
+import json
+import time
+from logging import INFO, basicConfig, getLogger
+from typing import List, Optional
+
+import arrow
+import click
+
+from parsers.lib.backfill import DEFAULT_BATCH_SIZE
+from parsers.lib.backfill import backfill as run_backfill
+from parsers.lib.backfill import to_json
+from parsers.lib.fetch import (
+    DEFAULT_MAX_WORKERS,
+    DEFAULT_MAX_WORKERS_PER_SOURCE,
+    DEFAULT_TIMEOUT,
+    FetchJob,
+)
+
+logger = getLogger(__name__)
+basicConfig(level=INFO, format="%(asctime)s %(levelname)-8s %(name)-30s %(message)s")
+
+
+@click.command()
+@click.argument("keys", nargs=-1, required=True)
+@click.option("--data-type", "data_types", multiple=True, default=["production"])
+@click.option("--start", required=True)
+@click.option("--end", required=True)
+@click.option("--manifest", default=None, help="Records progress, to resume runs.")
+@click.option("--output", default=None, help="Writes the data to this JSON file.")
+@click.option("--max-workers", default=DEFAULT_MAX_WORKERS, show_default=True)
+@click.option(
+    "--max-workers-per-source",
+    default=DEFAULT_MAX_WORKERS_PER_SOURCE,
+    show_default=True,
+)
+@click.option("--timeout", default=DEFAULT_TIMEOUT, show_default=True)
+@click.option("--batch-size", default=DEFAULT_BATCH_SIZE, show_default=True)
+def backfill(
+    keys: List[str],
+    data_types: List[str],
+    start: str,
+    end: str,
+    manifest: Optional[str],
+    output: Optional[str],
+    max_workers: int,
+    max_workers_per_source: int,
+    timeout: float,
+    batch_size: int,
+):
+    """\b
+    Fetches the history of zones and exchanges over a range of datetimes, calling
+    each parser once per refetch frequency.
+    Parameters
+    ----------
+    keys: zone keys and exchange keys, such as FR or "DE->FR"
+    data_type: in ['production', 'exchangeForecast', 'production', 'exchange',
+      'price', 'consumption', 'generationForecast', 'consumptionForecast'],
+      can be repeated
+    start, end: strings parseable by arrow, such as 2018-05-30 15:00 (UTC)
+    \b
+    Examples
+    -------
+    >>> poetry run backfill FR --start 2022-01-01 --end 2022-12-31 --manifest FR.jsonl
+    >>> poetry run backfill "DE->FR" --data-type exchange --start 2022-10-01 --end 2022-10-31
+    """
+    jobs = [FetchJob(key, data_type) for data_type in data_types for key in keys]
+    start_time = time.time()
+    result = run_backfill(
+        jobs,
+        arrow.get(start).datetime,
+        arrow.get(end).datetime,
+        manifest_path=manifest,
+        batch_size=batch_size,
+        max_workers=max_workers,
+        max_workers_per_source=max_workers_per_source,
+        timeout=timeout,
+        logger=logger,
+    )
+    elapsed_time = time.time() - start_time
+
+    if output:
+        with open(output, "w") as f:
+            json.dump(
+                {
+                    f"{job.key} {job.data_type}": data
+                    for job, data in result.data.items()
+                },
+                f,
+                default=to_json,
+            )
+
+    print(f"{'key':<30}{'data type':<28}{'datapoints':>12}{'from':>28}{'to':>28}")
+    for job, data in result.data.items():
+        first = data[0]["datetime"].isoformat() if data else ""
+        last = data[-1]["datetime"].isoformat() if data else ""
+        print(f"{job.key:<30}{job.data_type:<28}{len(data):>12}{first:>28}{last:>28}")
+    for failure in result.failures:
+        target_datetime = failure.job.target_datetime
+        print(
+            f"failed: {failure.job.key} {failure.job.data_type} "
+            f"{target_datetime.isoformat() if target_datetime else ''}: "
+            f"{failure.error!r}"
+        )
+    print(
+        "\n".join(
+            [
+                "---------------------",
+                f"{result.resumed} windows resumed, {len(result.failures)} failed",
+                "took {:.2f}s".format(elapsed_time),
+            ]
+        )
+    )
+
+
+if __name__ == "__main__":
+    # pylint: disable=no-value-for-parameter
+    backfill()
@@ -1,11 +1,27 @@
+from bisect import bisect_right
 from collections import defaultdict
 from copy import deepcopy
+from datetime import date, datetime
+from functools import lru_cache
 from pathlib import Path
-from typing import Any, Dict, List, NewType, Tuple
-
-import yaml
+from typing import (
+    Any,
+    Dict,
+    Iterable,
+    List,
+    NamedTuple,
+    NewType,
+    Optional,
+    Tuple,
+    Union,
+)
 
 from electricitymap.contrib.config.constants import EXCHANGE_FILENAME_ZONE_SEPARATOR
+from electricitymap.contrib.config.snapshot import (
+    RawConfig,
+    load_snapshot,
+    read_yaml_config,
+)
 
 ZoneKey = NewType("ZoneKey", str)
 Point = NewType("Point", Tuple[float, float])
@@ -13,66 +29,88 @@ BoundingBox = NewType("BoundingBox", List[Point])
 
 CONFIG_DIR = Path(__file__).parent.parent.parent.parent.joinpath("config").resolve()
 
-defaults = yaml.safe_load(open(CONFIG_DIR.joinpath("defaults.yaml"), encoding="utf-8"))
-
-zones_config: Dict[ZoneKey, Any] = {}
-for zone_path in CONFIG_DIR.joinpath("zones").glob("*.yaml"):
-    zone_key = ZoneKey(zone_path.stem)
-    zones_config[zone_key] = yaml.safe_load(open(zone_path, encoding="utf-8"))
-
-exchanges_config = {}
-for exchange_path in CONFIG_DIR.joinpath("exchanges").glob("*.yaml"):
-    _exchange_key_unicode = exchange_path.stem
-    _zone_keys = _exchange_key_unicode.split(EXCHANGE_FILENAME_ZONE_SEPARATOR)
-    assert len(_zone_keys) == 2
-    exchange_key = "->".join(_zone_keys)
-    exchanges_config[exchange_key] = yaml.safe_load(
-        open(exchange_path, encoding="utf-8")
-    )
+
+class Config(NamedTuple):
+    zones: Dict[ZoneKey, Any]
+    exchanges: Dict[str, Any]  # by exchange key (e.g. DE->FR)
+    co2eq_parameters_direct: Dict[str, Any]
+    co2eq_parameters_lifecycle: Dict[str, Any]
 
 
-co2eq_parameters_all = {
-    k: {
-        "defaults": defaults[k],
-        "zoneOverrides": {},
+def process_config(raw_config: RawConfig) -> Config:
+    """
+    Splits the co2eq parameters out of the zone configs, and keys the exchanges by
+    their zone keys. Modifies the zone configs of `raw_config`.
+    """
+    defaults = raw_config.defaults
+
+    zones_config: Dict[ZoneKey, Any] = {
+        ZoneKey(zone_key): zone_config
+        for zone_key, zone_config in raw_config.zones.items()
+    }
+
+    exchanges_config = {}
+    for exchange_key_unicode, exchange_config in raw_config.exchanges.items():
+        zone_keys = exchange_key_unicode.split(EXCHANGE_FILENAME_ZONE_SEPARATOR)
+        assert len(zone_keys) == 2
+        exchanges_config["->".join(zone_keys)] = exchange_config
+
+    co2eq_parameters_all = {
+        k: {
+            "defaults": defaults[k],
+            "zoneOverrides": {},
+        }
+        for k in ["fallbackZoneMixes", "isLowCarbon", "isRenewable"]
+    }
+    co2eq_parameters_direct = {
+        "emissionFactors": {
+            "defaults": defaults["emissionFactors"]["direct"],
+            "zoneOverrides": {},
+        },
     }
-    for k in ["fallbackZoneMixes", "isLowCarbon", "isRenewable"]
-}
-co2eq_parameters_direct = {
-    "emissionFactors": {
-        "defaults": defaults["emissionFactors"]["direct"],
-        "zoneOverrides": {},
-    },
-}
-co2eq_parameters_lifecycle = {
-    "emissionFactors": {
-        "defaults": defaults["emissionFactors"]["lifecycle"],
-        "zoneOverrides": {},
-    },
-}
-# Populate zone overrides
-for zone_key, zone_config in zones_config.items():
-    for k in ["fallbackZoneMixes", "isLowCarbon", "isRenewable"]:
-        if k in zone_config:
-            co2eq_parameters_all[k]["zoneOverrides"][zone_key] = zone_config[k]
-            del zone_config[k]
-    if "emissionFactors" in zone_config:
-        for k in ["direct", "lifecycle"]:
-            if k in zone_config["emissionFactors"]:
-                if k == "direct":
-                    co2eq_parameters_direct["emissionFactors"]["zoneOverrides"][
-                        zone_key
-                    ] = zone_config["emissionFactors"][k]
-                elif k == "lifecycle":
-                    co2eq_parameters_lifecycle["emissionFactors"]["zoneOverrides"][
-                        zone_key
-                    ] = zone_config["emissionFactors"][k]
-        del zone_config["emissionFactors"]
-
-ZONES_CONFIG = deepcopy(zones_config)
-EXCHANGES_CONFIG = deepcopy(exchanges_config)
-CO2EQ_PARAMETERS_DIRECT = {**co2eq_parameters_all, **co2eq_parameters_direct}
-CO2EQ_PARAMETERS_LIFECYCLE = {**co2eq_parameters_all, **co2eq_parameters_lifecycle}
+    co2eq_parameters_lifecycle = {
+        "emissionFactors": {
+            "defaults": defaults["emissionFactors"]["lifecycle"],
+            "zoneOverrides": {},
+        },
+    }
+    # Populate zone overrides
+    for zone_key, zone_config in zones_config.items():
+        for k in ["fallbackZoneMixes", "isLowCarbon", "isRenewable"]:
+            if k in zone_config:
+                co2eq_parameters_all[k]["zoneOverrides"][zone_key] = zone_config[k]
+                del zone_config[k]
+        if "emissionFactors" in zone_config:
+            for k in ["direct", "lifecycle"]:
+                if k in zone_config["emissionFactors"]:
+                    if k == "direct":
+                        co2eq_parameters_direct["emissionFactors"]["zoneOverrides"][
+                            zone_key
+                        ] = zone_config["emissionFactors"][k]
+                    elif k == "lifecycle":
+                        co2eq_parameters_lifecycle["emissionFactors"]["zoneOverrides"][
+                            zone_key
+                        ] = zone_config["emissionFactors"][k]
+            del zone_config["emissionFactors"]
+
+    return Config(
+        zones=deepcopy(zones_config),
+        exchanges=deepcopy(exchanges_config),
+        co2eq_parameters_direct={**co2eq_parameters_all, **co2eq_parameters_direct},
+        co2eq_parameters_lifecycle={
+            **co2eq_parameters_all,
+            **co2eq_parameters_lifecycle,
+        },
+    )
+
+
+# Read from the snapshot of the config if it is up to date, from the YAML files otherwise
+_config = process_config(load_snapshot(CONFIG_DIR) or read_yaml_config(CONFIG_DIR))
+
+ZONES_CONFIG = _config.zones
+EXCHANGES_CONFIG = _config.exchanges
+CO2EQ_PARAMETERS_DIRECT = _config.co2eq_parameters_direct
+CO2EQ_PARAMETERS_LIFECYCLE = _config.co2eq_parameters_lifecycle
 CO2EQ_PARAMETERS = CO2EQ_PARAMETERS_LIFECYCLE  # Global LCA is the default
 
 
@@ -131,24 +169,72 @@ def generate_all_neighbours(exchanges_config) -> Dict[ZoneKey, List[ZoneKey]]:
 ALL_NEIGHBOURS: Dict[ZoneKey, List[ZoneKey]] = generate_all_neighbours(EXCHANGES_CONFIG)
 
 
-def emission_factors(zone_key: ZoneKey) -> Dict[str, float]:
-    override = CO2EQ_PARAMETERS["emissionFactors"]["zoneOverrides"].get(zone_key, {})
-    defaults = CO2EQ_PARAMETERS["emissionFactors"]["defaults"]
+# Values of a mode by the date from which they apply, in chronological order
+EmissionFactorTimeline = List[Tuple[str, Optional[float]]]
+
 
-    def get_most_recent_value(emission_factors: Dict) -> Dict:
-        _emission_factors = deepcopy(emission_factors)
-        keys_with_yearly = [
-            k for (k, v) in _emission_factors.items() if isinstance(v, list)
-        ]
-        for k in keys_with_yearly:
-            _emission_factors[k] = max(
-                _emission_factors[k], key=lambda x: x["datetime"]
-            )
-        return _emission_factors
+def _emission_factor_timelines(
+    emission_factors: Dict,
+) -> Dict[str, EmissionFactorTimeline]:
+    timelines = {}
+    for mode, factor in emission_factors.items():
+        if not isinstance(factor, list):
+            timelines[mode] = [("", (factor or {}).get("value"))]
+            continue
+        timeline: EmissionFactorTimeline = []
+        for entry in sorted(factor, key=lambda x: x["datetime"]):
+            # Like max, keep the first of the values with the same datetime
+            if not timeline or timeline[-1][0] != entry["datetime"]:
+                timeline.append((entry["datetime"], entry.get("value")))
+        timelines[mode] = timeline
+    return timelines
+
+
+@lru_cache(maxsize=None)
+def emission_factor_timelines(zone_key: ZoneKey) -> Dict[str, EmissionFactorTimeline]:
+    """
+    Returns the emission factors of the zone by mode, with all their yearly values.
+    Zone overrides replace the defaults of their modes.
+    """
+    emission_factors = CO2EQ_PARAMETERS["emissionFactors"]
+    return {
+        **_emission_factor_timelines(emission_factors["defaults"]),
+        **_emission_factor_timelines(
+            emission_factors["zoneOverrides"].get(zone_key, {})
+        ),
+    }
 
-    # Only use most recent yearly numbers from defaults & overrides
-    defaults = get_most_recent_value(defaults)
-    override = get_most_recent_value(override)
 
-    merged = {**defaults, **override}
-    return dict([(k, (v or {}).get("value")) for (k, v) in merged.items()])
+@lru_cache(maxsize=4096)
+def _emission_factors_on(zone_key: ZoneKey, day: Optional[str]) -> Dict[str, float]:
+    factors = {}
+    for mode, timeline in emission_factor_timelines(zone_key).items():
+        if day is None:
+            index = len(timeline) - 1
+        else:
+            # The last value applying on that day, or the first one before any
+            dates = [start for start, _ in timeline]
+            index = max(0, bisect_right(dates, day) - 1)
+        factors[mode] = timeline[index][1]
+    return factors
+
+
+def emission_factors(
+    zone_key: ZoneKey, dt: Optional[Union[date, datetime]] = None
+) -> Dict[str, float]:
+    """
+    Returns the emission factors of the zone by mode, as of `dt` if given, or the
+    most recent ones otherwise.
+    """
+    day = None if dt is None else dt.strftime("%Y-%m-%d")
+    return dict(_emission_factors_on(zone_key, day))
+
+
+def emission_factors_by_zone(
+    zone_keys: Optional[Iterable[ZoneKey]] = None,
+    dt: Optional[Union[date, datetime]] = None,
+) -> Dict[ZoneKey, Dict[str, float]]:
+    """Returns the emission factors of the zones, all zones by default."""
+    if zone_keys is None:
+        zone_keys = ZONES_CONFIG.keys()
+    return {zone_key: emission_factors(zone_key, dt) for zone_key in zone_keys}
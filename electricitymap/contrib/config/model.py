@@ -1,3 +1,4 @@
+from copy import deepcopy
 from datetime import date, datetime
 from typing import Callable, Dict, List, Optional, Tuple, Union
 
@@ -20,7 +21,9 @@ from electricitymap.contrib.config import (
     ZONES_CONFIG,
     Point,
     ZoneKey,
+    process_config,
 )
+from electricitymap.contrib.config.snapshot import RawConfig
 
 # NOTE: we could cast Point to a NamedTuple with x/y accessors
 
@@ -306,6 +309,18 @@ class CO2eqConfigModel(StrictBaseModel):
     lifecycle: CO2eqParameters
 
 
+def validate_config(raw_config: RawConfig):
+    """Raises a ValidationError if the config read from YAML files is invalid."""
+    config = process_config(deepcopy(raw_config))
+    for zone_key, zone in config.zones.items():
+        zone["key"] = zone_key
+    ConfigModel(exchanges=config.exchanges, zones=config.zones)
+    CO2eqConfigModel(
+        direct=config.co2eq_parameters_direct,
+        lifecycle=config.co2eq_parameters_lifecycle,
+    )
+
+
 def _load_config_model() -> ConfigModel:
     for zone_key, zone in ZONES_CONFIG.items():
         zone["key"] = zone_key
@@ -0,0 +1,113 @@
+"""
+A precompiled snapshot of the YAML files of config/, which loads in a fraction of
+the time it takes to parse them.
+
+Build it after changing the config, e.g. in a Docker image or CI step:
+
+    poetry run python scripts/build_config_snapshot.py
+
+The snapshot is only used while it is up to date: if the content of the YAML files
+changed since, or files were added or removed, the config is read from the YAML files
+again. The config is validated before its snapshot is written.
+"""
+
+import hashlib
+import os
+import pickle
+from pathlib import Path
+from typing import Any, Dict, List, NamedTuple, Optional
+
+import yaml
+
+# Bump when the content of the snapshot changes
+SNAPSHOT_VERSION = 2
+SNAPSHOT_FILENAME = ".snapshot.pickle"
+
+# The C parser is much faster than the Python one, when libyaml is available
+YAMLLoader = getattr(yaml, "CSafeLoader", yaml.SafeLoader)
+
+
+class RawConfig(NamedTuple):
+    defaults: Dict[str, Any]
+    zones: Dict[str, Any]  # by zone key
+    exchanges: Dict[str, Any]  # by exchange file name (e.g. DE_FR)
+
+
+def config_files(config_dir: Path) -> List[Path]:
+    return [
+        config_dir.joinpath("defaults.yaml"),
+        *config_dir.joinpath("zones").glob("*.yaml"),
+        *config_dir.joinpath("exchanges").glob("*.yaml"),
+    ]
+
+
+def read_yaml(path: Path) -> Any:
+    with open(path, encoding="utf-8") as f:
+        return yaml.load(f, Loader=YAMLLoader)
+
+
+def read_yaml_config(config_dir: Path) -> RawConfig:
+    return RawConfig(
+        defaults=read_yaml(config_dir.joinpath("defaults.yaml")),
+        zones={
+            path.stem: read_yaml(path)
+            for path in config_dir.joinpath("zones").glob("*.yaml")
+        },
+        exchanges={
+            path.stem: read_yaml(path)
+            for path in config_dir.joinpath("exchanges").glob("*.yaml")
+        },
+    )
+
+
+def content_hash(config_dir: Path, files: List[Path]) -> str:
+    digest = hashlib.sha256()
+    for path in sorted(files):
+        digest.update(str(path.relative_to(config_dir)).encode("utf-8"))
+        digest.update(path.read_bytes())
+    return digest.hexdigest()
+
+
+def load_snapshot(config_dir: Path) -> Optional[RawConfig]:
+    """
+    Returns the config of the snapshot of `config_dir`, or None if there is no
+    snapshot or if it is out of date.
+    """
+    path = config_dir.joinpath(SNAPSHOT_FILENAME)
+    try:
+        with open(path, "rb") as f:
+            snapshot = pickle.load(f)
+        if snapshot.get("version") != SNAPSHOT_VERSION:
+            return None
+        # Hashing the files is much faster than parsing them
+        if snapshot.get("hash") != content_hash(config_dir, config_files(config_dir)):
+            return None
+        return RawConfig(**snapshot["config"])
+    except Exception:
+        return None
+
+
+def build_snapshot(config_dir: Path) -> str:
+    """
+    Reads and validates the YAML files of `config_dir`, writes their snapshot and
+    returns the hash of their content. Raises a ValidationError if the config is
+    invalid, without writing the snapshot.
+    """
+    from electricitymap.contrib.config.model import validate_config
+
+    # Hashed first, so that files changed while they are read don't match the hash
+    config_hash = content_hash(config_dir, config_files(config_dir))
+    raw_config = read_yaml_config(config_dir)
+    validate_config(raw_config)
+
+    snapshot = {
+        "version": SNAPSHOT_VERSION,
+        "hash": config_hash,
+        "config": raw_config._asdict(),
+    }
+    path = config_dir.joinpath(SNAPSHOT_FILENAME)
+    temporary_path = path.with_name(f"{path.name}.{os.getpid()}.tmp")
+    with open(temporary_path, "wb") as f:
+        pickle.dump(snapshot, f, protocol=pickle.HIGHEST_PROTOCOL)
+    os.replace(temporary_path, path)
+    return snapshot["hash"]
@@ -0,0 +1,124 @@
+#!/usr/bin/env python3
+"""
+Usage: poetry run fetch_parsers FR DE "DE->FR" --data-type production --data-type exchange
+"""
+
+import time
+from datetime import datetime
+from logging import INFO, basicConfig, getLogger
+from typing import List, Optional
+
+import arrow
+import click
+
+from parsers.lib.coalescing import RequestCoalescer
+from parsers.lib.fetch import (
+    DEFAULT_MAX_WORKERS,
+    DEFAULT_MAX_WORKERS_PER_SOURCE,
+    DEFAULT_TIMEOUT,
+    FetchJob,
+    fetch_all,
+)
+from parsers.lib.parsers import PARSER_KEY_TO_DICT
+
+logger = getLogger(__name__)
+basicConfig(level=INFO, format="%(asctime)s %(levelname)-8s %(name)-30s %(message)s")
+
+
+@click.command()
+@click.argument("keys", nargs=-1)
+@click.option("--data-type", "data_types", multiple=True, default=["production"])
+@click.option("--all", "all_keys", is_flag=True, help="Fetch every configured key.")
+@click.option("--target_datetime", default=None, show_default=True)
+@click.option("--max-workers", default=DEFAULT_MAX_WORKERS, show_default=True)
+@click.option(
+    "--max-workers-per-source",
+    default=DEFAULT_MAX_WORKERS_PER_SOURCE,
+    show_default=True,
+)
+@click.option("--timeout", default=DEFAULT_TIMEOUT, show_default=True)
+def fetch_parsers(
+    keys: List[str],
+    data_types: List[str],
+    all_keys: bool,
+    target_datetime: Optional[str],
+    max_workers: int,
+    max_workers_per_source: int,
+    timeout: float,
+):
+    """\b
+    Runs the parsers of many zones and exchanges concurrently.
+    Parameters
+    ----------
+    keys: zone keys and exchange keys, such as FR or "DE->FR"
+    data_type: in ['production', 'exchangeForecast', 'production', 'exchange',
+      'price', 'consumption', 'generationForecast', 'consumptionForecast'],
+      can be repeated
+    target_datetime: string parseable by arrow, such as 2018-05-30 15:00
+    \b
+    Examples
+    -------
+    >>> poetry run fetch_parsers FR DE ES
+    >>> poetry run fetch_parsers FR "DE->FR" --data-type production --data-type exchange
+    >>> poetry run fetch_parsers --all --data-type price --max-workers 64
+    """
+    _target_datetime: Optional[datetime] = None
+    if target_datetime:
+        _target_datetime = arrow.get(target_datetime).datetime
+
+    jobs = []
+    for data_type in data_types:
+        parsers = PARSER_KEY_TO_DICT[data_type]
+        for key in parsers if all_keys else keys:
+            if key in parsers:
+                jobs.append(FetchJob(key, data_type))
+            else:
+                logger.warning(f"No {data_type} parser for {key}, skipping")
+    if not jobs:
+        raise click.UsageError("Nothing to fetch")
+
+    coalescer = RequestCoalescer()
+    start = time.time()
+    results = fetch_all(
+        jobs,
+        coalescer=coalescer,
+        target_datetime=_target_datetime,
+        max_workers=max_workers,
+        max_workers_per_source=max_workers_per_source,
+        timeout=timeout,
+    )
+    elapsed_time = time.time() - start
+
+    print(
+        f"{'key':<30}{'data type':<28}{'source':<24}{'result':>20}{'wait':>9}{'run':>9}"
+    )
+    for result in sorted(results, key=lambda r: -(r.run_time or 0)):
+        if result.ok:
+            data = result.data
+            status = str(
+                len(data) if isinstance(data, (list, tuple)) else int(bool(data))
+            )
+        else:
+            status = type(result.error).__name__
+        print(
+            f"{result.job.key:<30}{result.job.data_type:<28}{result.source:<24}"
+            f"{status:>20}"
+            f"{result.wait_time or 0:>8.2f}s{result.run_time or 0:>8.2f}s"
+        )
+    print(
+        "\n".join(
+            [
+                "---------------------",
+                f"{sum(r.ok for r in results)}/{len(results)} jobs succeeded",
+                "shared responses: {hits} hits, {misses} misses".format(
+                    **coalescer.stats()
+                ),
+                "took {:.2f}s".format(elapsed_time),
+            ]
+        )
+    )
+
+
+if __name__ == "__main__":
+    # pylint: disable=no-value-for-parameter
+    fetch_parsers()
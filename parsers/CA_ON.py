@@ -13,6 +13,8 @@ import arrow
 import pandas as pd
 from requests import Session
 
+from .lib import web
+
 """
 Some notes about timestamps:
 
@@ -87,9 +89,8 @@ def _fetch_ieso_xml(
         .replace(hour=0, minute=0, second=0, microsecond=0)
     )
 
-    r = session or Session()
     url = url_template.format(YYYYMMDD=dt.format("YYYYMMDD"))
-    response = r.get(url)
+    response = web.get(url, session)
 
     if not response.ok:
         # Data is generally available for past 3 months. Requesting files older than this
@@ -8,16 +8,20 @@ and exposes them via a unified API.
 Requires an API key, set in the EIA_KEY environment variable. Get one here:
 https://www.eia.gov/opendata/register.php
 """
-from datetime import datetime, timedelta
+from collections import defaultdict
+from datetime import datetime, timedelta, timezone
 from logging import Logger, getLogger
-from typing import Any, Dict, List, Optional
+from typing import Any, Dict, List, Optional, Tuple
 
 import arrow
+import numpy as np
 from dateutil import parser, tz
 from requests import Session
 
 from parsers.ENTSOE import merge_production_outputs
 from parsers.lib.config import refetch_frequency
+from parsers.lib.exceptions import ParserException
+from parsers.lib.session_cache import SessionCache
 from parsers.lib.utils import get_token
 from parsers.lib.validation import validate
 
@@ -330,6 +334,7 @@ TYPES = {
 }
 
 BASE_URL = "https://api.eia.gov/v2/electricity/rto"
+UTC = tz.tzutc()
 
 PRODUCTION = (
     f"{BASE_URL}/region-data/data/"
@@ -343,11 +348,25 @@ CONSUMPTION_FORECAST = (
     f"{BASE_URL}/region-data/data/"
     "?data[]=value&facets[respondent][]={}&facets[type][]=DF&frequency=hourly"
 )
-PRODUCTION_MIX = (
-    f"{BASE_URL}/fuel-type-data/data/"
-    "?data[]=value&facets[respondent][]={}&facets[fueltype][]={}&frequency=hourly"
-)
 EXCHANGE = f"{BASE_URL}/interchange-data/data/" "?data[]=value{}&frequency=hourly"
+FUEL_TYPE_DATA = f"{BASE_URL}/fuel-type-data/data/"
+EIA_TS_FORMAT = "%Y-%m-%dT%H"
+# Rows per request, the most the API returns
+PAGE_LENGTH = 5000
+# Respondents per fuel type data request, which keeps URLs short
+MAX_RESPONDENTS_PER_REQUEST = 16
+# Without a target datetime, the latest points of each series are taken from the last
+# hours, which covers the usual reporting delays of the respondents. Respondents
+# lagging more than that have no points, see `fetch_fuel_type_data`.
+LATEST_POINTS = 24
+LATEST_HOURS = 72
+# Fuel mixes of all the US zones, see `lib.session_cache`
+PRODUCTION_MIX_MAX_AGE = 60  # seconds
+PRODUCTION_MIX_RESPONDENTS = sorted(
+    {code for zone_key, code in REGIONS.items() if zone_key.startswith("US-")}
+)
+
+_PRODUCTION_MIXES = SessionCache()
 
 
 @refetch_frequency(timedelta(days=1))
@@ -409,16 +428,17 @@ def fetch_production_mix(
     target_datetime: Optional[datetime] = None,
     logger: Logger = getLogger(__name__),
 ):
+    series = _fetch_production_mix_series(zone_key, session, target_datetime, logger)
+
+    def get_mix(zone: str, code: str) -> List[Dict[str, Any]]:
+        return [
+            {"zoneKey": zone, "datetime": dt, "value": value, "source": "eia.gov"}
+            for dt, value in series.get((REGIONS[zone], code), [])
+        ]
+
     mixes = []
     for type, code in TYPES.items():
-        url_prefix = PRODUCTION_MIX.format(REGIONS[zone_key], code)
-        mix = _fetch(
-            zone_key,
-            url_prefix,
-            session=session,
-            target_datetime=target_datetime,
-            logger=logger,
-        )
+        mix = get_mix(zone_key, code)
         # TODO Currently manually filtering out datapoints with null values
         # As null values can cause problems in the estimation models if there's
         # only null values.
@@ -445,14 +465,7 @@ def fetch_production_mix(
             **supplying_zones.get(type, {}),
         }
         for zone, percentage in zones_to_integrate.items():
-            url_prefix = PRODUCTION_MIX.format(REGIONS[zone], code)
-            additional_mix = _fetch(
-                zone,
-                url_prefix,
-                session=session,
-                target_datetime=target_datetime,
-                logger=logger,
-            )
+            additional_mix = get_mix(zone, code)
             # TODO Currently manually filtering out datapoints with null values
             # As null values can cause problems in the estimation models if there's
             # only null values.
@@ -561,17 +574,8 @@ def _fetch(
     API_KEY = get_token("EIA_KEY")
 
     if target_datetime:
-        try:
-            target_datetime = arrow.get(target_datetime).datetime
-        except arrow.parser.ParserError:
-            raise ValueError(
-                f"target_datetime must be a valid datetime - received {target_datetime}"
-            )
-        utc = tz.gettz("UTC")
-        eia_ts_format = "%Y-%m-%dT%H"
-        end = target_datetime.astimezone(utc) + timedelta(hours=1)
-        start = end - timedelta(days=1)
-        url = f"{url_prefix}&api_key={API_KEY}&start={start.strftime(eia_ts_format)}&end={end.strftime(eia_ts_format)}"
+        start, end = _get_target_range(target_datetime)
+        url = f"{url_prefix}&api_key={API_KEY}&start={start}&end={end}"
     else:
         url = f"{url_prefix}&api_key={API_KEY}&sort[0][column]=period&sort[0][direction]=desc&length=24"
 
@@ -580,19 +584,146 @@ def _fetch(
     raw_data = req.json()
     if raw_data.get("response", {}).get("data", None) is None:
         return []
+    datapoints = raw_data["response"]["data"]
+    datetimes = _get_utc_datetimes([datapoint["period"] for datapoint in datapoints])
     return [
         {
             "zoneKey": zone_key,
-            "datetime": _get_utc_datetime_from_datapoint(
-                parser.parse(datapoint["period"])
-            ),
+            "datetime": dt,
             "value": datapoint["value"],
             "source": "eia.gov",
         }
-        for datapoint in raw_data["response"]["data"]
+        for dt, datapoint in zip(datetimes, datapoints)
     ]
 
 
+def _get_target_range(target_datetime: datetime) -> Tuple[str, str]:
+    """Returns the start and end periods of the day before `target_datetime`."""
+    try:
+        target_datetime = arrow.get(target_datetime).datetime
+    except arrow.parser.ParserError:
+        raise ValueError(
+            f"target_datetime must be a valid datetime - received {target_datetime}"
+        )
+    end = target_datetime.astimezone(tz.gettz("UTC")) + timedelta(hours=1)
+    start = end - timedelta(days=1)
+    return start.strftime(EIA_TS_FORMAT), end.strftime(EIA_TS_FORMAT)
+
+
+def _fetch_pages(
+    session: Session, url: str, params: List[Tuple[str, str]]
+) -> List[Dict[str, Any]]:
+    """Returns the rows of all the pages of an API query."""
+    rows = []
+    while True:
+        response = session.get(
+            url, params=[*params, ("offset", len(rows)), ("length", PAGE_LENGTH)]
+        )
+        response.raise_for_status()
+        raw_data = response.json().get("response", {})
+        page = raw_data.get("data")
+        if page is None:
+            raise ParserException(
+                "EIA.py", f"Unexpected response from {url}: {response.text[:200]}"
+            )
+        rows += page
+        if not page or len(rows) >= int(raw_data.get("total", 0)):
+            return rows
+
+
+def fetch_fuel_type_data(
+    respondents: List[str],
+    fueltypes: List[str],
+    session: Optional[Session] = None,
+    target_datetime: Optional[datetime] = None,
+    logger: Logger = getLogger(__name__),
+    latest_hours: int = LATEST_HOURS,
+) -> Dict[Tuple[str, str], List[Tuple[datetime, Optional[float]]]]:
+    """
+    Fetches the hourly production of the fuel types of the respondents (EIA codes, e.g.
+    "PJM" and "NG") in a few paged requests.
+    Returns the (datetime, value) points of each (respondent, fuel type), in
+    chronological order. Without a target datetime, only the latest `LATEST_POINTS`
+    points of each series within the last `latest_hours` are kept.
+    """
+    API_KEY = get_token("EIA_KEY")
+
+    if target_datetime:
+        start, end = _get_target_range(target_datetime)
+        range_params = [("start", start), ("end", end)]
+    else:
+        start = datetime.now(timezone.utc) - timedelta(hours=latest_hours)
+        range_params = [("start", start.strftime(EIA_TS_FORMAT))]
+
+    s = session or Session()
+    series = defaultdict(list)
+    for i in range(0, len(respondents), MAX_RESPONDENTS_PER_REQUEST):
+        params = [
+            ("api_key", API_KEY),
+            ("data[]", "value"),
+            ("frequency", "hourly"),
+            *(
+                ("facets[respondent][]", respondent)
+                for respondent in respondents[i : i + MAX_RESPONDENTS_PER_REQUEST]
+            ),
+            *(("facets[fueltype][]", fueltype) for fueltype in fueltypes),
+            *range_params,
+            # A total order, so that pages don't overlap
+            ("sort[0][column]", "period"),
+            ("sort[0][direction]", "asc"),
+            ("sort[1][column]", "respondent"),
+            ("sort[1][direction]", "asc"),
+            ("sort[2][column]", "fueltype"),
+            ("sort[2][direction]", "asc"),
+        ]
+        rows = _fetch_pages(s, FUEL_TYPE_DATA, params)
+        logger.debug(f"{len(rows)} fuel type data rows")
+        datetimes = _get_utc_datetimes([row["period"] for row in rows])
+        for dt, row in zip(datetimes, rows):
+            series[(row["respondent"], row["fueltype"])].append((dt, row["value"]))
+
+    for points in series.values():
+        points.sort(key=lambda point: point[0])
+        if not target_datetime:
+            del points[:-LATEST_POINTS]
+    if not target_datetime:
+        lagging = set(respondents) - {respondent for respondent, _ in series}
+        if lagging:
+            logger.warning(
+                f"No fuel type data in the last {latest_hours} hours for "
+                f"{', '.join(sorted(lagging))}"
+            )
+    return dict(series)
+
+
+def _fetch_production_mix_series(
+    zone_key: str,
+    session: Optional[Session],
+    target_datetime: Optional[datetime],
+    logger: Logger,
+) -> Dict[Tuple[str, str], List[Tuple[datetime, Optional[float]]]]:
+    fueltypes = list(TYPES.values())
+    if session is None:
+        supplying_zones = [
+            zone
+            for zones in PRODUCTION_ZONES_TRANSFERS.get(zone_key, {}).values()
+            for zone in zones
+        ]
+        respondents = sorted({REGIONS[zone] for zone in [zone_key, *supplying_zones]})
+        return fetch_fuel_type_data(
+            respondents, fueltypes, target_datetime=target_datetime, logger=logger
+        )
+    # A few paged queries cover every US respondent
+    return _PRODUCTION_MIXES.get(
+        session,
+        target_datetime,
+        lambda: fetch_fuel_type_data(
+            PRODUCTION_MIX_RESPONDENTS, fueltypes, session, target_datetime, logger
+        ),
+        PRODUCTION_MIX_MAX_AGE,
+    )
+
+
 def _index_by_timestamp(datapoints: List[dict]) -> Dict[str, dict]:
     indexed_data = {}
     for datapoint in datapoints:
@@ -627,6 +758,37 @@ def _get_utc_datetime_from_datapoint(dt: datetime):
     return dt_utc.datetime
 
 
+def _get_utc_datetimes(periods: List[str]) -> List[datetime]:
+    """
+    Same as `_get_utc_datetime_from_datapoint` for each period, converting the periods
+    of the hourly formats ("2022-10-31T11" in UTC, "2022-10-31T06-05" with a UTC
+    offset) at once.
+    """
+    lengths = {len(period) for period in periods}
+    try:
+        if lengths == {13}:
+            hours = np.array(periods, dtype="datetime64[h]")
+        elif lengths == {16} and all(period[13] in "+-" for period in periods):
+            hours = np.array([period[:13] for period in periods], dtype="datetime64[h]")
+            # Local hours minus their offset
+            hours -= np.array([int(period[13:]) for period in periods]).astype(
+                "timedelta64[h]"
+            )
+        else:
+            hours = None
+    except ValueError:
+        hours = None
+    if hours is None:
+        return [
+            _get_utc_datetime_from_datapoint(parser.parse(period)) for period in periods
+        ]
+    # To the beginning hour convention, see _conform_timestamp_convention
+    hours -= np.timedelta64(1, "h")
+    return [
+        dt.replace(tzinfo=UTC) for dt in hours.astype("datetime64[us]").astype(object)
+    ]
+
+
 if __name__ == "__main__":
     from pprint import pprint
 
@@ -18,6 +18,7 @@ from logging import Logger, getLogger
 from typing import List, Optional
 
 import arrow
+import numpy as np
 import pandas as pd
 from requests import Session
 
@@ -28,6 +29,8 @@ from parsers.lib.utils import get_token
 from parsers.lib.validation import validate
 
 ELEXON_ENDPOINT = "https://api.bmreports.com/BMRS/{}/v1"
+# Settlement dates and periods are in local time
+ELEXON_TIMEZONE = "Europe/London"
 
 REPORT_META = {
     "B1620": {"expected_fields": 13, "skiprows": 5},
@@ -201,7 +204,9 @@ def parse_production_FUELINST(
         raise ParserException("ELEXON.py", "Production file is empty.")
     report = REPORT_META["FUELINST"]
     # create DataFrame from slice of CSV rows
-    df = pd.read_csv(StringIO(csv_data), skiprows=1, skipfooter=1, header=None)
+    df = pd.read_csv(
+        StringIO(csv_data), skiprows=1, skipfooter=1, header=None, engine="python"
+    )
     # check field count in report is as expected
     field_count = len(df.columns)
     if field_count != report["expected_fields"]:
@@ -211,41 +216,34 @@ def parse_production_FUELINST(
                 report["expected_fields"], len(df.columns)
             ),
         )
-    # The file doesn't have a column header, so we need to recreate it.
-    mapping = {1: "Settlement Date", 2: "Settlement Period", 3: "Spot Time"}
-    for index, fuel in enumerate(FUEL_INST_MAPPING.values()):
-        mapping[index + 4] = fuel
-    df.rename(columns=mapping, inplace=True)
-    df["Settlement Date"] = df["Settlement Date"].apply(
-        lambda x: datetime.strptime(str(x), "%Y%m%d")
+    datetimes = datetimes_from_dates_sps(
+        pd.to_datetime(df[1].astype(str), format="%Y%m%d"), df[2].astype(int)
     )
-    df["Settlement Period"] = df["Settlement Period"].astype(int)
-    df["datetime"] = df.apply(
-        lambda x: datetime_from_date_sp(x["Settlement Date"], x["Settlement Period"]),
-        axis=1,
-    )
-    df = df.groupby(df.columns, axis=1).sum()
-
-    data_points = list()
-    for time in pd.unique(df["datetime"]):
-        time_df = df[df["datetime"] == time]
-
-        data_point = {
+    # FUELINST reports several instants per settlement period, keep the last one.
+    codes, unique_datetimes = pd.factorize(datetimes)
+    last_rows = np.full(len(unique_datetimes), -1)
+    np.maximum.at(last_rows, codes, np.arange(len(df)))
+    last_instants = df.iloc[last_rows]
+
+    # Sum the fuel columns of each mode (e.g. CCGT and OCGT are gas).
+    fuels = list(FUEL_INST_MAPPING.values())
+    modes = sorted(set(fuels) & set(PRODUCTION_MODES))
+    production = [
+        last_instants[[index + 4 for index, fuel in enumerate(fuels) if fuel == mode]]
+        .sum(axis=1)
+        .tolist()
+        for mode in modes
+    ]
+    return [
+        {
             "zoneKey": "GB",
-            "datetime": time.to_pydatetime(),
+            "datetime": time,
             "source": "bmreports.com",
-            "production": dict(),
+            "production": dict(zip(modes, values)),
             "storage": dict(),
         }
-
-        for row in time_df.iterrows():
-            electricity_production = row[1].to_dict()
-            for key in electricity_production.keys():
-                if key in PRODUCTION_MODES:
-                    data_point["production"][key] = electricity_production[key]
-
-        data_points.append(data_point)
-    return data_points
+        for time, values in zip(unique_datetimes.to_pydatetime(), zip(*production))
+    ]
 
 
 def parse_production(
@@ -273,60 +271,73 @@ def parse_production(
     # filter out undesired columns
     df = df.iloc[:-1, [7, 8, 9, 4]]
 
-    df["Settlement Date"] = df["Settlement Date"].apply(
-        lambda x: datetime.strptime(x, "%Y-%m-%d")
-    )
-    df["Settlement Period"] = df["Settlement Period"].astype(int)
-    df["datetime"] = df.apply(
-        lambda x: datetime_from_date_sp(x["Settlement Date"], x["Settlement Period"]),
-        axis=1,
+    datetimes = datetimes_from_dates_sps(
+        pd.to_datetime(df["Settlement Date"], format="%Y-%m-%d"),
+        df["Settlement Period"].astype(int),
     )
 
     # map from report fuel names to electricitymap fuel names
     fuel_column = "Power System Resource  Type"
-    df[fuel_column] = df[fuel_column].apply(lambda x: RESOURCE_TYPE_TO_FUEL[x])
+    fuels = df[fuel_column].map(
+        {name: RESOURCE_TYPE_TO_FUEL[name] for name in df[fuel_column].unique()}
+    )
 
-    # loop through unique datetimes and create each data point
-    data_points = list()
-    for time in pd.unique(df["datetime"]):
-        time_df = df[df["datetime"] == time]
+    # Pivot to one row per datetime and one column per fuel.
+    row_codes, unique_datetimes = pd.factorize(datetimes)
+    column_codes, unique_fuels = pd.factorize(fuels)
+    quantities = df["Quantity"].to_numpy()
+    shape = (len(unique_datetimes), len(unique_fuels))
+    reported = np.zeros(shape, dtype=bool)
+    reported[row_codes, column_codes] = True
+    # Fuels of several resource types are summed, e.g. 'Wind Onshore' and
+    # 'Wind Offshore' both have the key 'wind'.
+    totals = np.zeros(shape, dtype=quantities.dtype)
+    np.add.at(totals, (row_codes, column_codes), quantities)
+    # Storage isn't summed, the last reported value is kept.
+    last_rows = np.full(shape, -1)
+    np.maximum.at(last_rows, (row_codes, column_codes), np.arange(len(df)))
+    last_quantities = quantities[last_rows]
 
+    data_points = list()
+    reported_rows = reported.tolist()
+    totals_rows = totals.tolist()
+    last_rows_quantities = last_quantities.tolist()
+    for i, time in enumerate(unique_datetimes.to_pydatetime()):
         data_point = {
             "zoneKey": "GB",
-            "datetime": time.to_pydatetime(),
+            "datetime": time,
             "source": "bmreports.com",
             "production": dict(),
             "storage": dict(),
         }
-
-        for row in time_df.iterrows():
-            fields = row[1].to_dict()
-            fuel = fields[fuel_column]
-            quantity = fields["Quantity"]
-
+        for j, fuel in enumerate(unique_fuels):
+            if not reported_rows[i][j]:
+                continue
             # check if storage value and if so correct key
             if "storage" in fuel:
                 fuel_key = fuel.replace("storage", "").strip()
                 # ELEXON storage is negative when storing and positive when
                 # discharging (the opposite to electricitymap)
-                data_point["storage"][fuel_key] = quantity * -1
+                data_point["storage"][fuel_key] = last_rows_quantities[i][j] * -1
             else:
-                # if/else structure allows summation of multiple quantities
-                # e.g. 'Wind Onshore' and 'Wind Offshore' both have the
-                # key 'wind' here.
-                if fuel in data_point["production"].keys():
-                    data_point["production"][fuel] += quantity
-                else:
-                    data_point["production"][fuel] = quantity
-
+                data_point["production"][fuel] = totals_rows[i][j]
         data_points.append(data_point)
 
     return data_points
 
 
 def datetime_from_date_sp(date, sp):
-    datetime = arrow.get(date).shift(minutes=30 * (sp - 1))
-    return datetime.replace(tzinfo="Europe/London").datetime
+    # Settlement period 1 starts at local midnight and periods last 30 minutes, so
+    # that days of DST changes have 46 or 50 periods.
+    # Datetimes are returned in UTC, local times are ambiguous when clocks go back.
+    midnight = arrow.get(date).replace(tzinfo=ELEXON_TIMEZONE)
+    return midnight.to("UTC").shift(minutes=30 * (sp - 1)).datetime
+
+
+def datetimes_from_dates_sps(dates: pd.Series, sps: pd.Series) -> pd.Series:
+    """Vectorised datetime_from_date_sp, for naive settlement dates at midnight."""
+    midnights = dates.dt.tz_localize(ELEXON_TIMEZONE).dt.tz_convert("UTC")
+    return midnights + pd.to_timedelta(30 * (sps - 1), unit="min")
 
 
 def _fetch_wind(
@@ -369,13 +380,9 @@ def _fetch_wind(
 
     df = df.iloc[:, [1, 2, 3, 8]]
     df.columns = ["Settlement Date", "Settlement Period", "published", "Wind"]
-    df["Settlement Date"] = df["Settlement Date"].apply(
-        lambda x: datetime.strptime(str(x), "%Y%m%d")
-    )
-    df["Settlement Period"] = df["Settlement Period"].astype(int)
-    df["datetime"] = df.apply(
-        lambda x: datetime_from_date_sp(x["Settlement Date"], x["Settlement Period"]),
-        axis=1,
+    df["datetime"] = datetimes_from_dates_sps(
+        pd.to_datetime(df["Settlement Date"].astype(str), format="%Y%m%d"),
+        df["Settlement Period"].astype(int),
     )
 
     df["published"] = df["published"].apply(
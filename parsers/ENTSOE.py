@@ -14,11 +14,12 @@ Consumption Forecast
 """
 import itertools
 import re
+import xml.etree.ElementTree as ET
 from collections import defaultdict
 from datetime import datetime, timedelta
+from io import BytesIO
 from logging import Logger, getLogger
-from random import shuffle
-from typing import Any, Dict, List, Optional, Tuple, Union
+from typing import Any, Dict, Iterator, List, NamedTuple, Optional, Tuple, Union
 
 import arrow
 import numpy as np
@@ -29,10 +30,18 @@ from requests import Response, Session
 from parsers.lib.config import refetch_frequency
 
 from .lib.exceptions import ParserException
-from .lib.utils import get_token, sum_production_dicts
+from .lib.token_pool import (
+    TOKEN_REJECTED_STATUS_CODES,
+    TokensUnavailable,
+    get_token_pool,
+)
 from .lib.validation import validate
 
 ENTSOE_ENDPOINT = "https://web-api.tp.entsoe.eu/api"
+# ENTSOE allows 400 requests per minute per token. With a burst of 40 requests,
+# leaking 360 per minute never exceeds it over any minute.
+ENTSOE_TOKEN_RATE = 360  # requests per minute
+ENTSOE_TOKEN_BURST = 40
 ENTSOE_PARAMETER_DESC = {
     "B01": "Biomass",
     "B02": "Fossil Brown coal/Lignite",
@@ -83,6 +92,32 @@ ENTSOE_PARAMETER_BY_GROUP = {
 ENTSOE_STORAGE_PARAMETERS = list(
     itertools.chain.from_iterable(ENTSOE_PARAMETER_GROUPS["storage"].values())
 )
+# Columns of the matrix mapping ENTSOE production types (rows) to the Electricity Maps
+# production and storage modes (columns). Rows keep the order of the groups so that
+# multiplying by it sums each group in the same order as iterating over the group.
+ENTSOE_GROUPED_PARAMETERS = [
+    ENTSOE_key
+    for key in ["production", "storage"]
+    for groups in ENTSOE_PARAMETER_GROUPS[key].values()
+    for ENTSOE_key in groups
+]
+ENTSOE_GROUPED_PARAMETER_INDEX = {
+    ENTSOE_key: i for i, ENTSOE_key in enumerate(ENTSOE_GROUPED_PARAMETERS)
+}
+ENTSOE_GROUP_MODES = [
+    (key, type)
+    for key in ["production", "storage"]
+    for type in ENTSOE_PARAMETER_GROUPS[key]
+]
+ENTSOE_GROUP_MATRIX = np.array(
+    [
+        [
+            1.0 if ENTSOE_key in ENTSOE_PARAMETER_GROUPS[key][type] else 0.0
+            for key, type in ENTSOE_GROUP_MODES
+        ]
+        for ENTSOE_key in ENTSOE_GROUPED_PARAMETERS
+    ]
+)
 # Define all ENTSOE zone_key <-> domain mapping
 # see https://transparency.entsoe.eu/content/static_content/Static%20content/web%20api/Guide.html
 ENTSOE_DOMAIN_MAPPINGS: Dict[str, str] = {
@@ -482,18 +517,32 @@ def query_ENTSOE(
         )
 
     # Due to rate limiting, we need to spread our requests across different tokens
-    tokens = get_token("ENTSOE_TOKEN").split(",")
-    # Shuffle the tokens so that we don't always use the same one first.
-    shuffle(tokens)
+    pool = get_token_pool(
+        "ENTSOE_TOKEN",
+        rate=ENTSOE_TOKEN_RATE,
+        burst=ENTSOE_TOKEN_BURST,
+    )
     last_response_if_all_fail = None
-    # Try each token until we get a valid response
-    for token in tokens:
+    # Try each token until one isn't rejected
+    for _ in range(len(pool)):
+        try:
+            token = pool.acquire()
+        except TokensUnavailable as e:
+            if last_response_if_all_fail is not None:
+                break
+            raise ParserException(
+                parser="ENTSOE.py",
+                message=f"{function_name} failed in ENTSOE.py. Reason: {e}",
+            )
         params["securityToken"] = token
         response: Response = session.get(ENTSOE_ENDPOINT, params=params)
+        pool.release(token, response.status_code, response.headers.get("Retry-After"))
         if response.ok:
             return response.text
-        else:
-            last_response_if_all_fail = response
+        last_response_if_all_fail = response
+        # Other tokens would get the same answer
+        if response.status_code not in TOKEN_REJECTED_STATUS_CODES:
+            break
     # If we get here, all tokens failed to fetch valid data
     # and we will check the last response for a error message.
     exception_message = None
@@ -703,6 +752,125 @@ def datetime_from_position(
     raise NotImplementedError("Could not recognise resolution %s" % resolution)
 
 
+class TimeSeriesMetadata(NamedTuple):
+    """
+    The parts of an ENTSOE TimeSeries element needed to interpret its points.
+    Optional fields hold the first occurrence of the tag within the TimeSeries,
+    or None when the tag is absent.
+    """
+
+    resolution: str
+    datetime_start: arrow.Arrow
+    in_bidding_zone: bool
+    out_bidding_zone: bool
+    psr_type: Optional[str]
+    unit_key: Optional[str]
+    unit_name: Optional[str]
+    contract_type: Optional[str]
+    currency: Optional[str]
+
+
+# Tags read within a TimeSeries (lowercased local names), and the scope they must be in.
+TIMESERIES_TEXT_TAGS = {
+    "resolution": None,
+    "start": None,
+    "contract_marketagreement.type": None,
+    "currency_unit.name": None,
+    "psrtype": "mktpsrtype",
+    "mrid": "powersystemresources",
+    "name": "powersystemresources",
+}
+POINT_TEXT_TAGS = {"position", "quantity", "price.amount"}
+
+
+def iter_timeseries_points(
+    xml_text: str,
+) -> Iterator[Tuple[TimeSeriesMetadata, int, float]]:
+    """
+    Streams the points of an ENTSOE GL_MarketDocument or Publication_MarketDocument.
+
+    Yields a (timeseries metadata, position, value) tuple for every point, in document
+    order, without building the document tree. The value is the point quantity, or its
+    price.amount for price documents, points without either are skipped.
+    All points of a TimeSeries share the same metadata object.
+    """
+    # Elements are cleared as soon as they are read, so that at most one TimeSeries
+    # worth of points is held in memory at any time.
+    root = None
+    timeseries_tags: Optional[Dict[str, Optional[str]]] = None
+    open_scopes: Dict[str, int] = defaultdict(int)
+    points: List[Tuple[int, float]] = []
+    point: Dict[str, str] = {}
+    events = ET.iterparse(BytesIO(xml_text.encode("utf-8")), events=("start", "end"))
+    try:
+        for event, element in events:
+            tag = element.tag.rpartition("}")[2].lower()
+            if event == "start":
+                if root is None:
+                    root = element
+                if tag == "timeseries":
+                    timeseries_tags = {}
+                    points = []
+                elif timeseries_tags is not None:
+                    open_scopes[tag] += 1
+                    if tag in (
+                        "inbiddingzone_domain.mrid",
+                        "outbiddingzone_domain.mrid",
+                    ):
+                        timeseries_tags[tag] = None
+                continue
+
+            if timeseries_tags is None:
+                continue
+            if tag == "timeseries":
+                metadata = _timeseries_metadata(timeseries_tags)
+                for position, value in points:
+                    yield metadata, position, value
+                timeseries_tags = None
+                open_scopes.clear()
+                root.clear()
+                continue
+
+            open_scopes[tag] -= 1
+            if tag == "point":
+                value = point.get("quantity") or point.get("price.amount")
+                # Points without a value are missing data
+                if value is not None:
+                    points.append((int(point["position"]), float(value)))
+                point = {}
+                element.clear()
+            elif tag in POINT_TEXT_TAGS and open_scopes["point"]:
+                point[tag] = element.text
+            elif tag in TIMESERIES_TEXT_TAGS and tag not in timeseries_tags:
+                scope = TIMESERIES_TEXT_TAGS[tag]
+                if scope is None or open_scopes[scope]:
+                    timeseries_tags[tag] = element.text
+    except ET.ParseError as e:
+        raise ParserException(
+            parser="ENTSOE.py",
+            message=f"Could not parse ENTSOE document: {e}",
+        )
+
+
+def _timeseries_metadata(tags: Dict[str, Optional[str]]) -> TimeSeriesMetadata:
+    if tags.get("resolution") is None or tags.get("start") is None:
+        raise ParserException(
+            parser="ENTSOE.py",
+            message="TimeSeries without resolution or start in ENTSOE document",
+        )
+    return TimeSeriesMetadata(
+        resolution=str(tags["resolution"]),
+        datetime_start=arrow.get(tags["start"]),
+        in_bidding_zone="inbiddingzone_domain.mrid" in tags,
+        out_bidding_zone="outbiddingzone_domain.mrid" in tags,
+        psr_type=tags.get("psrtype"),
+        unit_key=tags.get("mrid"),
+        unit_name=tags.get("name"),
+        contract_type=tags.get("contract_marketagreement.type"),
+        currency=tags.get("currency_unit.name"),
+    )
+
+
 def parse_scalar(
     xml_text: str,
     only_inBiddingZone_Domain: bool = False,
@@ -711,25 +879,21 @@ def parse_scalar(
 
     if not xml_text:
         return None
-    soup = BeautifulSoup(xml_text, "html.parser")
     # Get all points
     values = []
     datetimes = []
-    for timeseries in soup.find_all("timeseries"):
-        resolution = str(timeseries.find_all("resolution")[0].contents[0])
-        datetime_start = arrow.get(timeseries.find_all("start")[0].contents[0])
+    for timeseries, position, value in iter_timeseries_points(xml_text):
         if only_inBiddingZone_Domain:
-            if not len(timeseries.find_all("inBiddingZone_Domain.mRID".lower())):
+            if not timeseries.in_bidding_zone:
                 continue
         elif only_outBiddingZone_Domain:
-            if not len(timeseries.find_all("outBiddingZone_Domain.mRID".lower())):
+            if not timeseries.out_bidding_zone:
                 continue
-        for entry in timeseries.find_all("point"):
-            position = int(entry.find_all("position")[0].contents[0])
-            value = float(entry.find_all("quantity")[0].contents[0])
-            datetime = datetime_from_position(datetime_start, position, resolution)
-            values.append(value)
-            datetimes.append(datetime)
+        datetime = datetime_from_position(
+            timeseries.datetime_start, position, timeseries.resolution
+        )
+        values.append(value)
+        datetimes.append(datetime)
 
     return values, datetimes
 
@@ -740,38 +904,29 @@ def parse_production(
 
     if not xml_text:
         return None
-    soup = BeautifulSoup(xml_text, "html.parser")
     # Get all points
     productions = []
     datetimes = []
-    for timeseries in soup.find_all("timeseries"):
-        resolution = str(timeseries.find_all("resolution")[0].contents[0])
-        datetime_start: arrow.Arrow = arrow.get(
-            timeseries.find_all("start")[0].contents[0]
-        )
-        is_production = (
-            len(timeseries.find_all("inBiddingZone_Domain.mRID".lower())) > 0
+    # Position of each datetime in `datetimes`, for constant time lookups
+    datetime_indices = {}
+    for timeseries, position, quantity in iter_timeseries_points(xml_text):
+        is_production = timeseries.in_bidding_zone
+        psr_type = timeseries.psr_type
+        datetime = datetime_from_position(
+            timeseries.datetime_start, position, timeseries.resolution
         )
-        psr_type = str(
-            timeseries.find_all("mktpsrtype")[0].find_all("psrtype")[0].contents[0]
-        )
-
-        for entry in timeseries.find_all("point"):
-            quantity = float(entry.find_all("quantity")[0].contents[0])
-            position = int(entry.find_all("position")[0].contents[0])
-            datetime = datetime_from_position(datetime_start, position, resolution)
-            try:
-                i = datetimes.index(datetime)
-                if is_production:
-                    productions[i][psr_type] += quantity
-                elif psr_type in ENTSOE_STORAGE_PARAMETERS:
-                    # Only include consumption if it's for storage. In other cases
-                    # it is power plant self-consumption which should be ignored.
-                    productions[i][psr_type] -= quantity
-            except ValueError:  # Not in list
-                datetimes.append(datetime)
-                productions.append(defaultdict(lambda: 0))
-                productions[-1][psr_type] = quantity if is_production else -1 * quantity
+        i = datetime_indices.get(datetime)
+        if i is None:
+            datetime_indices[datetime] = len(datetimes)
+            datetimes.append(datetime)
+            productions.append(defaultdict(lambda: 0))
+            productions[-1][psr_type] = quantity if is_production else -1 * quantity
+        elif is_production:
+            productions[i][psr_type] += quantity
+        elif psr_type in ENTSOE_STORAGE_PARAMETERS:
+            # Only include consumption if it's for storage. In other cases
+            # it is power plant self-consumption which should be ignored.
+            productions[i][psr_type] -= quantity
     return productions, datetimes
 
 
@@ -790,31 +945,19 @@ def parse_self_consumption(xml_text: str):
 
     if not xml_text:
         return None
-    soup = BeautifulSoup(xml_text, "html.parser")
     res = {}
-    for timeseries in soup.find_all("timeseries"):
-        is_consumption = (
-            len(timeseries.find_all("outBiddingZone_Domain.mRID".lower())) > 0
-        )
+    for timeseries, position, quantity in iter_timeseries_points(xml_text):
+        is_consumption = timeseries.out_bidding_zone
         if not is_consumption:
             continue
-        psr_type = str(
-            timeseries.find_all("mktpsrtype")[0].find_all("psrtype")[0].contents[0]
-        )
-        if psr_type in ENTSOE_STORAGE_PARAMETERS:
+        if timeseries.psr_type in ENTSOE_STORAGE_PARAMETERS:
             continue
-        resolution = str(timeseries.find_all("resolution")[0].contents[0])
-        datetime_start: arrow.Arrow = arrow.get(
-            timeseries.find_all("start")[0].contents[0]
+        if quantity == 0:
+            continue
+        datetime = datetime_from_position(
+            timeseries.datetime_start, position, timeseries.resolution
         )
-
-        for entry in timeseries.find_all("point"):
-            quantity = float(entry.find_all("quantity")[0].contents[0])
-            if quantity == 0:
-                continue
-            position = int(entry.find_all("position")[0].contents[0])
-            datetime = datetime_from_position(datetime_start, position, resolution)
-            res[datetime] = res[datetime] + quantity if datetime in res else quantity
+        res[datetime] = res[datetime] + quantity if datetime in res else quantity
 
     return res
 
@@ -824,51 +967,26 @@ def parse_production_per_units(xml_text: str) -> Union[Any, None]:
 
     if not xml_text:
         return None
-    soup = BeautifulSoup(xml_text, "html.parser")
     # Get all points
-    for timeseries in soup.find_all("timeseries"):
-        resolution = str(timeseries.find_all("resolution")[0].contents[0])
-        datetime_start: arrow.Arrow = arrow.get(
-            timeseries.find_all("start")[0].contents[0]
-        )
-        is_production = (
-            len(timeseries.find_all("inBiddingZone_Domain.mRID".lower())) > 0
-        )
-        psr_type = str(
-            timeseries.find_all("mktpsrtype")[0].find_all("psrtype")[0].contents[0]
-        )
-        unit_key = str(
-            timeseries.find_all("mktpsrtype")[0]
-            .find_all("powersystemresources")[0]
-            .find_all("mrid")[0]
-            .contents[0]
-        )
-        unit_name = str(
-            timeseries.find_all("mktpsrtype")[0]
-            .find_all("powersystemresources")[0]
-            .find_all("name")[0]
-            .contents[0]
-        )
+    for timeseries, position, quantity in iter_timeseries_points(xml_text):
+        is_production = timeseries.in_bidding_zone
         if not is_production:
             continue
-        for entry in timeseries.find_all("point"):
-            quantity = float(entry.find_all("quantity")[0].contents[0])
-            position = int(entry.find_all("position")[0].contents[0])
-            datetime = datetime_from_position(datetime_start, position, resolution)
-            key = (unit_key, datetime)
-            if key in values:
-                if is_production:
-                    values[key]["production"] += quantity
-                else:
-                    values[key]["production"] -= quantity
-            else:
-                values[key] = {
-                    "datetime": datetime,
-                    "production": quantity,
-                    "productionType": ENTSOE_PARAMETER_BY_GROUP[psr_type],
-                    "unitKey": unit_key,
-                    "unitName": unit_name,
-                }
+        unit_key = timeseries.unit_key
+        datetime = datetime_from_position(
+            timeseries.datetime_start, position, timeseries.resolution
+        )
+        key = (unit_key, datetime)
+        if key in values:
+            values[key]["production"] += quantity
+        else:
+            values[key] = {
+                "datetime": datetime,
+                "production": quantity,
+                "productionType": ENTSOE_PARAMETER_BY_GROUP[timeseries.psr_type],
+                "unitKey": unit_key,
+                "unitName": timeseries.unit_name,
+            }
 
     return values.values()
 
@@ -884,34 +1002,28 @@ def parse_exchange(
         return None
     quantities = quantities or []
     datetimes = datetimes or []
-    soup = BeautifulSoup(xml_text, "html.parser")
+    # Position of each datetime in `datetimes`, for constant time lookups
+    datetime_indices = {}
+    for i, dt in enumerate(datetimes):
+        datetime_indices.setdefault(dt, i)
     # Get all points
-    for timeseries in soup.find_all("timeseries"):
-        resolution = str(timeseries.find_all("resolution")[0].contents[0])
-        datetime_start: arrow.Arrow = arrow.get(
-            timeseries.find_all("start")[0].contents[0]
-        )
+    for timeseries, position, quantity in iter_timeseries_points(xml_text):
         # Only use contract_marketagreement.type == A01 (Total to avoid double counting some columns)
-        if (
-            timeseries.find_all("contract_marketagreement.type")
-            and timeseries.find_all("contract_marketagreement.type")[0].contents[0]
-            != "A05"
-        ):
+        if timeseries.contract_type is not None and timeseries.contract_type != "A05":
             continue
-
-        for entry in timeseries.find_all("point"):
-            quantity = float(entry.find_all("quantity")[0].contents[0])
-            if not is_import:
-                quantity *= -1
-            position = int(entry.find_all("position")[0].contents[0])
-            datetime = datetime_from_position(datetime_start, position, resolution)
-            # Find out whether or not we should update the net production
-            try:
-                i = datetimes.index(datetime)
-                quantities[i] += quantity
-            except ValueError:  # Not in list
-                quantities.append(quantity)
-                datetimes.append(datetime)
+        if not is_import:
+            quantity *= -1
+        datetime = datetime_from_position(
+            timeseries.datetime_start, position, timeseries.resolution
+        )
+        # Find out whether or not we should update the net production
+        i = datetime_indices.get(datetime)
+        if i is None:
+            datetime_indices[datetime] = len(datetimes)
+            quantities.append(quantity)
+            datetimes.append(datetime)
+        else:
+            quantities[i] += quantity
 
     return quantities, datetimes
 
@@ -922,23 +1034,22 @@ def parse_price(
 
     if not xml_text:
         return None
-    soup = BeautifulSoup(xml_text, "html.parser")
     # Get all points
     prices: List[float] = []
     currencies: List[str] = []
     datetimes: List[datetime] = []
-    for timeseries in soup.find_all("timeseries"):
-        currency = str(timeseries.find_all("currency_unit.name")[0].contents[0])
-        resolution = str(timeseries.find_all("resolution")[0].contents[0])
-        datetime_start: arrow.Arrow = arrow.get(
-            timeseries.find_all("start")[0].contents[0]
+    for timeseries, position, price in iter_timeseries_points(xml_text):
+        dt = datetime_from_position(
+            timeseries.datetime_start, position, timeseries.resolution
         )
-        for entry in timeseries.find_all("point"):
-            position = int(entry.find_all("position")[0].contents[0])
-            dt = datetime_from_position(datetime_start, position, resolution)
-            prices.append(float(entry.find_all("price.amount")[0].contents[0]))
-            datetimes.append(dt)
-            currencies.append(currency)
+        if timeseries.currency is None:
+            raise ParserException(
+                parser="ENTSOE.py",
+                message="TimeSeries without currency in ENTSOE price document",
+            )
+        prices.append(price)
+        datetimes.append(dt)
+        currencies.append(timeseries.currency)
 
     return prices, currencies, datetimes
 
@@ -1008,10 +1119,12 @@ def fetch_consumption(
                 raw_production,
             )
         if self_consumption is not None:
+            datetime_indices = {}
+            for i, dt in enumerate(datetimes):
+                datetime_indices.setdefault(dt, i)
             for dt, value in self_consumption.items():
-                try:
-                    i = datetimes.index(dt)
-                except ValueError:
+                i = datetime_indices.get(dt)
+                if i is None:
                     logger.warning(
                         f"No corresponding consumption value found for self-consumption at {dt}"
                     )
@@ -1073,27 +1186,49 @@ def fetch_production(
 
     productions, production_dates = parsed
 
-    data = []
-    for i in range(len(production_dates)):
-        production_values = {k: v for k, v in productions[i].items()}
-        production_date = production_dates[i]
+    # One row per datetime, one column per ENTSOE production type
+    values = np.full((len(productions), len(ENTSOE_GROUPED_PARAMETERS)), np.nan)
+    for i, production_values in enumerate(productions):
+        for ENTSOE_key, value in production_values.items():
+            j = ENTSOE_GROUPED_PARAMETER_INDEX.get(ENTSOE_key)
+            if j is not None:
+                values[i, j] = value
+    is_reported = ~np.isnan(values)
+    reported_values = np.where(is_reported, values, 0)
+    # Equivalent to `reported_values @ ENTSOE_GROUP_MATRIX`, but adding the production
+    # types in order so that sums are the same as summing each group one by one.
+    mode_values = np.zeros((len(productions), len(ENTSOE_GROUP_MODES)))
+    for j, group_row in enumerate(ENTSOE_GROUP_MATRIX):
+        mode_values += np.outer(reported_values[:, j], group_row)
+    mode_is_reported = (is_reported @ ENTSOE_GROUP_MATRIX) > 0
+
+    is_storage = np.array([key == "storage" for key, _ in ENTSOE_GROUP_MODES])
+    mode_values[:, is_storage] *= -1
+    # Set small negative production values to 0
+    is_small_negative = (
+        mode_is_reported & ~is_storage & (mode_values < 0) & (mode_values > -50)
+    )
+    for i, j in zip(*np.nonzero(is_small_negative)):
+        logger.warning(
+            "Setting small value of %s (%s) to 0."
+            % (ENTSOE_GROUP_MODES[j][1], mode_values[i, j].item()),
+            extra={"key": zone_key},
+        )
 
+    data = []
+    for production_date, row, row_is_reported, row_is_small_negative in zip(
+        production_dates,
+        mode_values.tolist(),
+        mode_is_reported.tolist(),
+        is_small_negative.tolist(),
+    ):
         production_types = {"production": {}, "storage": {}}
-        for key in ["production", "storage"]:
-            parameter_groups = ENTSOE_PARAMETER_GROUPS[key]
-            multiplier = -1 if key == "storage" else 1
-
-            for fuel, groups in parameter_groups.items():
-                has_value = any(
-                    [production_values.get(grp) is not None for grp in groups]
-                )
-                if has_value:
-                    value = sum([production_values.get(grp, 0) for grp in groups])
-                    value *= multiplier
-                else:
-                    value = None
-
-                production_types[key][fuel] = value
+        for (key, type), value, has_value, is_small_negative_value in zip(
+            ENTSOE_GROUP_MODES, row, row_is_reported, row_is_small_negative
+        ):
+            if is_small_negative_value:
+                value = 0
+            production_types[key][type] = value if has_value else None
 
         data.append(
             {
@@ -1107,58 +1242,95 @@ def fetch_production(
             }
         )
 
-        for d in data:
-            for k, v in d["production"].items():
-                if v is None:
-                    continue
-                if v < 0 and v > -50:
-                    # Set small negative values to 0
-                    logger.warning(
-                        "Setting small value of %s (%s) to 0." % (k, v),
-                        extra={"key": zone_key},
-                    )
-                    d["production"][k] = 0
-
     return list(filter(lambda x: validate_production(x, logger), data))
 
 
+def _mode_values(
+    points: List[Dict[str, Optional[float]]], modes: List[str]
+) -> np.ndarray:
+    """Values of the modes of production (or storage) dicts, NaN where missing."""
+    if not modes:
+        return np.empty((len(points), 0))
+    return (
+        pd.DataFrame.from_records(points, columns=modes)
+        .reindex(columns=modes)
+        .to_numpy(dtype=float, na_value=np.nan)
+    )
+
+
 # TODO: generalize and move to lib.utils so other parsers can reuse it. (it's
 # currently used by US_SEC.)
 def merge_production_outputs(parser_outputs, merge_zone_key, merge_source=None):
     """
     Given multiple parser outputs, sum the production and storage of corresponding datetimes to create a production list.
     This will drop rows where the datetime is missing in at least a parser_output.
+    Modes are summed as in `sum_production_dicts`: missing or None values count as
+    zero, and a mode is None only when it is None in every output. Summed values are
+    floats, including the sums of int values.
     """
     if len(parser_outputs) == 0:
         return []
     if merge_source is None:
         merge_source = parser_outputs[0][0]["source"]
-    prod_and_storage_dfs = [
-        pd.DataFrame(output).set_index("datetime")[["production", "storage"]]
+
+    # Position of each datetime in each output, the last point of duplicated
+    # datetimes is kept
+    outputs_positions = [
+        {point["datetime"]: i for i, point in enumerate(output)}
         for output in parser_outputs
     ]
-    to_return = prod_and_storage_dfs[0]
-    for prod_and_storage in prod_and_storage_dfs[1:]:
-        # `inner` join drops rows where one of the production is missing
-        to_return = to_return.join(prod_and_storage, how="inner", rsuffix="_other")
-        to_return["production"] = to_return.apply(
-            lambda row: sum_production_dicts(row.production, row.production_other),
-            axis=1,
+    # `inner` join drops rows where one of the production is missing
+    datetimes = [
+        dt
+        for dt in outputs_positions[0]
+        if all(dt in output_positions for output_positions in outputs_positions[1:])
+    ]
+    positions = [
+        [output_positions[dt] for dt in datetimes]
+        for output_positions in outputs_positions
+    ]
+
+    merged = {}
+    for kind in ["production", "storage"]:
+        # Modes in order of appearance
+        modes = list(
+            dict.fromkeys(
+                mode
+                for output in parser_outputs
+                for point in output
+                for mode in point[kind]
+            )
         )
-        to_return["storage"] = to_return.apply(
-            lambda row: sum_production_dicts(row.storage, row.storage_other), axis=1
+        values = np.stack(
+            [
+                _mode_values([output[i][kind] for i in output_positions], modes)
+                for output, output_positions in zip(parser_outputs, positions)
+            ]
         )
-        to_return = to_return[["production", "storage"]]
+        totals = np.nansum(values, axis=0).tolist()
+        missing = np.isnan(values).all(axis=0).tolist()
+        first = [parser_outputs[0][i][kind] for i in positions[0]]
+        merged[kind] = [
+            {
+                mode: None if is_missing else total
+                for mode, total, is_missing in zip(modes, row, row_missing)
+                # Modes of the first output are kept even when they are None
+                if not is_missing or mode in first_modes
+            }
+            for row, row_missing, first_modes in zip(totals, missing, first)
+        ]
 
     return [
         {
-            "datetime": dt.to_pydatetime(),
-            "production": row.production,
-            "storage": row.storage,
+            "datetime": pd.Timestamp(dt).to_pydatetime(),
+            "production": production,
+            "storage": storage,
             "source": merge_source,
             "zoneKey": merge_zone_key,
         }
-        for dt, row in to_return.iterrows()
+        for dt, production, storage in zip(
+            datetimes, merged["production"], merged["storage"]
+        )
     ]
 
 
@@ -5,11 +5,11 @@ from typing import Optional
 import arrow
 import cv2
 import numpy as np
-import pytesseract
-from imageio import imread
 from PIL import Image, ImageOps
 from requests import Session
 
+from parsers.lib.ocr import image_to_string
+
 url = "https://mahasldc.in/wp-content/reports/sldc/mvrreport3.jpg"
 
 # specifies locations of data in the image
@@ -114,6 +114,13 @@ def read(location, source):
     return img
 
 
+# strings together the value sections of the image, to recognize them as one line
+def values_line(image):
+    image = image.convert("RGB")
+    imgs = [read(loc["value"], image) for loc in locations.values()]
+    return Image.fromarray(np.hstack(list(np.asarray(i) for i in imgs[:])))
+
+
 # TODO: this function actually fetches consumption data
 def fetch_production(
     zone_key: str = "IN-MH",
@@ -144,15 +151,10 @@ def fetch_production(
         "source": "mahasldc.in",
     }
 
-    image = imread(url)
-    image = Image.fromarray(image)  # create PIL image
-
-    imgs = [read(loc["value"], image) for loc in locations.values()]
-
-    # string together all image sections and recognize resulting line
-    imgs_line = np.hstack(list(np.asarray(i) for i in imgs[:]))
-    imgs_line = Image.fromarray(imgs_line)
-    text = pytesseract.image_to_string(imgs_line, lang="digits_comma", config="--psm 7")
+    image = (session or Session()).get(url).content
+    text = image_to_string(
+        image, lang="digits_comma", config="--psm 7", preprocess=values_line
+    )
     text = text.split(" ")
 
     # generate dict from string list
@@ -4,7 +4,7 @@
 import json
 from datetime import datetime, timedelta
 from logging import Logger, getLogger
-from typing import Optional
+from typing import Dict, List, Optional
 
 import arrow
 import pandas as pd
@@ -13,6 +13,7 @@ from requests import Response, Session
 
 from parsers.lib.config import refetch_frequency
 from parsers.lib.exceptions import ParserException
+from parsers.lib.session_cache import SessionCache
 
 IN_WE_PROXY = "https://in-proxy-jfnx5klx2a-el.a.run.app"
 PRODUCTION_URL = f"{IN_WE_PROXY}/GeneratorSchedule_data.aspx/Get_GeneratorScheduleData_state_Wise?host=https://www.wrldc.in"
@@ -57,14 +58,28 @@ KIND_MAPPING = {
     "exchange": {"url": EXCHANGE_URL, "datetime_column": "lastUpdate"},
     "consumption": {"url": CONSUMPTION_URL, "datetime_column": "current_datetime"},
 }
+# Timestamps of the source, with the hour in 12 hour format
+DATETIME_FORMAT = "%Y-%d-%m %H:%M:%S"
+# Data of a day, see `lib.session_cache`
+DAY_DATA_MAX_AGE = 60  # seconds
 
+# Rows of a day by the (12 hour format) hour of their timestamp
+DayData = Dict[int, pd.DataFrame]
 
-def get_date_range(dt: datetime):
+_DAY_DATA = SessionCache()
+
+
+def get_hours(start: datetime, end: datetime):
     return pd.date_range(
+        arrow.get(start).floor("hour").datetime, end, freq="H"
+    ).to_pydatetime()
+
+
+def get_date_range(dt: datetime):
+    return get_hours(
         arrow.get(dt).floor("day").datetime,
         arrow.get(dt).ceil("day").floor("hour").datetime,
-        freq="H",
-    ).to_pydatetime()
+    )
 
 
 def fetch_data(
@@ -73,9 +88,9 @@ def fetch_data(
     session: Optional[Session] = None,
     target_datetime: Optional[datetime] = None,
     logger: Logger = getLogger(__name__),
-) -> dict:
-    """- get production data from wrldc.in
-    - filter all rows with same hour as target_datetime"""
+) -> pd.DataFrame:
+    """- get the data of the day of target_datetime from wrldc.in
+    - round the datetimes to the nearest minute"""
     assert target_datetime is not None
     assert kind is not None
 
@@ -92,35 +107,68 @@ def fetch_data(
             message=f"{target_datetime}: {kind} data is not available",
         )
 
-    datetime_col = KIND_MAPPING[kind]["datetime_column"]
-    for item in data:
-        item[datetime_col] = datetime.strptime(item[datetime_col], "%Y-%d-%m %H:%M:%S")
-        dt = arrow.get(item[datetime_col])
-        if dt.second >= 30:
-            item[datetime_col] = dt.shift(minutes=1).floor("minute").datetime
-        else:
-            item[datetime_col] = dt.floor("minute").datetime
-    return data
+    df = pd.DataFrame(data)
+    if not df.empty:
+        datetime_col = KIND_MAPPING[kind]["datetime_column"]
+        df[datetime_col] = (
+            pd.to_datetime(df[datetime_col], format=DATETIME_FORMAT, utc=True)
+            + pd.Timedelta(seconds=30)
+        ).dt.floor("min")
+    return df
+
+
+def split_hours(kind: str, df: pd.DataFrame) -> DayData:
+    if df.empty:
+        return {}
+    hours = df[KIND_MAPPING[kind]["datetime_column"]].dt.hour
+    return {
+        hour: rows.reset_index(drop=True)
+        for hour, rows in df.groupby(hours, sort=False)
+    }
+
+
+def get_day_data(
+    kind: str,
+    session: Optional[Session],
+    target_datetime: datetime,
+    logger: Logger = getLogger(__name__),
+) -> DayData:
+    """Returns the data of the day of target_datetime, fetched once per session."""
+    day = target_datetime.strftime("%Y-%m-%d")
+    return _DAY_DATA.get(
+        session,
+        (kind, day),
+        lambda: split_hours(
+            kind,
+            fetch_data(
+                kind=kind,
+                session=session,
+                target_datetime=target_datetime,
+                logger=logger,
+            ),
+        ),
+        DAY_DATA_MAX_AGE,
+    )
 
 
 def format_raw_data(
     kind: str,
-    data: dict,
+    data: DayData,
     target_datetime: datetime,
 ) -> pd.DataFrame:
     assert len(data) > 0
     assert kind != ""
 
     dt_12_hour = arrow.get(target_datetime.strftime("%Y-%m-%d %I:%M")).datetime
-    datetime_col = KIND_MAPPING[kind]["datetime_column"]
-    filtered_data = pd.DataFrame(
-        [item for item in data if item[datetime_col].hour == dt_12_hour.hour]
-    )
-    return filtered_data
+    filtered_data = data.get(dt_12_hour.hour)
+    if filtered_data is None:
+        return pd.DataFrame()
+    # The rows are shared by all the hours with the same 12 hour format hour
+    return filtered_data.copy()
 
 
 def format_production_data(
-    data: dict, zone_key: str, target_datetime: datetime
+    data: DayData, zone_key: str, target_datetime: datetime
 ) -> dict:
     """format production data:
     - filters out correct datetimes (source data is 12 hour format)
@@ -217,7 +265,7 @@ def format_production_data(
 
 
 def format_exchanges_data(
-    data: dict, zone_key1: str, zone_key2: str, target_datetime: datetime
+    data: DayData, zone_key1: str, zone_key2: str, target_datetime: datetime
 ) -> dict:
     """format exchanges data:
     - filters out correct datetimes (source data is 12 hour format)
@@ -258,7 +306,7 @@ def format_exchanges_data(
 
 
 def format_consumption_data(
-    data: dict, zone_key: str, target_datetime: datetime
+    data: DayData, zone_key: str, target_datetime: datetime
 ) -> dict:
     """format consumption data:
     - filters out correct datetimes (source data is 12 hour format)
@@ -299,32 +347,77 @@ def format_consumption_data(
     return consumption
 
 
-@refetch_frequency(timedelta(days=1))
-def fetch_production(
+def fetch_range(
+    kind: str,
+    start: datetime,
+    end: datetime,
     zone_key: str = "IN-WE",
+    zone_key2: Optional[str] = None,
     session: Optional[Session] = None,
-    target_datetime: Optional[datetime] = None,
     logger: Logger = getLogger(__name__),
-) -> dict:
+) -> List[dict]:
+    """
+    Returns the data points of every hour from `start` to `end` (in the timezone of
+    `start`), fetching the data of each day once. `zone_key2` is the other zone of
+    exchanges.
+    """
+    hours = get_hours(start, end)
+    days: Dict[str, List[datetime]] = {}
+    for dt in hours:
+        days.setdefault(dt.strftime("%Y-%m-%d"), []).append(dt)
+    data_points = []
+    for day_hours in days.values():
+        data = get_day_data(kind, session, day_hours[0], logger)
+        for dt in day_hours:
+            if kind == "production":
+                data_points.append(
+                    format_production_data(
+                        data=data, zone_key=zone_key, target_datetime=dt
+                    )
+                )
+            elif kind == "exchange":
+                data_points.append(
+                    format_exchanges_data(
+                        data=data,
+                        zone_key1=zone_key,
+                        zone_key2=zone_key2,
+                        target_datetime=dt,
+                    )
+                )
+            else:
+                data_points.append(
+                    format_consumption_data(
+                        data=data, zone_key=zone_key, target_datetime=dt
+                    )
+                )
+    return data_points
+
+
+def fetch_day(
+    kind: str,
+    zone_key: str,
+    zone_key2: Optional[str],
+    session: Optional[Session],
+    target_datetime: Optional[datetime],
+    logger: Logger,
+) -> List[dict]:
+    """Returns the data points of every hour of the day of target_datetime."""
     if target_datetime is None:
         target_datetime = arrow.utcnow().datetime
-    data = fetch_data(
-        zone_key=zone_key,
-        kind="production",
-        session=session,
-        target_datetime=target_datetime,
-        logger=logger,
+    hours = get_date_range(target_datetime)
+    return fetch_range(
+        kind, hours[0], hours[-1], zone_key, zone_key2, session=session, logger=logger
     )
 
-    production = [
-        format_production_data(
-            zone_key=zone_key,
-            data=data,
-            target_datetime=dt,
-        )
-        for dt in get_date_range(target_datetime)
-    ]
-    return production
+
+@refetch_frequency(timedelta(days=1))
+def fetch_production(
+    zone_key: str = "IN-WE",
+    session: Optional[Session] = None,
+    target_datetime: Optional[datetime] = None,
+    logger: Logger = getLogger(__name__),
+) -> list:
+    return fetch_day("production", zone_key, None, session, target_datetime, logger)
 
 
 @refetch_frequency(timedelta(days=1))
@@ -334,26 +427,8 @@ def fetch_exchange(
     session: Optional[Session] = None,
     target_datetime: Optional[datetime] = None,
     logger: Logger = getLogger(__name__),
-) -> dict:
-    if target_datetime is None:
-        target_datetime = arrow.utcnow().datetime
-    data = fetch_data(
-        zone_key=zone_key1,
-        kind="exchange",
-        session=session,
-        target_datetime=target_datetime,
-        logger=logger,
-    )
-    exchanges = [
-        format_exchanges_data(
-            zone_key1=zone_key1,
-            zone_key2=zone_key2,
-            data=data,
-            target_datetime=dt,
-        )
-        for dt in get_date_range(target_datetime)
-    ]
-    return exchanges
+) -> list:
+    return fetch_day("exchange", zone_key1, zone_key2, session, target_datetime, logger)
 
 
 @refetch_frequency(timedelta(days=1))
@@ -362,24 +437,5 @@ def fetch_consumption(
     session: Optional[Session] = None,
     target_datetime: Optional[datetime] = None,
     logger: Logger = getLogger(__name__),
-) -> dict:
-    if target_datetime is None:
-        target_datetime = arrow.utcnow().datetime
-    data = fetch_data(
-        zone_key=zone_key,
-        kind="consumption",
-        session=session,
-        target_datetime=target_datetime,
-        logger=logger,
-    )
-
-    consumption = [
-        format_consumption_data(
-            zone_key=zone_key,
-            data=data,
-            target_datetime=dt,
-        )
-        for dt in get_date_range(target_datetime)
-    ]
-
-    return consumption
+) -> list:
+    return fetch_day("consumption", zone_key, None, session, target_datetime, logger)
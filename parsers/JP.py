@@ -1,8 +1,10 @@
 #!/usr/bin/env python3
 # coding=utf-8
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timedelta
+from io import BytesIO
 from logging import Logger, getLogger
-from typing import Optional
+from typing import Dict, Optional, Union
 
 # The arrow library is used to handle datetimes
 import arrow
@@ -11,6 +13,8 @@ from requests import Session
 
 from parsers import occtonet
 from parsers.lib.config import refetch_frequency
+from parsers.lib.exceptions import ParserException
+from parsers.lib.session_cache import SessionCache
 
 # Abbreviations
 # JP-HKD : Hokkaido
@@ -37,6 +41,32 @@ sources = {
     "JP-ON": "www.okiden.co.jp/denki/",
 }
 ZONES_ONLY_LIVE = ["JP-TK", "JP-CB", "JP-SK"]
+# Neighbours of each area
+EXCHANGE_MAP = {
+    "JP-HKD": ["JP-TH"],
+    "JP-TH": ["JP-TK", "JP-HKD"],
+    "JP-TK": ["JP-TH", "JP-CB"],
+    "JP-CB": ["JP-TK", "JP-HR", "JP-KN"],
+    "JP-HR": ["JP-CB", "JP-KN"],
+    "JP-KN": ["JP-CB", "JP-HR", "JP-SK", "JP-CG"],
+    "JP-SK": ["JP-KN", "JP-CG"],
+    "JP-CG": ["JP-KN", "JP-SK", "JP-KY"],
+    "JP-ON": [],
+    "JP-KY": ["JP-CG"],
+}
+EXCHANGES = sorted(
+    {
+        "->".join(sorted([zone_key, neighbour]))
+        for zone_key, neighbours in EXCHANGE_MAP.items()
+        for neighbour in neighbours
+    }
+)
+# Consumption files downloaded at the same time
+DEFAULT_MAX_WORKERS = 4
+# Productions of all the areas, see `lib.session_cache`
+GRID_MAX_AGE = 60  # seconds
+
+_GRID_PRODUCTIONS = SessionCache()
 
 
 @refetch_frequency(timedelta(days=1))
@@ -50,7 +80,21 @@ def fetch_production(
     Calculates production from consumption and imports for a given area
     All production is mapped to unknown
     """
-    df = fetch_production_df(zone_key, session, target_datetime)
+    if session is None:
+        df = fetch_production_df(zone_key, session, target_datetime)
+    else:
+        # The grid needs every consumption file and line, computed once per cycle
+        productions = _GRID_PRODUCTIONS.get(
+            session,
+            target_datetime,
+            lambda: fetch_grid_production_df(session, target_datetime, logger),
+            GRID_MAX_AGE,
+        )
+        df = productions[zone_key]
+        if isinstance(df, Exception):
+            raise ParserException(
+                "JP.py", f"Production can't be calculated: {df}", zone_key
+            ) from df
     # add a row to production for each entry in the dictionary:
 
     datalist = []
@@ -78,6 +122,11 @@ def fetch_production(
     return datalist
 
 
+def _unique_index(series: pd.Series) -> pd.Series:
+    """The series with the last value of each duplicated datetime."""
+    return series[~series.index.duplicated(keep="last")]
+
+
 def fetch_production_df(
     zone_key: str = "JP-TK",
     session: Optional[Session] = None,
@@ -88,21 +137,9 @@ def fetch_production_df(
     Calculates production from consumption and imports for a given area.
     All production is mapped to unknown.
     """
-    exch_map = {
-        "JP-HKD": ["JP-TH"],
-        "JP-TH": ["JP-TK", "JP-HKD"],
-        "JP-TK": ["JP-TH", "JP-CB"],
-        "JP-CB": ["JP-TK", "JP-HR", "JP-KN"],
-        "JP-HR": ["JP-CB", "JP-KN"],
-        "JP-KN": ["JP-CB", "JP-HR", "JP-SK", "JP-CG"],
-        "JP-SK": ["JP-KN", "JP-CG"],
-        "JP-CG": ["JP-KN", "JP-SK", "JP-KY"],
-        "JP-ON": [],
-        "JP-KY": ["JP-CG"],
-    }
-    df = fetch_consumption_df(zone_key, target_datetime)
+    df = fetch_consumption_df(zone_key, target_datetime, session=session)
     df["imports"] = 0
-    for zone in exch_map[zone_key]:
+    for zone in EXCHANGE_MAP[zone_key]:
         df2 = occtonet.fetch_exchange(
             zone_key1=zone_key,
             zone_key2=zone,
@@ -127,10 +164,108 @@ def fetch_production_df(
     return df
 
 
+def fetch_grid_production_df(
+    session: Session,
+    target_datetime: Optional[datetime] = None,
+    logger: Logger = getLogger(__name__),
+) -> Dict[str, Union[pd.DataFrame, Exception]]:
+    """
+    Calculates the production of every area as `fetch_production_df`, downloading each
+    consumption file and interconnector once. Areas that can't be calculated are
+    mapped to their error.
+    """
+    errors: Dict[str, Exception] = {}
+    with ThreadPoolExecutor(DEFAULT_MAX_WORKERS) as executor:
+        consumption_futures = {
+            zone_key: executor.submit(
+                fetch_consumption_df, zone_key, target_datetime, logger, session
+            )
+            for zone_key in EXCHANGE_MAP
+        }
+        # occtonet downloads all the interconnectors at once
+        flows = {}
+        for exchange in EXCHANGES:
+            try:
+                flows[exchange] = _unique_index(
+                    pd.DataFrame(
+                        occtonet.fetch_exchange(
+                            *exchange.split("->"),
+                            session=session,
+                            target_datetime=target_datetime,
+                        )
+                    )
+                    .set_index("datetime")["netFlow"]
+                    .rename(exchange)
+                )
+            except Exception as e:
+                for zone_key in exchange.split("->"):
+                    errors.setdefault(zone_key, e)
+        consumptions = {}
+        for zone_key, future in consumption_futures.items():
+            try:
+                consumptions[zone_key] = future.result().set_index("datetime")
+            except Exception as e:
+                errors[zone_key] = e
+
+    zone_keys = [zone_key for zone_key in EXCHANGE_MAP if zone_key not in errors]
+    if not zone_keys:
+        return errors
+    # Areas by column, on the datetimes of all the consumption files
+    cons = pd.concat(
+        {z: _unique_index(consumptions[z]["cons"]) for z in zone_keys}, axis=1
+    )
+    solar = pd.concat(
+        {z: _unique_index(consumptions[z]["solar"]) for z in zone_keys}, axis=1
+    )
+    exchanges = [
+        exchange
+        for exchange in EXCHANGES
+        if any(zone_key in exchange.split("->") for zone_key in zone_keys)
+    ]
+    if exchanges:
+        flow = pd.concat([flows[e] for e in exchanges], axis=1).reindex(cons.index)
+    else:
+        flow = pd.DataFrame(index=cons.index)
+    # Sign of each exchange in the imports of each area
+    signs = pd.DataFrame(0.0, index=exchanges, columns=zone_keys)
+    for zone_key in zone_keys:
+        for neighbour in EXCHANGE_MAP[zone_key]:
+            exchange = "->".join(sorted([zone_key, neighbour]))
+            signs.loc[exchange, zone_key] = (
+                1 if exchange.split("->")[-1] == zone_key else -1
+            )
+    imports = flow.fillna(0) @ signs
+    # Datetimes known for the consumption and all the exchanges of each area
+    known = cons.notna() & solar.notna() & ((flow.isna() @ signs.abs()) == 0)
+    unknown = cons - imports - solar
+
+    productions: Dict[str, Union[pd.DataFrame, Exception]] = {}
+    for zone_key in EXCHANGE_MAP:
+        if zone_key in errors:
+            productions[zone_key] = errors[zone_key]
+            continue
+        rows = known[zone_key].to_numpy()
+        df = pd.DataFrame(
+            {
+                "datetime": cons.index[rows],
+                "cons": cons[zone_key].to_numpy()[rows],
+                "solar": solar[zone_key].to_numpy()[rows],
+            }
+        )
+        for neighbour in EXCHANGE_MAP[zone_key]:
+            exchange = "->".join(sorted([zone_key, neighbour]))
+            df[exchange] = flow[exchange].to_numpy()[rows]
+        df["imports"] = imports[zone_key].to_numpy()[rows]
+        df["unknown"] = unknown[zone_key].to_numpy()[rows]
+        productions[zone_key] = df
+    return productions
+
+
 def fetch_consumption_df(
     zone_key: str = "JP-TK",
     target_datetime: Optional[datetime] = None,
     logger: Logger = getLogger(__name__),
+    session: Optional[Session] = None,
 ):
     """
     Returns the consumption for an area as a pandas DataFrame.
@@ -169,10 +304,10 @@ def fetch_consumption_df(
     else:
         startrow = 54
 
+    r = (session or Session()).get(consumption_url[zone_key])
+    r.raise_for_status()
     try:
-        df = pd.read_csv(
-            consumption_url[zone_key], skiprows=startrow, encoding="shift-jis"
-        )
+        df = pd.read_csv(BytesIO(r.content), skiprows=startrow, encoding="shift-jis")
     except pd.errors.EmptyDataError as e:
         logger.exception("Data not available yet")
         raise e
@@ -10,12 +10,12 @@ from urllib.request import Request, urlopen
 import arrow
 from bs4 import BeautifulSoup
 from PIL import Image
-from pytesseract import image_to_string
 
 # The request library is used to fetch content through HTTP
 from requests import Session
 
 from .JP import fetch_production as JP_fetch_production
+from .lib.ocr import image_to_string
 
 # please try to write PEP8 compliant code (use a linter). One of PEP8's
 # requirement is to limit your line length to 79 characters.
@@ -67,11 +67,12 @@ def getImageText(imgUrl, lang):
     """
     req = Request(imgUrl, headers={"User-Agent": "Mozilla/5.0"})
     img_bytes = urlopen(req).read()
-    img = Image.open(BytesIO(img_bytes))
-    width, height = img.size
-    img = img.crop((0, (height / 8), 160, height))
+    # Only reads the header of the image
+    width, height = Image.open(BytesIO(img_bytes)).size
     # cropping the image, makes it easier to read for tesseract
-    text = image_to_string(img, lang=lang)
+    text = image_to_string(
+        img_bytes, box=(0, round(height / 8), 160, height), lang=lang
+    )
     return text
 
 
@@ -4,9 +4,13 @@ Mapping is done using EDL's website and Territory Generation.
 https://edlenergy.com/project/pine-creek/
 https://territorygeneration.com.au/about-us/our-power-stations/
 """
+import calendar
+import threading
+from collections import OrderedDict
 from datetime import datetime, time, timedelta
+from io import BytesIO
 from logging import Logger, getLogger
-from typing import Callable, Dict, List, TypedDict
+from typing import Callable, Dict, List, Optional, Set, Tuple, TypedDict
 
 import arrow
 import pandas as pd
@@ -22,6 +26,20 @@ australia_tz = timezone("Australia/Darwin")
 INDEX_URL = "https://ntesmo.com.au/data/daily-trading/historical-daily-trading-data/{}-daily-trading-data"
 # Data is published for the previous day only.
 DELAY = 30
+# Seconds between two fetches of the index of a year, for days that aren't published yet
+INDEX_REFRESH_INTERVAL = 15 * 60
+# Parsed daily workbooks kept in memory, e.g. for a month long backfill
+WORKBOOK_MAX_ENTRIES = 62
+
+PRODUCTION_SHEET = "Generating Unit Output"
+DEMAND_PRICE_SHEET = "System Demand and Market Price"
+# Columns read from each sheet of the daily workbooks
+SHEET_COLUMNS = {PRODUCTION_SHEET: "A:AA", DEMAND_PRICE_SHEET: "A:C"}
+
+# Links of the daily workbooks by month and day
+YearIndex = Dict[int, Dict[int, str]]
+# Sheets of a daily workbook, by name
+Workbook = Dict[str, pd.DataFrame]
 
 
 class Generator(TypedDict):
@@ -60,7 +78,7 @@ PLANT_MAPPING = {
 }
 
 
-def construct_year_index(year: int, session: Session) -> Dict[int, Dict[int, str]]:
+def construct_year_index(year: int, session: Session) -> YearIndex:
     """Browse all links on a yearly historical daily data and index them."""
     index = {}
     year_index_page = session.get(INDEX_URL.format(year))
@@ -76,43 +94,157 @@ def construct_year_index(year: int, session: Session) -> Dict[int, Dict[int, str
     return index
 
 
+class YearIndexCache:
+    """
+    Indexes of the years, kept for the life of the process. The page of a year is
+    fetched again only for a day missing from a month that isn't complete, at most
+    every `refresh_interval` seconds, and only the months that aren't complete are
+    updated. A month is complete once it is over and all its days are indexed.
+    """
+
+    def __init__(
+        self,
+        refresh_interval: float = INDEX_REFRESH_INTERVAL,
+        clock: Callable[[], datetime] = lambda: datetime.now(australia_tz),
+    ):
+        self.refresh_interval = refresh_interval
+        self.clock = clock
+        self._indexes: Dict[int, YearIndex] = {}
+        # Months that were over and had all their days indexed
+        self._complete_months: Set[Tuple[int, int]] = set()
+        self._fetched_at: Dict[int, datetime] = {}
+        self._lock = threading.Lock()
+
+    def _is_complete(
+        self, year: int, month: int, days: Dict[int, str], fetched_at: datetime
+    ) -> bool:
+        month_end = datetime(year + month // 12, month % 12 + 1, 1)
+        return (
+            fetched_at >= australia_tz.localize(month_end) + timedelta(hours=DELAY)
+            and len(days) == calendar.monthrange(year, month)[1]
+        )
+
+    def _refresh(self, year: int, session: Session):
+        fetched_at = self.clock()
+        fetched = construct_year_index(year, session)
+        index = self._indexes.setdefault(year, {})
+        for month, days in fetched.items():
+            if (year, month) not in self._complete_months:
+                index.setdefault(month, {}).update(days)
+                if self._is_complete(year, month, index[month], fetched_at):
+                    self._complete_months.add((year, month))
+        self._fetched_at[year] = fetched_at
+
+    def get_link(self, target_datetime: datetime, session: Session) -> str:
+        """Returns the link of the workbook of the day, raises KeyError if there is none."""
+        year, month, day = (
+            target_datetime.year,
+            target_datetime.month,
+            target_datetime.day,
+        )
+        with self._lock:
+            link = self._indexes.get(year, {}).get(month, {}).get(day)
+            fetched_at = self._fetched_at.get(year)
+            if (
+                link is None
+                and (year, month) not in self._complete_months
+                and (
+                    fetched_at is None
+                    or (self.clock() - fetched_at).total_seconds()
+                    >= self.refresh_interval
+                )
+            ):
+                self._refresh(year, session)
+                link = self._indexes[year][month].get(day)
+        if link is None:
+            raise KeyError(target_datetime)
+        return link
+
+
 def get_historical_daily_data(link: str, session: Session) -> bytes:
     result = session.get(link)
+    result.raise_for_status()
     return result.content
 
 
-def extract_production_data(file: bytes) -> pd.DataFrame:
-    return pd.read_excel(
-        file, "Generating Unit Output", skiprows=4, header=0, usecols="A:AA"
-    )
+def parse_workbook(file: bytes) -> Workbook:
+    """Reads all the sheets used by the parser, opening the workbook once."""
+    with pd.ExcelFile(BytesIO(file)) as workbook:
+        return {
+            sheet: workbook.parse(sheet, skiprows=4, header=0, usecols=usecols)
+            for sheet, usecols in SHEET_COLUMNS.items()
+        }
 
 
-def extract_demand_price_data(file: bytes) -> pd.DataFrame:
-    return pd.read_excel(
-        file, "System Demand and Market Price", skiprows=4, header=0, usecols="A:C"
-    )
+class WorkbookCache:
+    """
+    Parsed daily workbooks, by link, keeping the `max_entries` most recently used.
+    Concurrent calls for the same link wait for the one in progress.
+    """
+
+    def __init__(self, max_entries: int = WORKBOOK_MAX_ENTRIES):
+        self.max_entries = max_entries
+        self._workbooks: "OrderedDict[str, Workbook]" = OrderedDict()
+        self._link_locks: Dict[str, threading.Lock] = {}
+        self._lock = threading.Lock()
+
+    def _cached(self, link: str) -> Optional[Workbook]:
+        workbook = self._workbooks.get(link)
+        if workbook is not None:
+            self._workbooks.move_to_end(link)
+        return workbook
+
+    def get(self, link: str, session: Session) -> Workbook:
+        with self._lock:
+            workbook = self._cached(link)
+            if workbook is not None:
+                return workbook
+            link_lock = self._link_locks.setdefault(link, threading.Lock())
+        with link_lock:
+            with self._lock:
+                workbook = self._cached(link)
+            if workbook is not None:
+                return workbook
+            workbook = parse_workbook(get_historical_daily_data(link, session))
+            with self._lock:
+                self._workbooks[link] = workbook
+                while len(self._workbooks) > self.max_entries:
+                    self._workbooks.popitem(last=False)
+                self._link_locks.pop(link, None)
+            return workbook
+
+
+# Shared by all calls, so that backfills fetch each index and workbook once
+_YEAR_INDEXES = YearIndexCache()
+_WORKBOOKS = WorkbookCache()
+
+
+# The sheets are copied, as the cached workbooks are shared by all calls
+def extract_production_data(workbook: Workbook) -> pd.DataFrame:
+    return workbook[PRODUCTION_SHEET].copy()
+
+
+def extract_demand_price_data(workbook: Workbook) -> pd.DataFrame:
+    return workbook[DEMAND_PRICE_SHEET].copy()
 
 
 def get_data(
     session: Session,
     target_datetime: datetime,
-    extraction_func: Callable[[bytes], pd.DataFrame],
+    extraction_func: Callable[[Workbook], pd.DataFrame],
     logger: Logger,
 ) -> pd.DataFrame:
     assert target_datetime is not None, ParserException(
         "NTESMO.py", "Target datetime cannot be None."
     )
-    index = construct_year_index(target_datetime.year, session)
     try:
-        data_file = get_historical_daily_data(
-            index[target_datetime.month][target_datetime.day], session
-        )
+        link = _YEAR_INDEXES.get_link(target_datetime, session)
     except KeyError:
         raise ParserException(
             "NTESMO.py",
             f"Cannot find file on the index page for date {target_datetime}",
         )
-    return extraction_func(data_file)
+    return extraction_func(_WORKBOOKS.get(link, session))
 
 
 def parse_consumption(
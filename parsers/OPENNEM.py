@@ -1,13 +1,17 @@
+import math
+from collections import defaultdict
 from datetime import datetime, timedelta
 from logging import Logger, getLogger
 from typing import Dict, List, Mapping, Optional, Tuple, Union
 
 import arrow
+import numpy as np
 import pandas as pd
 import requests
 from requests import Session
 
 from parsers.lib.config import refetch_frequency
+from parsers.lib.session_cache import SessionCache
 
 REFETCH_FREQUENCY = timedelta(days=21)
 
@@ -61,6 +65,17 @@ OPENNEM_STORAGE_CATEGORIES = {
     "hydro": ["PUMPS"],
 }
 SOURCE = "opennem.org.au"
+# Index of a downloaded file, see `fetch_dataset_index` and `lib.session_cache`
+OPENNEM_INDEX_MAX_AGE = 60  # seconds
+
+
+def compile_categories(categories: Mapping[str, List[str]]) -> Dict[str, str]:
+    """Maps every OpenNEM column of the categories to its mode."""
+    return {column: mode for mode, columns in categories.items() for column in columns}
+
+
+OPENNEM_PRODUCTION_COLUMNS = compile_categories(OPENNEM_PRODUCTION_CATEGORIES)
+OPENNEM_STORAGE_COLUMNS = compile_categories(OPENNEM_STORAGE_CATEGORIES)
 
 
 def dataset_to_df(dataset):
@@ -122,6 +137,39 @@ def sum_vector(pd_series, keys, ignore_nans=False):
         return None
 
 
+def sum_categories(
+    df: pd.DataFrame, column_modes: Mapping[str, str], ignore_nans=False
+) -> pd.DataFrame:
+    """
+    Applies `sum_vector` to every row of `df` at once, for every mode of
+    `column_modes` (see `compile_categories`).
+    Returns a frame with one column per mode, NaN where `sum_vector` returns None.
+    """
+    modes = list(dict.fromkeys(column_modes.values()))
+    mode_indices = {mode: index for index, mode in enumerate(modes)}
+    values = df.to_numpy(dtype=float)
+    totals = np.zeros((len(df), len(modes)))
+    has_nan = np.zeros((len(df), len(modes)), dtype=bool)
+    has_column = np.zeros(len(modes), dtype=bool)
+    # Columns are added in the order of the frame, like sum_vector
+    for j, column in enumerate(df.columns):
+        if column not in column_modes:
+            continue
+        index = mode_indices[column_modes[column]]
+        is_nan = np.isnan(values[:, j])
+        totals[:, index] += np.where(is_nan, 0, values[:, j])
+        has_nan[:, index] |= is_nan
+        has_column[index] = True
+    if not ignore_nans:
+        totals[has_nan] = np.nan
+    totals[:, ~has_column] = np.nan
+    return pd.DataFrame(totals, index=df.index, columns=modes)
+
+
+def _nan_to_none(rows: List[List[float]]) -> List[List[Optional[float]]]:
+    return [[None if math.isnan(value) else value for value in row] for row in rows]
+
+
 def filter_production_objs(
     objs: List[Dict], logger: Logger = getLogger(__name__)
 ) -> List[Dict]:
@@ -208,6 +256,68 @@ def fetch_main_power_df(
     return df, filtered_datasets
 
 
+class DatasetIndex:
+    """
+    Datasets of an OpenNEM file by type and region, and by type and flow id
+    (e.g. NSW1->QLD1). Their frames are built once and shared by all callers.
+    """
+
+    def __init__(self, datasets: List[dict]):
+        self.datasets = datasets
+        self._by_region: Dict[Tuple[str, Optional[str]], List[int]] = defaultdict(list)
+        self._by_flow_id: Dict[Tuple[str, str], List[int]] = defaultdict(list)
+        for position, ds in enumerate(datasets):
+            self._by_region[(ds["type"], ds.get("region"))].append(position)
+            flow_id = (ds.get("id") or "").split(".")[-2:-1]
+            if flow_id:
+                self._by_flow_id[(ds["type"], flow_id[0])].append(position)
+        self._frames: Dict[int, pd.DataFrame] = {}
+
+    def select(
+        self,
+        data_type: str,
+        region: Optional[str] = None,
+        flow_id: Optional[str] = None,
+    ) -> List[int]:
+        """Positions of the datasets of the region or of the flow, in file order."""
+        positions = set()
+        if region:
+            positions.update(self._by_region.get((data_type, region), []))
+        if flow_id:
+            positions.update(self._by_flow_id.get((data_type, flow_id), []))
+        return sorted(positions)
+
+    def frame(self, position: int) -> pd.DataFrame:
+        """The `dataset_to_df` frame of the dataset. It must not be modified."""
+        df = self._frames.get(position)
+        if df is None:
+            df = self._frames[position] = dataset_to_df(self.datasets[position])
+        return df
+
+
+# Indexes of the files downloaded with each session, by URL
+_DATASET_INDEXES = SessionCache()
+
+
+def fetch_dataset_index(
+    url: str, session: Optional[Session], logger: Logger
+) -> DatasetIndex:
+    """
+    Downloads and indexes an OpenNEM file. Calls made with the same session within
+    OPENNEM_INDEX_MAX_AGE seconds share a single download, e.g. the production, price
+    and exchanges of all NEM zones, which are all in the latest file.
+    """
+
+    def load() -> DatasetIndex:
+        logger.info(f"Requesting {url}..")
+        r = (session or requests).get(url)
+        r.raise_for_status()
+        logger.debug("Parsing JSON..")
+        return DatasetIndex(r.json()["data"])
+
+    return _DATASET_INDEXES.get(session, url, load, OPENNEM_INDEX_MAX_AGE)
+
+
 def _fetch_main_df(
     data_type,
     zone_key: str,
@@ -225,28 +335,17 @@ def _fetch_main_df(
     )
 
     # Fetches the last week of data
-    logger.info(f"Requesting {url}..")
-    r = (session or requests).get(url)
-    r.raise_for_status()
-    logger.debug("Parsing JSON..")
-    datasets = r.json()["data"]
+    index = fetch_dataset_index(url, session, logger)
     logger.debug("Filtering datasets..")
-
-    def filter_dataset(ds: dict) -> bool:
-        filter_data_type = ds["type"] == data_type
-        filter_region = False
-        if zone_key:
-            filter_region |= ds.get("region") == region
-        if sorted_zone_keys:
-            filter_region |= (
-                ds.get("id").split(".")[-2]
-                == EXCHANGE_MAPPING_DICTIONARY["->".join(sorted_zone_keys)]["region_id"]
-            )
-        return filter_data_type and filter_region
-
-    filtered_datasets = [ds for ds in datasets if filter_dataset(ds)]
+    flow_id = None
+    if sorted_zone_keys:
+        flow_id = EXCHANGE_MAPPING_DICTIONARY["->".join(sorted_zone_keys)]["region_id"]
+    positions = index.select(
+        data_type, region=region if zone_key else None, flow_id=flow_id
+    )
+    filtered_datasets = [index.datasets[position] for position in positions]
     logger.debug("Concatenating datasets..")
-    df = pd.concat([dataset_to_df(ds) for ds in filtered_datasets], axis=1)
+    df = pd.concat([index.frame(position) for position in positions], axis=1)
 
     # Sometimes we get twice the columns. In that case, only return the first one
     is_duplicated_column = df.columns.duplicated(keep="last")
@@ -286,48 +385,42 @@ def fetch_production(
     if "BATTERY_DISCHARGING" in df.columns:
         df["BATTERY_DISCHARGING"] = df["BATTERY_DISCHARGING"] * -1
 
+    # Capacities are the same for every datetime
+    capacity = {
+        mode: sum_vector(capacities, columns)
+        for mode, columns in OPENNEM_PRODUCTION_CATEGORIES.items()
+    }
+    capacity["hydro storage"] = capacities.get(OPENNEM_STORAGE_CATEGORIES["hydro"][0])
+    capacity["battery storage"] = capacities.get(
+        OPENNEM_STORAGE_CATEGORIES["battery"][0]
+    )
+
+    # We here assume all rooftop solar is fed to the grid
+    # This assumption should be checked and we should here only report
+    # grid-level generation
+    production = sum_categories(df, OPENNEM_PRODUCTION_COLUMNS)
+    # opennem reports charging as negative, we here should report as positive
+    # Note: we made the sign switch before, so we can just sum them up
+    # opennem reports pumping as positive, we here should report as positive
+    storage = sum_categories(df, OPENNEM_STORAGE_COLUMNS)
+
     logger.debug("Preparing final objects..")
+    production_modes = list(production.columns)
+    storage_modes = list(storage.columns)
+    production_rows = _nan_to_none(production.to_numpy().tolist())
+    storage_rows = _nan_to_none(storage.to_numpy().tolist())
     objs = [
         {
-            "datetime": arrow.get(dt.to_pydatetime()).datetime,
-            "production": {  # Unit is MW
-                "coal": sum_vector(row, OPENNEM_PRODUCTION_CATEGORIES["coal"]),
-                "gas": sum_vector(row, OPENNEM_PRODUCTION_CATEGORIES["gas"]),
-                "oil": sum_vector(row, OPENNEM_PRODUCTION_CATEGORIES["oil"]),
-                "hydro": sum_vector(row, OPENNEM_PRODUCTION_CATEGORIES["hydro"]),
-                "wind": sum_vector(row, OPENNEM_PRODUCTION_CATEGORIES["wind"]),
-                "biomass": sum_vector(row, OPENNEM_PRODUCTION_CATEGORIES["biomass"]),
-                # We here assume all rooftop solar is fed to the grid
-                # This assumption should be checked and we should here only report
-                # grid-level generation
-                "solar": sum_vector(row, OPENNEM_PRODUCTION_CATEGORIES["solar"]),
-            },
-            "storage": {
-                # opennem reports charging as negative, we here should report as positive
-                # Note: we made the sign switch before, so we can just sum them up
-                "battery": sum_vector(row, OPENNEM_STORAGE_CATEGORIES["battery"]),
-                # opennem reports pumping as positive, we here should report as positive
-                "hydro": sum_vector(row, OPENNEM_STORAGE_CATEGORIES["hydro"]),
-            },
-            "capacity": {
-                "coal": sum_vector(capacities, OPENNEM_PRODUCTION_CATEGORIES["coal"]),
-                "gas": sum_vector(capacities, OPENNEM_PRODUCTION_CATEGORIES["gas"]),
-                "oil": sum_vector(capacities, OPENNEM_PRODUCTION_CATEGORIES["oil"]),
-                "hydro": sum_vector(capacities, OPENNEM_PRODUCTION_CATEGORIES["hydro"]),
-                "wind": sum_vector(capacities, OPENNEM_PRODUCTION_CATEGORIES["wind"]),
-                "biomass": sum_vector(
-                    capacities, OPENNEM_PRODUCTION_CATEGORIES["biomass"]
-                ),
-                "solar": sum_vector(capacities, OPENNEM_PRODUCTION_CATEGORIES["solar"]),
-                "hydro storage": capacities.get(OPENNEM_STORAGE_CATEGORIES["hydro"][0]),
-                "battery storage": capacities.get(
-                    OPENNEM_STORAGE_CATEGORIES["battery"][0]
-                ),
-            },
+            "datetime": arrow.get(dt).datetime,
+            "production": dict(zip(production_modes, production_row)),  # Unit is MW
+            "storage": dict(zip(storage_modes, storage_row)),
+            "capacity": dict(capacity),
             "source": SOURCE,
             "zoneKey": zone_key,
         }
-        for dt, row in df.iterrows()
+        for dt, production_row, storage_row in zip(
+            df.index.to_pydatetime(), production_rows, storage_rows
+        )
     ]
 
     objs = filter_production_objs(objs)
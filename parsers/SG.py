@@ -3,14 +3,16 @@
 import re
 from collections import defaultdict
 from datetime import datetime
+from io import BytesIO
 from logging import Logger, getLogger
 from typing import Optional
 
 import arrow
 from PIL import Image, ImageOps
-from pytesseract import image_to_string
 from requests import Session
 
+from parsers.lib.ocr import image_to_string
+
 TIMEZONE = "Asia/Singapore"
 
 TICKER_URL = "https://www.emcsg.com/ChartServer/blue/ticker"
@@ -61,7 +63,7 @@ def get_solar(session: Session, logger: Logger) -> Optional[float]:
     """
 
     url = SOLAR_URL
-    solar_image = Image.open(session.get(url, stream=True).raw)
+    solar_image = session.get(url).content
 
     solar_mw = __detect_output_from_solar_image(solar_image, logger)
     solar_dt = __detect_datetime_from_solar_image(solar_image, logger)
@@ -252,18 +254,19 @@ def fetch_price(
     }
 
 
-def __detect_datetime_from_solar_image(solar_image, logger: Logger):
-    w, h = solar_image.size
+def __detect_datetime_from_solar_image(solar_image: bytes, logger: Logger):
+    # Only reads the header of the image
+    w, h = Image.open(BytesIO(solar_image)).size
     crop_left = int(w * 0.75)
     crop_top = int(h * 0.87)
     crop_right = int(w * 0.93)
     crop_bottom = int(h * 0.92)
-    time_img = solar_image.crop((crop_left, crop_top, crop_right, crop_bottom))
-    processed_img = __preprocess_image_for_ocr(time_img)
     text = image_to_string(
-        processed_img,
+        solar_image,
+        box=(crop_left, crop_top, crop_right, crop_bottom),
         lang="eng",
         config='--psm 7 -c tessedit_char_whitelist="0123456789:- "',
+        preprocess=__preprocess_image_for_ocr,
     )
 
     try:
@@ -278,15 +281,20 @@ def __detect_datetime_from_solar_image(solar_image, logger: Logger):
     return solar_dt
 
 
-def __detect_output_from_solar_image(solar_image, logger: Logger):
-    w, h = solar_image.size
+def __detect_output_from_solar_image(solar_image: bytes, logger: Logger):
+    # Only reads the header of the image
+    w, h = Image.open(BytesIO(solar_image)).size
     crop_left = int(w * 0.65)
     crop_top = int(h * 0.74)
     crop_right = int(w * 0.93)
     crop_bottom = int(h * 0.80)
-    output_img = solar_image.crop((crop_left, crop_top, crop_right, crop_bottom))
-    processed_img = __preprocess_image_for_ocr(output_img)
-    text = image_to_string(processed_img, lang="eng", config="--psm 7")
+    text = image_to_string(
+        solar_image,
+        box=(crop_left, crop_top, crop_right, crop_bottom),
+        lang="eng",
+        config="--psm 7",
+        preprocess=__preprocess_image_for_ocr,
+    )
 
     try:
         pattern = r"Est. PV Output: (.*)MWac"
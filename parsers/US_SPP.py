@@ -56,41 +56,48 @@ def data_processor(df, logger: Logger) -> list:
     """
     Takes a dataframe and logging instance as input.
     Checks for new generation types and logs a warning if any are found.
-    Parses the dataframe row by row removing unneeded keys.
+    Maps the columns of the dataframe to production modes, summing unknown columns.
 
     :return: list of tuples containing a datetime object and production dictionary.
     """
 
     # Remove leading whitespace in column headers.
-    df.columns = df.columns.str.strip()
+    df = df.set_axis(df.columns.str.strip(), axis=1)
     df = df.rename(
         columns={"Gas Self": "Natural Gas Self"}
     )  # Fix naming error which otherwise misclassifies Gas Self as Unknown
     # Some historical csvs split the production into 'Market' and 'Self',
     # So first we need to combine those.
+    combined_columns = {}
+    merged_columns = set()
     for col in df.columns:
         if "Market" in col:
             combined_col = col.replace("Market", "").strip()
             self_col = col.replace("Market", "Self")
             if self_col in df.columns:
-                df[combined_col] = df[col] + df[self_col]
-                df.drop(self_col, inplace=True, axis=1)
+                combined_columns[combined_col] = df[col] + df[self_col]
+                merged_columns.add(self_col)
             else:
                 logger.warning(
                     f'Corresponding column "{self_col}" to "{col}" not found in file',
                     extra={"key": "US-SPP"},
                 )
-                df[combined_col] = df[col]
-
-            df.drop(col, inplace=True, axis=1)
+                combined_columns[combined_col] = df[col]
+            merged_columns.update((col, combined_col))
+    if combined_columns:
+        df = pd.concat(
+            [
+                df.drop(columns=[col for col in df.columns if col in merged_columns]),
+                pd.DataFrame(combined_columns, index=df.index),
+            ],
+            axis=1,
+        )
 
     keys_to_remove = {"GMT MKT Interval", "Average Actual Load", "Load"}
 
     # Check for new generation columns.
     known_keys = MAPPING.keys() | keys_to_remove
-    column_headers = set(df.columns)
-
-    unknown_keys = column_headers - known_keys
+    unknown_keys = [col for col in df.columns if col not in known_keys]
 
     for heading in unknown_keys:
         if heading not in ["Other", "Waste Heat"]:
@@ -99,22 +106,14 @@ def data_processor(df, logger: Logger) -> list:
                 extra={"key": "US-SPP"},
             )
 
-    keys_to_remove = keys_to_remove | unknown_keys
-
-    processed_data = []
-    for index in range(len(df)):
-        production = df.loc[index].to_dict()
-        production["unknown"] = sum([production[k] for k in unknown_keys])
-
-        dt_aware = production["GMT MKT Interval"].to_pydatetime()
-        for k in keys_to_remove:
-            production.pop(k, None)
-
-        production = {k: float(v) for k, v in production.items()}
-        mapped_production = {MAPPING.get(k, k): v for k, v in production.items()}
+    production = df[[col for col in df.columns if col in MAPPING]].rename(
+        columns=MAPPING
+    )
+    # NaN in any unknown column makes the unknown production NaN
+    production["unknown"] = sum((df[k] for k in unknown_keys), 0)
+    datetimes = pd.DatetimeIndex(df["GMT MKT Interval"]).to_pydatetime()
 
-        processed_data.append((dt_aware, mapped_production))
-    return processed_data
+    return list(zip(datetimes, production.astype(float).to_dict("records")))
 
 
 @refetch_frequency(timedelta(days=1))
@@ -10,13 +10,27 @@ To get the very exact data, we would need to have a parser running constanty to
 """
 
 import json
+import threading
+import time
+from datetime import datetime, timezone
 from logging import Logger, getLogger
-from typing import Optional
+from typing import Callable, Dict, Optional, Tuple
 
 import arrow
 from requests import Session
 from signalr import Connection
 
+from parsers.lib.exceptions import ParserException
+
+SIGNALR_URL = "https://data.ajenti.com.au/live/signalr"
+# The hubs send a payload every few seconds
+FIRST_PAYLOAD_TIMEOUT = 10  # seconds
+MAX_PAYLOAD_AGE = 60  # seconds
+# Connections that stay silent for longer are replaced
+SILENT_CONNECTION_TIMEOUT = 60  # seconds
+MIN_RECONNECT_DELAY = 1  # seconds
+MAX_RECONNECT_DELAY = 300  # seconds
+
 ZONE_PARAMS = {
     "AUS-TAS-KI": {
         "hub": "TagHub",
@@ -45,25 +59,164 @@ ZONE_PARAMS = {
 }
 
 
-class SignalR:
-    def __init__(self, url):
+class HubSubscriber:
+    """
+    Long-lived subscription to a method of a SignalR hub, keeping its latest payload.
+    A background thread keeps the connection open, and reconnects with an exponential
+    backoff when it fails or stays silent.
+    """
+
+    def __init__(
+        self,
+        url: str,
+        hub: str,
+        method: str,
+        min_reconnect_delay: float = MIN_RECONNECT_DELAY,
+        max_reconnect_delay: float = MAX_RECONNECT_DELAY,
+        silent_connection_timeout: float = SILENT_CONNECTION_TIMEOUT,
+        clock: Callable[[], float] = time.monotonic,
+        logger: Logger = getLogger(__name__),
+    ):
         self.url = url
+        self.hub = hub
+        self.method = method
+        self.min_reconnect_delay = min_reconnect_delay
+        self.max_reconnect_delay = max_reconnect_delay
+        self.silent_connection_timeout = silent_connection_timeout
+        self.clock = clock
+        self.logger = logger
+        self.payload: Optional[dict] = None
+        # Time of the latest payload, according to `clock`
+        self.updated_at: Optional[float] = None
+        self.received_at: Optional[datetime] = None
+        self.connections = 0
+        self._received = threading.Condition()
+        self._stopped = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def start(self):
+        if self._thread is None or not self._thread.is_alive():
+            self._stopped.clear()
+            self._thread = threading.Thread(
+                target=self._run, name=f"ajenti-{self.hub}", daemon=True
+            )
+            self._thread.start()
+
+    def stop(self, timeout: Optional[float] = None):
+        """Stops reconnecting, and waits at most `timeout` for the connection to close."""
+        self._stopped.set()
+        if self._thread is not None:
+            self._thread.join(timeout)
+
+    def update(self, payload: dict):
+        if payload != {}:
+            with self._received:
+                self.payload = payload
+                self.updated_at = self.clock()
+                self.received_at = datetime.now(timezone.utc)
+                self._received.notify_all()
+
+    def latest(self, timeout: float, max_age: float) -> Tuple[dict, datetime]:
+        """
+        Returns the latest payload and the time it was received at (in UTC), waiting
+        at most `timeout` seconds for a payload if there is none younger than
+        `max_age` seconds.
+        """
+
+        def is_fresh() -> bool:
+            return (
+                self.updated_at is not None
+                and self.clock() - self.updated_at <= max_age
+            )
+
+        with self._received:
+            if not self._received.wait_for(is_fresh, timeout):
+                age = "never" if self.updated_at is None else "too long ago"
+                raise ParserException(
+                    "ajenti", f"{self.hub}.{self.method} last sent a payload {age}"
+                )
+            return self.payload, self.received_at
 
-    def update_res(self, msg):
-        if msg != {}:
-            self.res = msg
+    def _run(self):
+        delay = self.min_reconnect_delay
+        while not self._stopped.is_set():
+            updated_at = self.updated_at
+            try:
+                self._listen()
+            except Exception as e:
+                self.logger.warning(f"{self.hub} connection failed: {e!r}")
+            if self._stopped.is_set():
+                break
+            if self.updated_at != updated_at:
+                # The connection worked for a while
+                delay = self.min_reconnect_delay
+            self.logger.info(f"Reconnecting to {self.hub} in {delay}s")
+            self._stopped.wait(delay)
+            delay = min(2 * delay, self.max_reconnect_delay)
 
-    def get_value(self, hub, method):
-        self.res = {}
+    def _listen(self):
+        """Listens to the hub until the connection fails or stays silent."""
         with Session() as session:
-            # create a connection
             connection = Connection(self.url, session)
-            chat = connection.register_hub(hub)
-            chat.client.on(method, self.update_res)
+            connection.register_hub(self.hub).client.on(self.method, self.update)
             connection.start()
-            connection.wait(3)
-            connection.close()
-            return self.res
+            self.connections += 1
+            connected_at = self.clock()
+            try:
+                while connection.is_open and not self._stopped.wait(0.1):
+                    last_activity = max(connected_at, self.updated_at or connected_at)
+                    if self.clock() - last_activity > self.silent_connection_timeout:
+                        self.logger.warning(f"{self.hub} stayed silent, reconnecting")
+                        break
+            finally:
+                connection.close()
+
+
+class SignalR:
+    """
+    Subscriptions to the hubs of a SignalR endpoint. Each hub method is subscribed to
+    on first use, and its payloads are then served from memory.
+    """
+
+    def __init__(self, url, **kwargs):
+        self.url = url
+        # Passed to HubSubscriber
+        self.kwargs = kwargs
+        self._subscribers: Dict[Tuple[str, str], HubSubscriber] = {}
+        self._lock = threading.Lock()
+
+    def subscriber(self, hub: str, method: str) -> HubSubscriber:
+        with self._lock:
+            subscriber = self._subscribers.get((hub, method))
+            if subscriber is None:
+                subscriber = HubSubscriber(self.url, hub, method, **self.kwargs)
+                self._subscribers[(hub, method)] = subscriber
+            subscriber.start()
+            return subscriber
+
+    def get_value(
+        self,
+        hub: str,
+        method: str,
+        timeout: float = FIRST_PAYLOAD_TIMEOUT,
+        max_age: float = MAX_PAYLOAD_AGE,
+    ) -> Tuple[dict, datetime]:
+        """
+        Returns the latest payload of the hub method and the time it was received at,
+        see HubSubscriber.latest.
+        """
+        return self.subscriber(hub, method).latest(timeout, max_age)
+
+    def close(self, timeout: Optional[float] = None):
+        with self._lock:
+            subscribers = list(self._subscribers.values())
+            self._subscribers.clear()
+        for subscriber in subscribers:
+            subscriber.stop(timeout)
+
+
+# Shared by all zones and calls, so that subscriptions outlive fetches
+AJENTI_SIGNALR = SignalR(SIGNALR_URL)
 
 
 def parse_payload(logger: Logger, payload) -> dict:
@@ -152,15 +305,14 @@ def fetch_production(
     except KeyError:
         raise KeyError("The zone " + zone_key + " isn't implemented")
 
-    payload = SignalR("https://data.ajenti.com.au/live/signalr").get_value(
-        hub, dashboard
-    )
+    # Payloads are kept for up to MAX_PAYLOAD_AGE, they are dated when received
+    payload, received_at = AJENTI_SIGNALR.get_value(hub, dashboard)
     technologies_parsed = parse_payload(logger, payload)
     storage_techs = sum_storage_techs(technologies_parsed)
 
     return {
         "zoneKey": zone_key,
-        "datetime": arrow.now(tz=tz).datetime,
+        "datetime": arrow.get(received_at).to(tz).datetime,
         "production": {
             "biomass": technologies_parsed["biomass"],
             "coal": technologies_parsed["coal"],
@@ -0,0 +1,264 @@
+"""
+Recomputes the history of zones and exchanges over a range of datetimes.
+
+The range is split into windows sized by the refetch frequency of each parser (see
+`parsers.lib.config.refetch_frequency`), and the parser is called once per window with
+the end of the window as target datetime. Windows run concurrently through `fetch_all`,
+under its per-source limits. Completed windows are appended to a manifest, so that an
+interrupted backfill resumes where it stopped.
+"""
+
+import json
+from datetime import datetime, timedelta, timezone
+from logging import Logger, getLogger
+from pathlib import Path
+from typing import (
+    Any,
+    Callable,
+    Dict,
+    Iterable,
+    List,
+    NamedTuple,
+    Optional,
+    Tuple,
+    Union,
+)
+
+import numpy as np
+
+from parsers.lib.fetch import FetchJob, FetchResult, fetch_all
+
+# Refetch frequency of parsers that don't specify one
+DEFAULT_REFETCH_FREQUENCY = timedelta(days=1)
+# Windows per `fetch_all` run, which keeps all the responses of the run in memory
+DEFAULT_BATCH_SIZE = 256
+
+
+class BackfillResult(NamedTuple):
+    # Data points of each job, deduplicated and in chronological order
+    data: Dict[FetchJob, List[Dict[str, Any]]]
+    # Windows that failed, they are fetched again by the next run
+    failures: List[FetchResult]
+    # Number of windows read from the manifest rather than fetched
+    resumed: int
+
+
+def get_refetch_frequency(parser: Callable) -> timedelta:
+    return getattr(parser, "REFETCH_FREQUENCY", DEFAULT_REFETCH_FREQUENCY)
+
+
+def windows(start: datetime, end: datetime, frequency: timedelta) -> List[datetime]:
+    """
+    Returns the target datetimes of the windows covering [start, end], in chronological
+    order. The window of target datetime `t` covers (t - frequency, t], the last window
+    ends at `end`.
+    """
+    if frequency <= timedelta(0):
+        raise ValueError(f"Invalid refetch frequency {frequency}")
+    if end < start:
+        raise ValueError(f"The range ends ({end}) before it starts ({start})")
+    target_datetimes = [end]
+    while target_datetimes[-1] - frequency >= start:
+        target_datetimes.append(target_datetimes[-1] - frequency)
+    return target_datetimes[::-1]
+
+
+def as_utc(dt: datetime) -> datetime:
+    """The datetime in UTC, naive datetimes being UTC."""
+    if dt.tzinfo is None:
+        return dt.replace(tzinfo=timezone.utc)
+    return dt.astimezone(timezone.utc)
+
+
+def to_json(value: Any) -> Any:
+    """Serialises the values of data points that JSON doesn't support, see json.dump."""
+    if isinstance(value, datetime):
+        return value.isoformat()
+    if isinstance(value, np.generic):
+        return value.item()
+    raise TypeError(f"{type(value).__name__} is not JSON serializable")
+
+
+class BackfillManifest:
+    """
+    Data of the completed windows of a backfill, stored as one JSON object per line,
+    appended as the windows complete. An incomplete last line, e.g. from an interrupted
+    run, is ignored.
+    """
+
+    def __init__(self, path: Union[str, Path], logger: Logger = getLogger(__name__)):
+        self.path = Path(path)
+        self.windows: Dict[FetchJob, List[Dict[str, Any]]] = {}
+        if not self.path.exists():
+            return
+        with self.path.open() as f:
+            for line_number, line in enumerate(f, 1):
+                try:
+                    entry = json.loads(line)
+                except json.JSONDecodeError:
+                    logger.warning(f"Ignoring invalid line {line_number} of {path}")
+                    continue
+                job = FetchJob(
+                    entry["key"],
+                    entry["data_type"],
+                    as_utc(datetime.fromisoformat(entry["target_datetime"])),
+                )
+                for point in entry["data"]:
+                    if "datetime" in point:
+                        point["datetime"] = as_utc(
+                            datetime.fromisoformat(point["datetime"])
+                        )
+                self.windows[job] = entry["data"]
+
+    def add(self, job: FetchJob, data: List[Dict[str, Any]]):
+        entry = {
+            "key": job.key,
+            "data_type": job.data_type,
+            "target_datetime": job.target_datetime,
+            "data": data,
+        }
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        with self.path.open("a") as f:
+            f.write(json.dumps(entry, default=to_json) + "\n")
+        self.windows[job] = data
+
+
+def _as_list(data: Any) -> List[Dict[str, Any]]:
+    if data is None:
+        return []
+    if isinstance(data, dict):
+        return [data]
+    return list(data)
+
+
+def merge_windows(
+    job: FetchJob,
+    window_data: Iterable[List[Dict[str, Any]]],
+    start: datetime,
+    end: datetime,
+    logger: Logger = getLogger(__name__),
+) -> List[Dict[str, Any]]:
+    """
+    Merges the data of the windows of a job, given in chronological order. Points are
+    deduplicated by zone (or exchange) and datetime, keeping the one of the latest
+    window, and points outside [start, end] are dropped. Naive datetimes are UTC, the
+    datetimes of the merged points are in UTC.
+    """
+    start, end = as_utc(start), as_utc(end)
+    points: Dict[Tuple[str, datetime], Dict[str, Any]] = {}
+    for data in window_data:
+        for point in data:
+            dt = point.get("datetime")
+            if dt is None:
+                logger.warning(f"{job.key} {job.data_type}: ignoring {point}")
+                continue
+            dt = as_utc(dt)
+            if dt is not point["datetime"]:
+                point = {**point, "datetime": dt}
+            if start <= dt <= end:
+                key = point.get("zoneKey") or point.get("sortedZoneKeys") or job.key
+                points[(key, dt)] = point
+    return [points[key] for key in sorted(points, key=lambda key: key[1])]
+
+
+def backfill(
+    jobs: Iterable[FetchJob],
+    start: datetime,
+    end: datetime,
+    manifest_path: Optional[Union[str, Path]] = None,
+    parsers: Optional[Dict[str, Dict[str, Callable]]] = None,
+    batch_size: int = DEFAULT_BATCH_SIZE,
+    logger: Logger = getLogger(__name__),
+    **kwargs,
+) -> BackfillResult:
+    """
+    Fetches the data of the jobs (zones or exchanges and data types) from `start` to
+    `end`, naive datetimes being UTC.
+
+    Each job is split into windows of the refetch frequency of its parser, which run
+    concurrently, in batches of `batch_size` windows. `kwargs` are passed to
+    `fetch_all`, e.g. the concurrency limits.
+    If `manifest_path` is given, completed windows are recorded there, and the windows
+    already recorded aren't fetched again.
+    """
+    if parsers is None:
+        from parsers.lib.parsers import PARSER_KEY_TO_DICT
+
+        parsers = PARSER_KEY_TO_DICT
+
+    start, end = as_utc(start), as_utc(end)
+    manifest = BackfillManifest(manifest_path, logger) if manifest_path else None
+    completed: Dict[FetchJob, List[Dict[str, Any]]] = {}
+    failures: List[FetchResult] = []
+    job_windows: Dict[FetchJob, List[FetchJob]] = {}
+    # Jobs are deduplicated, keeping their order
+    for job in dict.fromkeys(FetchJob(job.key, job.data_type) for job in jobs):
+        try:
+            parser = parsers.get(job.data_type, {}).get(job.key)
+            error = None
+        except Exception as e:
+            parser, error = None, e
+        if parser is None:
+            failures.append(
+                FetchResult(
+                    job=job,
+                    source="",
+                    data=None,
+                    error=error or KeyError(f"No {job.data_type} parser for {job.key}"),
+                    wait_time=None,
+                    run_time=None,
+                )
+            )
+            continue
+        job_windows[job] = [
+            FetchJob(job.key, job.data_type, target_datetime)
+            for target_datetime in windows(start, end, get_refetch_frequency(parser))
+        ]
+
+    pending = []
+    for window in (w for window_jobs in job_windows.values() for w in window_jobs):
+        if manifest is not None and window in manifest.windows:
+            completed[window] = manifest.windows[window]
+        else:
+            pending.append(window)
+    resumed = len(completed)
+    if resumed:
+        logger.info(f"Resuming from {manifest_path}: {resumed} windows completed")
+    # Windows of different jobs at the same time run together, which spreads the
+    # load over the sources.
+    pending.sort(key=lambda window: window.target_datetime)
+
+    def on_result(result: FetchResult):
+        if not result.ok:
+            failures.append(result)
+            return
+        data = _as_list(result.data)
+        if manifest is not None:
+            try:
+                manifest.add(result.job, data)
+            except (TypeError, ValueError) as e:
+                # e.g. a value that can't be serialised, the other windows go on
+                logger.warning(f"{result.job}: can't record the window: {e}")
+                failures.append(result._replace(error=e))
+                return
+        completed[result.job] = data
+
+    for i in range(0, len(pending), batch_size):
+        batch = pending[i : i + batch_size]
+        logger.info(
+            f"Fetching windows {i + 1}-{i + len(batch)}/{len(pending)} "
+            f"up to {batch[-1].target_datetime}"
+        )
+        fetch_all(batch, parsers=parsers, on_result=on_result, logger=logger, **kwargs)
+
+    data = {
+        job: merge_windows(
+            job,
+            (completed[window] for window in window_jobs if window in completed),
+            start,
+            end,
+            logger,
+        )
+        for job, window_jobs in job_windows.items()
+    }
+    return BackfillResult(data=data, failures=failures, resumed=resumed)
@@ -0,0 +1,158 @@
+"""
+Shares the responses of identical GET requests made during a fetch cycle.
+
+Many zones are computed from the same upstream document (e.g. ENTSOE consumption
+re-queries production, aggregates fetch each of their sub-zones). Sessions using a
+`CoalescingHTTPAdapter` backed by the same `RequestCoalescer` make a single upstream
+call per resource: concurrent requests wait for the call in flight, and later ones
+are served its response body.
+"""
+
+import copy
+import threading
+from concurrent.futures import Future
+from typing import Callable, Dict, Optional, Tuple
+from urllib.parse import parse_qsl, urlencode, urlsplit, urlunsplit
+
+from requests import PreparedRequest, Response, Session
+from requests.adapters import HTTPAdapter
+
+# Query parameters holding credentials, which don't change the requested resource
+CREDENTIAL_PARAMS = {"access_token", "api_key", "apikey", "securitytoken", "token"}
+COALESCED_METHODS = {"GET", "HEAD"}
+# Headers of the connection, which don't change the response
+CONNECTION_HEADERS = {"connection", "content-length", "keep-alive"}
+
+RequestKey = Tuple[str, str, Tuple[Tuple[str, str], ...]]
+
+
+def request_key(request: PreparedRequest) -> RequestKey:
+    """
+    Returns the method, the normalised URL and the headers of the request: lowercase
+    scheme and host, query parameters sorted and without credentials, header names
+    lowercase and sorted. The cookies of the session are part of the headers.
+    """
+    url = urlsplit(request.url)
+    params = sorted(
+        (key, value)
+        for key, value in parse_qsl(url.query, keep_blank_values=True)
+        if key.lower() not in CREDENTIAL_PARAMS
+    )
+    normalised_url = urlunsplit(
+        (url.scheme.lower(), url.netloc.lower(), url.path, urlencode(params), "")
+    )
+    headers = tuple(
+        sorted(
+            (name.lower(), value)
+            for name, value in request.headers.items()
+            if name.lower() not in CONNECTION_HEADERS
+        )
+    )
+    return str(request.method), normalised_url, headers
+
+
+class RequestCoalescer:
+    """
+    Responses shared by the requests of one fetch cycle. Only successful responses
+    that don't set cookies are shared, others are retried by the next identical
+    request.
+    Create a new coalescer for every cycle, or `clear` it.
+    """
+
+    def __init__(self):
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        self._responses: Dict[RequestKey, Response] = {}
+        self._in_flight: Dict[RequestKey, "Future[Optional[Response]]"] = {}
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return {"hits": self.hits, "misses": self.misses}
+
+    def clear(self):
+        with self._lock:
+            self._responses.clear()
+            self.hits = 0
+            self.misses = 0
+
+    def send(self, request: PreparedRequest, send: Callable[[], Response]) -> Response:
+        """Returns the shared response to the request, calling `send` on a miss."""
+        key = request_key(request)
+        with self._lock:
+            response = self._responses.get(key)
+            in_flight = self._in_flight.get(key)
+            if response is not None:
+                self.hits += 1
+            elif in_flight is None:
+                in_flight = self._in_flight[key] = Future()
+                self.misses += 1
+                is_leader = True
+            else:
+                is_leader = False
+        if response is not None:
+            return _copy_response(response, request)
+
+        if not is_leader:
+            response = in_flight.result()
+            with self._lock:
+                if response is not None:
+                    self.hits += 1
+                else:
+                    self.misses += 1
+            if response is not None:
+                return _copy_response(response, request)
+            # The request in flight failed, try again
+            return send()
+
+        response = None
+        try:
+            response = send()
+            # Read the body now, so that it can be shared
+            response.content
+        finally:
+            # A copy, so that changes made by the caller to its response are not shared.
+            # Responses setting cookies aren't shared, each session needs its own.
+            shared = (
+                _copy_response(response, request)
+                if response is not None
+                and response.ok
+                and "Set-Cookie" not in response.headers
+                else None
+            )
+            with self._lock:
+                del self._in_flight[key]
+                if shared is not None:
+                    self._responses[key] = shared
+            in_flight.set_result(shared)
+        return response
+
+
+def _copy_response(response: Response, request: PreparedRequest) -> Response:
+    copied = copy.copy(response)
+    copied.headers = copy.deepcopy(response.headers)
+    copied.cookies = copy.deepcopy(response.cookies)
+    copied.request = request
+    return copied
+
+
+class CoalescingHTTPAdapter(HTTPAdapter):
+    """HTTPAdapter sharing the responses of GET requests through a RequestCoalescer."""
+
+    def __init__(self, coalescer: RequestCoalescer, *args, **kwargs):
+        self.coalescer = coalescer
+        super().__init__(*args, **kwargs)
+
+    def send(self, request: PreparedRequest, **kwargs) -> Response:
+        if request.method not in COALESCED_METHODS or kwargs.get("stream"):
+            return super().send(request, **kwargs)
+        send = super().send
+        return self.coalescer.send(request, lambda: send(request, **kwargs))
+
+
+def coalescing_session(coalescer: RequestCoalescer) -> Session:
+    session = Session()
+    adapter = CoalescingHTTPAdapter(coalescer)
+    session.mount("http://", adapter)
+    session.mount("https://", adapter)
+    return session
@@ -0,0 +1,229 @@
+"""
+Runs many parsers concurrently, e.g. every zone and exchange of a fetch cycle.
+
+Jobs run on a bounded thread pool. Each source (parser module, e.g. ENTSOE) has its
+own concurrency limit and a shared `requests.Session`, so that jobs hitting the same
+upstream API reuse its connections without exceeding its limit. Identical requests
+made by different jobs of a run share a single upstream call (see `coalescing`).
+"""
+
+import time
+from collections import defaultdict, deque
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+from datetime import datetime
+from logging import Logger, getLogger
+from typing import Any, Callable, Deque, Dict, Iterable, List, NamedTuple, Optional
+
+from requests import Session
+from requests.adapters import HTTPAdapter
+
+from electricitymap.contrib.config import EXCHANGES_CONFIG, ZONES_CONFIG
+from parsers.lib.coalescing import CoalescingHTTPAdapter, RequestCoalescer
+
+DEFAULT_MAX_WORKERS = 16
+DEFAULT_MAX_WORKERS_PER_SOURCE = 4
+DEFAULT_TIMEOUT = 60  # seconds
+EXCHANGE_DATA_TYPES = ["exchange", "exchangeForecast"]
+# How often timeouts are checked while waiting for jobs to complete
+POLL_INTERVAL = 0.1  # seconds
+
+
+class FetchJob(NamedTuple):
+    key: str  # zone key, or sorted zone keys (e.g. "DE->FR") for exchanges
+    data_type: str
+    # Overrides the target datetime of the run, e.g. for backfills
+    target_datetime: Optional[datetime] = None
+
+
+class FetchResult(NamedTuple):
+    job: FetchJob
+    source: str
+    data: Any
+    error: Optional[BaseException]
+    wait_time: Optional[float]  # seconds from the start of the run to the job's start
+    run_time: Optional[float]  # seconds spent in the parser
+
+    @property
+    def ok(self) -> bool:
+        return self.error is None
+
+
+class TimeoutHTTPAdapter(HTTPAdapter):
+    """HTTPAdapter applying a default timeout to requests that don't set one."""
+
+    def __init__(self, timeout: float, *args, **kwargs):
+        self.timeout = timeout
+        super().__init__(*args, **kwargs)
+
+    def send(self, request, **kwargs):
+        if kwargs.get("timeout") is None:
+            kwargs["timeout"] = self.timeout
+        return super().send(request, **kwargs)
+
+
+def get_source(job: FetchJob, parser: Callable) -> str:
+    """
+    Returns the name of the parser module configured for the job (e.g. ENTSOE),
+    or the module the parser function is defined in.
+    """
+    config = EXCHANGES_CONFIG if job.data_type in EXCHANGE_DATA_TYPES else ZONES_CONFIG
+    function_name = config.get(job.key, {}).get("parsers", {}).get(job.data_type)
+    if function_name:
+        return function_name.split(".")[0]
+    return parser.__module__
+
+
+class FetchHTTPAdapter(TimeoutHTTPAdapter, CoalescingHTTPAdapter):
+    """HTTPAdapter with a default timeout, sharing responses through a coalescer."""
+
+
+def create_session(
+    timeout: float, pool_size: int, coalescer: RequestCoalescer
+) -> Session:
+    session = Session()
+    adapter = FetchHTTPAdapter(timeout, coalescer, pool_maxsize=pool_size)
+    session.mount("http://", adapter)
+    session.mount("https://", adapter)
+    return session
+
+
+def fetch_all(
+    jobs: Iterable[FetchJob],
+    parsers: Optional[Dict[str, Dict[str, Callable]]] = None,
+    target_datetime: Optional[datetime] = None,
+    max_workers: int = DEFAULT_MAX_WORKERS,
+    max_workers_per_source: int = DEFAULT_MAX_WORKERS_PER_SOURCE,
+    source_limits: Optional[Dict[str, int]] = None,
+    timeout: float = DEFAULT_TIMEOUT,
+    coalescer: Optional[RequestCoalescer] = None,
+    on_result: Optional[Callable[[FetchResult], None]] = None,
+    logger: Logger = getLogger(__name__),
+) -> List[FetchResult]:
+    """
+    Runs the parser of every job and returns their results, in the order of the jobs.
+
+    `parsers` maps data types to keys to parser functions, and defaults to
+    `parsers.lib.parsers.PARSER_KEY_TO_DICT`.
+    At most `max_workers` jobs run at once, and at most `max_workers_per_source`
+    jobs of the same source, unless overridden in `source_limits`.
+    A job running for longer than `timeout` seconds fails with a TimeoutError. Its
+    thread can't be interrupted, but all its requests are also bounded by `timeout`,
+    and it keeps its source's slot until it completes.
+    Successful GET responses are shared between the jobs of the run, through
+    `coalescer` if given, so that its statistics can be read after the run.
+    Parser exceptions are returned in the results rather than raised.
+    `on_result` is called with every result as soon as its job completes.
+    """
+    if parsers is None:
+        from parsers.lib.parsers import PARSER_KEY_TO_DICT
+
+        parsers = PARSER_KEY_TO_DICT
+    source_limits = source_limits or {}
+    coalescer = coalescer or RequestCoalescer()
+    start = time.monotonic()
+
+    results: Dict[FetchJob, FetchResult] = {}
+    queues: Dict[str, Deque[FetchJob]] = defaultdict(deque)
+    job_sources: Dict[FetchJob, str] = {}
+    # Jobs are deduplicated, keeping their order
+    jobs = list(dict.fromkeys(jobs))
+    for job in jobs:
+        try:
+            # Parsers may be imported on first access, see `parsers.lib.parsers`
+            parser = parsers.get(job.data_type, {}).get(job.key)
+            error = None
+        except Exception as e:
+            parser, error = None, e
+        if parser is None:
+            results[job] = FetchResult(
+                job=job,
+                source="",
+                data=None,
+                error=error or KeyError(f"No {job.data_type} parser for {job.key}"),
+                wait_time=None,
+                run_time=None,
+            )
+            if on_result is not None:
+                on_result(results[job])
+            continue
+        job_sources[job] = get_source(job, parser)
+        queues[job_sources[job]].append(job)
+
+    sessions = {
+        source: create_session(
+            timeout, source_limits.get(source, max_workers_per_source), coalescer
+        )
+        for source in queues
+    }
+    running: Dict[str, int] = defaultdict(int)
+    started_at: Dict[FetchJob, float] = {}
+
+    def run(job: FetchJob) -> Any:
+        started_at[job] = time.monotonic()
+        if job.data_type in EXCHANGE_DATA_TYPES:
+            args = job.key.split("->")
+        else:
+            args = [job.key]
+        return parsers[job.data_type][job.key](
+            *args,
+            session=sessions[job_sources[job]],
+            target_datetime=job.target_datetime or target_datetime,
+            logger=logger,
+        )
+
+    def complete(job: FetchJob, data: Any, error: Optional[BaseException]):
+        run_time = None
+        if job in started_at:
+            run_time = time.monotonic() - started_at[job]
+        results[job] = FetchResult(
+            job=job,
+            source=job_sources[job],
+            data=data,
+            error=error,
+            wait_time=started_at[job] - start if job in started_at else None,
+            run_time=run_time,
+        )
+        if on_result is not None:
+            on_result(results[job])
+
+    in_flight: Dict[Future, FetchJob] = {}
+    timed_out: Dict[Future, FetchJob] = {}
+    executor = ThreadPoolExecutor(max_workers=max_workers)
+    try:
+        while any(queues.values()) or len(in_flight) > len(timed_out):
+            # Jobs are only submitted when their source has a free slot, so that jobs
+            # of a source at its limit don't hold threads other sources could use.
+            for source, queue in queues.items():
+                limit = max(1, source_limits.get(source, max_workers_per_source))
+                while queue and running[source] < limit:
+                    job = queue.popleft()
+                    running[source] += 1
+                    in_flight[executor.submit(run, job)] = job
+
+            done, _ = wait(
+                in_flight, timeout=POLL_INTERVAL, return_when=FIRST_COMPLETED
+            )
+            for future in done:
+                job = in_flight.pop(future)
+                running[job_sources[job]] -= 1
+                if timed_out.pop(future, None) is not None:
+                    logger.debug(f"{job} completed after timing out")
+                    continue
+                error = future.exception()
+                if error is not None:
+                    logger.warning(f"{job} failed: {error!r}")
+                complete(job, None if error else future.result(), error)
+
+            now = time.monotonic()
+            for future, job in in_flight.items():
+                if future in timed_out or job not in started_at:
+                    continue
+                if now - started_at[job] > timeout:
+                    timed_out[future] = job
+                    logger.warning(f"{job} timed out after {timeout}s")
+                    complete(job, None, TimeoutError(f"Timed out after {timeout}s"))
+    finally:
+        # Don't wait for timed out jobs, they complete in the background.
+        executor.shutdown(wait=False)
+
+    return [results[job] for job in jobs]
@@ -0,0 +1,226 @@
+"""
+An HTTP cache for GET requests, kept in memory and optionally on disk.
+
+Responses are served from the cache while they are fresher than the TTL of their
+host. Stale responses are revalidated with a conditional GET (If-None-Match /
+If-Modified-Since), so that unchanged documents aren't downloaded again. The least
+recently used responses are evicted once the cache exceeds its size.
+"""
+
+import hashlib
+import os
+import pickle
+import threading
+import time
+from collections import OrderedDict
+from typing import Callable, Dict, List, Optional
+from urllib.parse import urlsplit
+
+from requests import PreparedRequest, Request, Response, Session
+from requests.structures import CaseInsensitiveDict
+
+from .coalescing import request_key
+
+DEFAULT_TTL = 60  # seconds
+DEFAULT_MAX_MEMORY_SIZE = 64 * 1024 * 1024  # bytes
+DEFAULT_MAX_DISK_SIZE = 512 * 1024 * 1024  # bytes
+NOT_MODIFIED = 304
+
+
+class CachedResponse:
+    def __init__(self, response: Response, stored_at: float):
+        self.url = response.url
+        self.status_code = response.status_code
+        self.headers = dict(response.headers)
+        self.content = response.content
+        self.encoding = response.encoding
+        self.stored_at = stored_at
+
+    @property
+    def size(self) -> int:
+        return len(self.content)
+
+    def to_response(self, request: PreparedRequest) -> Response:
+        response = Response()
+        response.url = self.url
+        response.status_code = self.status_code
+        response.headers = CaseInsensitiveDict(self.headers)
+        response._content = self.content
+        response.encoding = self.encoding
+        response.request = request
+        return response
+
+
+class HTTPCache:
+    """
+    Caches successful GET responses for `ttl` seconds, or for the TTL of their host
+    in `ttls` (e.g. {"reports.ieso.ca": 900}), and revalidates them afterwards.
+    Responses are also stored in `directory` if given, and reused across processes.
+    """
+
+    def __init__(
+        self,
+        directory: Optional[str] = None,
+        ttl: float = DEFAULT_TTL,
+        ttls: Optional[Dict[str, float]] = None,
+        max_memory_size: int = DEFAULT_MAX_MEMORY_SIZE,
+        max_disk_size: int = DEFAULT_MAX_DISK_SIZE,
+        clock: Callable[[], float] = time.time,
+    ):
+        self.directory = directory
+        self.ttl = ttl
+        self.ttls = ttls or {}
+        self.max_memory_size = max_memory_size
+        self.max_disk_size = max_disk_size
+        self.hits = 0
+        self.revalidated = 0
+        self.misses = 0
+        self.evictions = 0
+        self._clock = clock
+        self._lock = threading.Lock()
+        self._memory: "OrderedDict[str, CachedResponse]" = OrderedDict()
+        self._memory_size = 0
+        # Sizes of the files of the cache directory, least recently stored first. Read
+        # from the directory on first use, then kept up to date as files are stored.
+        self._disk_files: "Optional[OrderedDict[str, int]]" = None
+        self._disk_size = 0
+        if directory is not None:
+            os.makedirs(directory, exist_ok=True)
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return {
+                "hits": self.hits,
+                "revalidated": self.revalidated,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "memory_size": self._memory_size,
+            }
+
+    def ttl_for(self, url: str) -> float:
+        return self.ttls.get(urlsplit(url).hostname or "", self.ttl)
+
+    def get(self, session: Session, url: str, params=None) -> Response:
+        """Sends a GET request with the session, unless the cache can answer it."""
+        request = session.prepare_request(Request("GET", url, params=params))
+        key = hashlib.sha256(repr(request_key(request)).encode("utf-8")).hexdigest()
+        cached = self._load(key)
+        now = self._clock()
+        if cached is not None and now - cached.stored_at < self.ttl_for(url):
+            with self._lock:
+                self.hits += 1
+            return cached.to_response(request)
+
+        if cached is not None:
+            if "ETag" in cached.headers:
+                request.headers["If-None-Match"] = cached.headers["ETag"]
+            if "Last-Modified" in cached.headers:
+                request.headers["If-Modified-Since"] = cached.headers["Last-Modified"]
+        settings = session.merge_environment_settings(request.url, {}, None, None, None)
+        response = session.send(request, **settings)
+
+        if cached is not None and response.status_code == NOT_MODIFIED:
+            with self._lock:
+                self.revalidated += 1
+            cached.stored_at = now
+            self._store(key, cached)
+            return cached.to_response(request)
+
+        with self._lock:
+            self.misses += 1
+        if response.status_code == 200 and "no-store" not in response.headers.get(
+            "Cache-Control", ""
+        ):
+            self._store(key, CachedResponse(response, now))
+        return response
+
+    def _path(self, key: str) -> str:
+        return os.path.join(str(self.directory), f"{key}.pickle")
+
+    def _load(self, key: str) -> Optional[CachedResponse]:
+        with self._lock:
+            cached = self._memory.get(key)
+            if cached is not None:
+                self._memory.move_to_end(key)
+                return cached
+        if self.directory is None:
+            return None
+        path = self._path(key)
+        try:
+            with open(path, "rb") as f:
+                cached = pickle.load(f)
+            if not isinstance(cached, CachedResponse):
+                raise TypeError(f"{type(cached).__name__} is not a CachedResponse")
+        except FileNotFoundError:
+            return None
+        except Exception:
+            # Corrupted, or written by an incompatible version of the cache
+            self._remove_from_disk([path])
+            return None
+        with self._lock:
+            self._add_to_memory(key, cached)
+        return cached
+
+    def _store(self, key: str, cached: CachedResponse):
+        with self._lock:
+            self._add_to_memory(key, cached)
+        if self.directory is None:
+            return
+        # Written atomically, other processes may be reading the cache
+        path = self._path(key)
+        temporary_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        with open(temporary_path, "wb") as f:
+            pickle.dump(cached, f)
+            size = f.tell()
+        os.replace(temporary_path, path)
+        self._evict_from_disk(path, size)
+
+    def _add_to_memory(self, key: str, cached: CachedResponse):
+        previous = self._memory.pop(key, None)
+        if previous is not None:
+            self._memory_size -= previous.size
+        self._memory[key] = cached
+        self._memory_size += cached.size
+        while self._memory_size > self.max_memory_size and len(self._memory) > 1:
+            _, evicted = self._memory.popitem(last=False)
+            self._memory_size -= evicted.size
+            self.evictions += 1
+
+    def _scan_disk(self):
+        entries = [
+            entry
+            for entry in os.scandir(str(self.directory))
+            if entry.name.endswith(".pickle")
+        ]
+        entries.sort(key=lambda entry: entry.stat().st_mtime)
+        self._disk_files = OrderedDict(
+            (entry.path, entry.stat().st_size) for entry in entries
+        )
+        self._disk_size = sum(self._disk_files.values())
+
+    def _evict_from_disk(self, path: str, size: int):
+        """Records a stored file, and evicts files until the cache fits on disk."""
+        evicted = []
+        with self._lock:
+            if self._disk_files is None:
+                self._scan_disk()
+            self._disk_size -= self._disk_files.pop(path, 0)
+            self._disk_files[path] = size
+            self._disk_size += size
+            # The least recently stored (or revalidated) files are evicted first
+            while self._disk_size > self.max_disk_size and self._disk_files:
+                evicted_path, evicted_size = self._disk_files.popitem(last=False)
+                self._disk_size -= evicted_size
+                evicted.append(evicted_path)
+            self.evictions += len(evicted)
+        self._remove_from_disk(evicted)
+
+    def _remove_from_disk(self, paths: List[str]):
+        for path in paths:
+            with self._lock:
+                if self._disk_files is not None and path in self._disk_files:
+                    self._disk_size -= self._disk_files.pop(path)
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                continue
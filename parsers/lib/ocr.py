@@ -0,0 +1,214 @@
+"""
+Shared OCR of the images read by parsers (e.g. SG, IN_MH, JP_KN).
+
+Results are cached by a hash of the downloaded image and of what is read from it (crop
+box, preprocessing and tesseract options), so that images that don't change between
+polls are only read once. OCR runs on a process pool, so that it doesn't hold the GIL
+while other parsers do their I/O.
+"""
+
+import hashlib
+import multiprocessing
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import Future, ProcessPoolExecutor
+from io import BytesIO
+from logging import Logger, getLogger
+from typing import Callable, Dict, Optional, Tuple
+
+from PIL import Image
+
+DEFAULT_MAX_WORKERS = 2
+DEFAULT_MAX_ENTRIES = 256
+
+# Left, upper, right and lower pixel coordinates, see PIL.Image.crop
+Box = Tuple[int, int, int, int]
+# Reads the text of an image, with a language and tesseract options
+Engine = Callable[[Image.Image, str, str], str]
+# Prepares an image for OCR, it must be a module level function so that it can be
+# passed to worker processes
+Preprocess = Callable[[Image.Image], Image.Image]
+
+
+class OCRError(Exception):
+    """OCR failure, raised in place of engine errors that can't be pickled."""
+
+
+def tesseract(image: Image.Image, lang: str, config: str) -> str:
+    from pytesseract import image_to_string
+
+    return image_to_string(image, lang=lang, config=config)
+
+
+def read_image(
+    content: bytes,
+    box: Optional[Box],
+    lang: str,
+    config: str,
+    preprocess: Optional[Preprocess],
+    engine: Engine,
+) -> str:
+    """Reads the text of the encoded image, cropped to `box` and preprocessed."""
+    try:
+        image = Image.open(BytesIO(content))
+        if box is not None:
+            image = image.crop(box)
+        if preprocess is not None:
+            image = preprocess(image)
+        return engine(image, lang, config)
+    except Exception as e:
+        raise OCRError(f"{type(e).__name__}: {e}") from None
+
+
+def _function_name(function: Optional[Callable]) -> str:
+    if function is None:
+        return ""
+    return f"{function.__module__}.{function.__qualname__}"
+
+
+class OCRService:
+    """
+    OCR with a cache of the most recent `max_entries` results. Identical requests made
+    while a read is in progress wait for it.
+    OCR runs on a pool of `max_workers` processes, or in the calling thread if
+    `processes` is False or if processes can't be started.
+    """
+
+    def __init__(
+        self,
+        max_workers: int = DEFAULT_MAX_WORKERS,
+        max_entries: int = DEFAULT_MAX_ENTRIES,
+        processes: bool = True,
+        engine: Engine = tesseract,
+        logger: Logger = getLogger(__name__),
+    ):
+        self.max_workers = max_workers
+        self.max_entries = max_entries
+        self.processes = processes
+        self.engine = engine
+        self.logger = logger
+        self.hits = 0
+        self.misses = 0
+        self.errors = 0
+        # Seconds spent reading images, in total and at most
+        self.ocr_time = 0.0
+        self.max_ocr_time = 0.0
+        self._lock = threading.Lock()
+        self._results: "OrderedDict[str, str]" = OrderedDict()
+        self._in_flight: Dict[str, "Future[str]"] = {}
+        self._executor: Optional[ProcessPoolExecutor] = None
+
+    def stats(self) -> Dict[str, float]:
+        with self._lock:
+            reads = self.hits + self.misses
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "errors": self.errors,
+                "hit_rate": self.hits / reads if reads else 0.0,
+                "ocr_time": self.ocr_time,
+                "mean_ocr_time": self.ocr_time / self.misses if self.misses else 0.0,
+                "max_ocr_time": self.max_ocr_time,
+            }
+
+    def image_to_string(
+        self,
+        content: bytes,
+        box: Optional[Box] = None,
+        lang: str = "eng",
+        config: str = "",
+        preprocess: Optional[Preprocess] = None,
+    ) -> str:
+        """Returns the text of the encoded image (e.g. a downloaded PNG)."""
+        key = hashlib.sha256(content).hexdigest() + repr(
+            (box, lang, config, _function_name(preprocess))
+        )
+        with self._lock:
+            text = self._results.get(key)
+            if text is not None:
+                self._results.move_to_end(key)
+                self.hits += 1
+                return text
+            in_flight = self._in_flight.get(key)
+            if in_flight is None:
+                in_flight = self._in_flight[key] = Future()
+                self.misses += 1
+                is_leader = True
+            else:
+                self.hits += 1
+                is_leader = False
+        if not is_leader:
+            return in_flight.result()
+
+        start = time.monotonic()
+        try:
+            text = self._read(content, box, lang, config, preprocess)
+        except BaseException as e:
+            with self._lock:
+                self.errors += 1
+                del self._in_flight[key]
+            in_flight.set_exception(e)
+            raise
+        ocr_time = time.monotonic() - start
+        self.logger.debug(f"OCR took {ocr_time:.2f}s")
+        with self._lock:
+            self.ocr_time += ocr_time
+            self.max_ocr_time = max(self.max_ocr_time, ocr_time)
+            del self._in_flight[key]
+            self._results[key] = text
+            while len(self._results) > self.max_entries:
+                self._results.popitem(last=False)
+        in_flight.set_result(text)
+        return text
+
+    def _read(
+        self,
+        content: bytes,
+        box: Optional[Box],
+        lang: str,
+        config: str,
+        preprocess: Optional[Preprocess],
+    ) -> str:
+        args = (content, box, lang, config, preprocess, self.engine)
+        executor = self._get_executor()
+        if executor is None:
+            return read_image(*args)
+        return executor.submit(read_image, *args).result()
+
+    def _get_executor(self) -> Optional[ProcessPoolExecutor]:
+        if not self.processes:
+            return None
+        with self._lock:
+            if self._executor is None:
+                try:
+                    # Forking would copy the locks held by the threads of other parsers
+                    self._executor = ProcessPoolExecutor(
+                        self.max_workers,
+                        mp_context=multiprocessing.get_context("spawn"),
+                    )
+                except (OSError, NotImplementedError) as e:
+                    self.logger.warning(f"Running OCR in threads, no processes: {e!r}")
+                    self.processes = False
+            return self._executor
+
+    def shutdown(self):
+        with self._lock:
+            executor, self._executor = self._executor, None
+        if executor is not None:
+            executor.shutdown()
+
+
+# Shared by all parsers
+OCR_SERVICE = OCRService()
+
+
+def image_to_string(
+    content: bytes,
+    box: Optional[Box] = None,
+    lang: str = "eng",
+    config: str = "",
+    preprocess: Optional[Preprocess] = None,
+) -> str:
+    """Returns the text of the encoded image, through the shared OCR service."""
+    return OCR_SERVICE.image_to_string(content, box, lang, config, preprocess)
@@ -1,17 +1,52 @@
 import importlib
+from collections.abc import Mapping
+from typing import Callable, Dict, Iterable, Iterator, List, Optional, Tuple
 
 from electricitymap.contrib.config import EXCHANGES_CONFIG, ZONES_CONFIG
 
+
+class LazyParserDict(Mapping):
+    """
+    Maps zone or exchange keys to parser functions, configured as "module.function"
+    strings. A parser module is only imported when one of its parsers is first
+    accessed, so that a missing dependency of a parser doesn't break the others.
+    """
+
+    def __init__(self):
+        self.paths: Dict[str, str] = {}
+        self._parsers: Dict[str, Callable] = {}
+
+    def __getitem__(self, key: str) -> Callable:
+        parser = self._parsers.get(key)
+        if parser is None:
+            mod_name, fun_name = self.paths[key].split(".")
+            mod = importlib.import_module("parsers.%s" % mod_name)
+            parser = self._parsers[key] = getattr(mod, fun_name)
+        return parser
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self.paths)
+
+    def __len__(self) -> int:
+        return len(self.paths)
+
+    def __contains__(self, key) -> bool:
+        return key in self.paths
+
+    def __repr__(self) -> str:
+        return f"{self.__class__.__name__}({self.paths!r})"
+
+
 # Prepare all parsers
-CONSUMPTION_PARSERS = {}
-PRODUCTION_PARSERS = {}
-PRODUCTION_PER_MODE_FORECAST_PARSERS = {}
-PRODUCTION_PER_UNIT_PARSERS = {}
-EXCHANGE_PARSERS = {}
-PRICE_PARSERS = {}
-CONSUMPTION_FORECAST_PARSERS = {}
-GENERATION_FORECAST_PARSERS = {}
-EXCHANGE_FORECAST_PARSERS = {}
+CONSUMPTION_PARSERS = LazyParserDict()
+PRODUCTION_PARSERS = LazyParserDict()
+PRODUCTION_PER_MODE_FORECAST_PARSERS = LazyParserDict()
+PRODUCTION_PER_UNIT_PARSERS = LazyParserDict()
+EXCHANGE_PARSERS = LazyParserDict()
+PRICE_PARSERS = LazyParserDict()
+CONSUMPTION_FORECAST_PARSERS = LazyParserDict()
+GENERATION_FORECAST_PARSERS = LazyParserDict()
+EXCHANGE_FORECAST_PARSERS = LazyParserDict()
 
 PARSER_KEY_TO_DICT = {
     "consumption": CONSUMPTION_PARSERS,
@@ -28,13 +63,31 @@ PARSER_KEY_TO_DICT = {
 # Read all zones
 for zone_id, zone_config in ZONES_CONFIG.items():
     for parser_key, v in zone_config.get("parsers", {}).items():
-        mod_name, fun_name = v.split(".")
-        mod = importlib.import_module("parsers.%s" % mod_name)
-        PARSER_KEY_TO_DICT[parser_key][zone_id] = getattr(mod, fun_name)
+        PARSER_KEY_TO_DICT[parser_key].paths[zone_id] = v
 
 # Read all exchanges
 for exchange_id, exchange_config in EXCHANGES_CONFIG.items():
     for parser_key, v in exchange_config.get("parsers", {}).items():
-        mod_name, fun_name = v.split(".")
-        mod = importlib.import_module("parsers.%s" % mod_name)
-        PARSER_KEY_TO_DICT[parser_key][exchange_id] = getattr(mod, fun_name)
+        PARSER_KEY_TO_DICT[parser_key].paths[exchange_id] = v
+
+
+def preload(
+    keys: Optional[Iterable[str]] = None, data_types: Optional[Iterable[str]] = None
+) -> List[Tuple[str, str, Exception]]:
+    """
+    Imports the parsers of `keys` (all zones and exchanges by default) for
+    `data_types` (all by default), e.g. when a worker starts.
+    Returns the data type, key and exception of the parsers that failed to import.
+    """
+    failures = []
+    keys = None if keys is None else list(keys)
+    for data_type in PARSER_KEY_TO_DICT if data_types is None else data_types:
+        parsers = PARSER_KEY_TO_DICT[data_type]
+        for key in parsers if keys is None else keys:
+            if key not in parsers:
+                continue
+            try:
+                parsers[key]
+            except Exception as e:
+                failures.append((data_type, key, e))
+    return failures
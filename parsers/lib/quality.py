@@ -158,8 +158,9 @@ def validate_production(obj: Dict[str, Any], zone_key: ZoneKey) -> None:
                 "%s" % (zone_key, key, value)
             )
 
+    zone_emission_factors = emission_factors(zone_key)
     for key in obj.get("production", {}).keys():
-        if key not in emission_factors(zone_key).keys():
+        if key not in zone_emission_factors:
             raise ValidationError(
                 "Couldn't find emission factor for '%s' in '%s'. Maybe you misspelled one of the production keys?"
                 % (key, zone_key)
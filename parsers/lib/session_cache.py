@@ -0,0 +1,63 @@
+"""
+Shares results between the calls of a parser made with the same session, e.g. all the
+zones and exchanges of a fetch cycle, which share the session of their source (see
+`fetch.fetch_all`). A parser can then download the data of all its zones in one go,
+and serve the other zones of the cycle from it. Results expire after a `max_age` of
+about a cycle, so that the next cycle downloads fresh data.
+"""
+
+import threading
+import time
+from collections import defaultdict
+from typing import Any, Callable, Dict, Hashable, Optional, Tuple, TypeVar
+from weakref import WeakKeyDictionary
+
+from requests import Session
+
+T = TypeVar("T")
+
+
+class _SessionEntries:
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.key_locks: Dict[Hashable, threading.Lock] = defaultdict(threading.Lock)
+        self.entries: Dict[Hashable, Tuple[float, Any]] = {}
+
+
+class SessionCache:
+    """
+    Results by session and key, kept as long as their session and for at most
+    `max_age` seconds. Concurrent calls for the same key wait for the one in progress.
+    Failures aren't cached.
+    """
+
+    def __init__(self, clock: Callable[[], float] = time.monotonic):
+        self.clock = clock
+        self._sessions: "WeakKeyDictionary[Session, _SessionEntries]" = (
+            WeakKeyDictionary()
+        )
+        self._lock = threading.Lock()
+
+    def get(
+        self,
+        session: Optional[Session],
+        key: Hashable,
+        load: Callable[[], T],
+        max_age: float,
+    ) -> T:
+        """Returns the result of `load`, shared by the calls with the same session."""
+        if session is None:
+            return load()
+        with self._lock:
+            entries = self._sessions.get(session)
+            if entries is None:
+                entries = self._sessions[session] = _SessionEntries()
+        with entries.lock:
+            key_lock = entries.key_locks[key]
+        with key_lock:
+            entry = entries.entries.get(key)
+            if entry is not None and self.clock() - entry[0] < max_age:
+                return entry[1]
+            result = load()
+            entries.entries[key] = (self.clock(), result)
+            return result
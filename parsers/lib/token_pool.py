@@ -0,0 +1,158 @@
+"""
+Process-wide pools of API tokens, to spread requests over several tokens without
+exceeding the rate limit of any of them.
+
+Each token is rate limited by a leaky bucket: it holds up to `burst` requests, and
+leaks `rate` requests per `period`. Tokens rejected by the API (429, 401, 403) cool
+down before being used again. Among usable tokens, the least recently used is picked.
+"""
+
+import threading
+import time
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from .utils import get_token
+
+TOO_MANY_REQUESTS = 429
+UNAUTHORIZED_STATUS_CODES = {401, 403}
+# Status codes telling that the token, rather than the request, was rejected
+TOKEN_REJECTED_STATUS_CODES = UNAUTHORIZED_STATUS_CODES | {TOO_MANY_REQUESTS}
+DEFAULT_COOLDOWN = 60  # seconds, after a 429 without Retry-After header
+DEFAULT_UNAUTHORIZED_COOLDOWN = 600  # seconds, after a 401 or 403
+DEFAULT_MAX_WAIT = 30  # seconds
+
+
+class TokensUnavailable(Exception):
+    """Raised when no token of a pool can be used within the maximum wait."""
+
+
+class _TokenState:
+    def __init__(self):
+        self.level = 0.0  # requests in the bucket
+        self.updated_at = 0.0
+        self.last_used_at = float("-inf")
+        self.cooldown_until = 0.0
+        self.requests = 0
+        self.failures = 0
+        self.throttled = 0
+        self.unauthorized = 0
+
+
+class TokenPool:
+    def __init__(
+        self,
+        tokens: List[str],
+        rate: float,
+        period: float = 60,
+        burst: int = 1,
+        cooldown: float = DEFAULT_COOLDOWN,
+        unauthorized_cooldown: float = DEFAULT_UNAUTHORIZED_COOLDOWN,
+        clock: Callable[[], float] = time.monotonic,
+        sleep: Callable[[float], Any] = time.sleep,
+    ):
+        if not tokens:
+            raise ValueError("A token pool needs at least one token")
+        self.tokens = list(dict.fromkeys(tokens))
+        self.leak_rate = rate / period  # requests per second
+        self.burst = max(1, burst)
+        self.cooldown = cooldown
+        self.unauthorized_cooldown = unauthorized_cooldown
+        self._clock = clock
+        self._sleep = sleep
+        self._lock = threading.Lock()
+        self._states = {token: _TokenState() for token in self.tokens}
+
+    def __len__(self) -> int:
+        return len(self.tokens)
+
+    def _wait_time(self, state: _TokenState, now: float) -> float:
+        """Seconds to wait before the token can be used, leaking its bucket."""
+        state.level = max(0.0, state.level - (now - state.updated_at) * self.leak_rate)
+        state.updated_at = now
+        if state.cooldown_until > now:
+            return state.cooldown_until - now
+        return max(0.0, (state.level + 1 - self.burst) / self.leak_rate)
+
+    def acquire(self, max_wait: float = DEFAULT_MAX_WAIT) -> str:
+        """
+        Returns the token to use for the next request, waiting for the bucket of
+        the first available token to have room for it.
+        Raises TokensUnavailable if that takes longer than `max_wait` seconds.
+        """
+        deadline = self._clock() + max_wait
+        while True:
+            with self._lock:
+                now = self._clock()
+                wait, _, token = min(
+                    (
+                        self._wait_time(self._states[token], now),
+                        self._states[token].last_used_at,
+                        token,
+                    )
+                    for token in self.tokens
+                )
+                if wait <= 0:
+                    state = self._states[token]
+                    state.level += 1
+                    state.last_used_at = now
+                    state.requests += 1
+                    return token
+            if now + wait > deadline:
+                raise TokensUnavailable(
+                    f"No token available in the next {max_wait}s (next in {wait:.1f}s)"
+                )
+            self._sleep(wait)
+
+    def release(self, token: str, status_code: int, retry_after: Optional[str] = None):
+        """Records the response to a request made with the token."""
+        with self._lock:
+            state = self._states[token]
+            now = self._clock()
+            if status_code >= 400:
+                state.failures += 1
+            if status_code == TOO_MANY_REQUESTS:
+                state.throttled += 1
+                cooldown = self.cooldown
+                if retry_after is not None and retry_after.strip().isdigit():
+                    cooldown = float(retry_after)
+                state.cooldown_until = max(state.cooldown_until, now + cooldown)
+            elif status_code in UNAUTHORIZED_STATUS_CODES:
+                state.unauthorized += 1
+                state.cooldown_until = max(
+                    state.cooldown_until, now + self.unauthorized_cooldown
+                )
+
+    def health(self) -> List[Dict[str, Any]]:
+        """Returns usage and health metrics per token, identified by its last characters."""
+        with self._lock:
+            now = self._clock()
+            return [
+                {
+                    "token": f"...{token[-4:]}",
+                    "requests": state.requests,
+                    "failures": state.failures,
+                    "throttled": state.throttled,
+                    "unauthorized": state.unauthorized,
+                    "cooldown": max(0.0, state.cooldown_until - now),
+                    "wait": self._wait_time(state, now),
+                }
+                for token, state in self._states.items()
+            ]
+
+
+# Pools by environment variable and tokens, shared by all the threads of the process
+TOKEN_POOLS: Dict[Tuple[str, Tuple[str, ...]], TokenPool] = {}
+_token_pools_lock = threading.Lock()
+
+
+def get_token_pool(token_name: str, **kwargs) -> TokenPool:
+    """
+    Returns the process-wide pool of the comma separated tokens of the `token_name`
+    environment variable, creating it with `kwargs` on first use.
+    """
+    tokens = tuple(token.strip() for token in get_token(token_name).split(","))
+    with _token_pools_lock:
+        key = (token_name, tokens)
+        if key not in TOKEN_POOLS:
+            TOKEN_POOLS[key] = TokenPool(list(tokens), **kwargs)
+        return TOKEN_POOLS[key]
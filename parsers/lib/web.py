@@ -4,11 +4,37 @@ from bs4 import BeautifulSoup
 from requests import Response, Session
 
 from .exceptions import ParserException
+from .http_cache import HTTPCache
 
+# Opt-in cache of the responses of the helpers below, see `enable_http_cache`
+HTTP_CACHE: Optional[HTTPCache] = None
 
-def get_response(zone_key: str, url: str, session: Optional[Session] = None):
+
+def enable_http_cache(directory: Optional[str] = None, **kwargs) -> HTTPCache:
+    """
+    Caches the responses of the helpers of this module, in memory and in `directory`
+    if given. `kwargs` are passed to HTTPCache (e.g. per-host `ttls`).
+    """
+    global HTTP_CACHE
+    HTTP_CACHE = HTTPCache(directory, **kwargs)
+    return HTTP_CACHE
+
+
+def disable_http_cache():
+    global HTTP_CACHE
+    HTTP_CACHE = None
+
+
+def get(url: str, session: Optional[Session] = None, params=None) -> Response:
+    """Sends a GET request, through the HTTP cache if it is enabled."""
     ses = session or Session()
-    response: Response = ses.get(url)
+    if HTTP_CACHE is None:
+        return ses.get(url, params=params)
+    return HTTP_CACHE.get(ses, url, params=params)
+
+
+def get_response(zone_key: str, url: str, session: Optional[Session] = None):
+    response: Response = get(url, session)
     if response.status_code != 200:
         raise ParserException(
             zone_key, "Response code: {0}".format(response.status_code)
@@ -19,8 +45,7 @@ def get_response(zone_key: str, url: str, session: Optional[Session] = None):
 def get_response_with_params(
     zone_key: str, url, session: Optional[Session] = None, params=None
 ):
-    ses = session or Session()
-    response: Response = ses.get(url, params=params)
+    response: Response = get(url, session, params)
     if response.status_code != 200:
         raise ParserException(
             zone_key, "Response code: {0}".format(response.status_code)
@@ -1,15 +1,17 @@
 #!/usr/bin/env python3
 # coding=utf-8
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
 from io import StringIO
 from logging import Logger, getLogger
-from typing import Dict, List, Optional
+from typing import Dict, List, Optional, Union
 
 import arrow
 import pandas as pd
 from requests import Session, cookies
 
 from .lib.exceptions import ParserException
+from .lib.session_cache import SessionCache
 
 # Abbreviations:
 # JP-HKD : Hokkaido
@@ -47,26 +49,107 @@ EXCHANGE_MAPPING = {
 FLOWS_TO_REVERT = ["JP-CB->JP-TK", "JP-CG->JP-KN", "JP-CG->JP-SK"]
 
 SOURCE_URL = "occtonet.occto.or.jp"
+LOGIN_URL = "http://occtonet.occto.or.jp/public/dfw/RP11/OCCTO/SD/LOGIN_login"
 EXCHANGE_COLUMNS = ["sortedZoneKeys", "netFlow", "source"]
 
 
+# Every line of the selector, see EXCHANGE_MAPPING
+LINE_IDS = sorted({line_id for ids in EXCHANGE_MAPPING.values() for line_id in ids})
+# Lines downloaded at the same time, each by a worker with its own logged in session
+DEFAULT_MAX_WORKERS = 4
+# Flows of all the lines, see `lib.session_cache`
+LINES_MAX_AGE = 60  # seconds
+
+_LINES = SessionCache()
+
+
+def _fetch_line(session: Session, line_id: int, day: str) -> pd.DataFrame:
+    form_data = get_form_data(session, line_id, day)
+    return get_exchange(session, form_data)
+
+
+def _worker_session(session: Session) -> Session:
+    """A session with the settings and adapters of `session`, but its own cookies."""
+    worker_session = Session()
+    worker_session.headers.update(session.headers)
+    worker_session.proxies = session.proxies
+    worker_session.verify = session.verify
+    worker_session.trust_env = session.trust_env
+    for prefix, adapter in session.adapters.items():
+        worker_session.mount(prefix, adapter)
+    return worker_session
+
+
+def _fetch_worker_lines(
+    session: Session, line_ids: List[int], day: str
+) -> Dict[int, Union[pd.DataFrame, Exception]]:
+    lines: Dict[int, Union[pd.DataFrame, Exception]] = {}
+    try:
+        # This authorises subsequent calls
+        get_cookies(session)
+    except Exception as e:
+        return {line_id: e for line_id in line_ids}
+    # The form flow of a line (request token, download key) is stateful, so a
+    # session downloads one line at a time
+    for line_id in line_ids:
+        try:
+            lines[line_id] = _fetch_line(session, line_id, day)
+        except Exception as e:
+            lines[line_id] = e
+    return lines
+
+
+def fetch_lines(
+    session: Session,
+    day: str,
+    line_ids: List[int] = LINE_IDS,
+    max_workers: int = DEFAULT_MAX_WORKERS,
+) -> Dict[int, Union[pd.DataFrame, Exception]]:
+    """
+    Downloads the flows of the lines on a day (format YYYY/MM/DD, Japan time). The
+    lines are split between up to `max_workers` workers, the first one using `session`
+    and the others sessions of their own, each logging in once. Lines that fail are
+    mapped to their error, so that they only fail the exchanges that use them.
+    """
+    workers = max(1, min(max_workers, len(line_ids)))
+    sessions = [session] + [_worker_session(session) for _ in range(workers - 1)]
+    with ThreadPoolExecutor(workers) as executor:
+        futures = [
+            executor.submit(
+                _fetch_worker_lines, worker_session, line_ids[i::workers], day
+            )
+            for i, worker_session in enumerate(sessions)
+        ]
+    lines: Dict[int, Union[pd.DataFrame, Exception]] = {}
+    for future in futures:
+        lines.update(future.result())
+    return {line_id: lines[line_id] for line_id in line_ids}
+
+
 def _fetch_exchange(
-    session: Session, datetime: datetime, sorted_zone_keys: str
+    session: Optional[Session], datetime: str, sorted_zone_keys: str
 ) -> List[dict]:
     exch_id = EXCHANGE_MAPPING[sorted_zone_keys]
 
-    # This authorises subsequent calls
-    cookies = get_cookies(session)
+    if session is None:
+        lines = fetch_lines(Session(), datetime, exch_id)
+    else:
+        # Failed lines are cached too, they fail the exchanges using them until the
+        # batch expires
+        lines = _LINES.get(
+            session, datetime, lambda: fetch_lines(session, datetime), LINES_MAX_AGE
+        )
 
-    df = pd.DataFrame()
-    for i in range(len(exch_id)):
-        form_data = get_form_data(session, exch_id[i], datetime)
-        _df = get_exchange(session, form_data)
-        if df.empty:
-            df = _df
-        else:
-            df += _df
-            df.reset_index()
+    flows = []
+    for line_id in exch_id:
+        line = lines[line_id]
+        if isinstance(line, Exception):
+            raise ParserException(
+                "occtonet.py", f"Line {line_id} failed: {line!r}", sorted_zone_keys
+            ) from line
+        flows.append(line["netFlow"])
+    # Only the times known for every line of the exchange are kept
+    df = pd.concat(flows, axis=1, join="inner").sum(axis=1).to_frame("netFlow")
 
     if sorted_zone_keys in FLOWS_TO_REVERT:
         df["netFlow"] = -1 * df["netFlow"]
@@ -93,9 +176,6 @@ def fetch_exchange(
     logger: Logger = getLogger(__name__),
 ) -> List[dict]:
     """Requests the last known power exchange (in MW) between two zones."""
-    if not session:
-        session = Session()
-
     query_datetime = arrow.get(target_datetime).to("Asia/Tokyo").strftime("%Y/%m/%d")
 
     sorted_zone_keys = "->".join(sorted([zone_key1, zone_key2]))
@@ -110,9 +190,6 @@ def fetch_exchange_forecast(
     logger: Logger = getLogger(__name__),
 ) -> List[dict]:
     """Gets exchange forecast between two specified zones."""
-    if not session:
-        session = Session()
-
     query_datetime = arrow.get(target_datetime).to("Asia/Tokyo").strftime("%Y/%m/%d")
 
     if query_datetime > arrow.get().to("Asia/Tokyo").strftime("%Y/%m/%d"):
@@ -127,7 +204,10 @@ def fetch_exchange_forecast(
 def get_cookies(session: Optional[Session] = None) -> cookies.RequestsCookieJar:
     if not session:
         session = Session()
-    session.get("http://occtonet.occto.or.jp/public/dfw/RP11/OCCTO/SD/LOGIN_login")
+    # Streamed, so that a coalescing session (see `lib.coalescing`) doesn't share the
+    # login of another session instead of getting a cookie of its own
+    with session.get(LOGIN_URL, stream=True):
+        pass
     return session.cookies
 
 
@@ -0,0 +1,202 @@
+import tempfile
+import unittest
+from datetime import datetime, timedelta, timezone
+from decimal import Decimal
+from logging import ERROR, getLogger
+from pathlib import Path
+
+from parsers.lib.backfill import BackfillManifest, backfill, merge_windows, windows
+from parsers.lib.config import refetch_frequency
+from parsers.lib.fetch import FetchJob
+
+CALLS = []
+FAILING_TARGET_DATETIMES = set()
+
+
+@refetch_frequency(timedelta(hours=6))
+def fetch_production(zone_key, session=None, target_datetime=None, logger=None):
+    CALLS.append((zone_key, target_datetime))
+    if target_datetime in FAILING_TARGET_DATETIMES:
+        raise ValueError("Upstream error")
+    # Hourly points of the last 6 hours, and one more that the previous window has
+    return [
+        {
+            "zoneKey": zone_key,
+            "datetime": target_datetime - timedelta(hours=hours),
+            "production": {"wind": target_datetime.hour},
+        }
+        for hours in range(7)
+    ]
+
+
+def fetch_exchange(
+    zone_key1, zone_key2, session=None, target_datetime=None, logger=None
+):
+    CALLS.append((f"{zone_key1}->{zone_key2}", target_datetime))
+    return {
+        "sortedZoneKeys": f"{zone_key1}->{zone_key2}",
+        "datetime": target_datetime,
+        "netFlow": 1.0,
+    }
+
+
+PARSERS = {
+    "production": {"A": fetch_production, "B": fetch_production},
+    "exchange": {"A->B": fetch_exchange},
+}
+START = datetime(2022, 1, 1, tzinfo=timezone.utc)
+END = datetime(2022, 1, 2, tzinfo=timezone.utc)
+
+
+class TestWindows(unittest.TestCase):
+    def test_windows(self):
+        self.assertEqual(
+            windows(START, START + timedelta(hours=12), timedelta(hours=6)),
+            [START, START + timedelta(hours=6), START + timedelta(hours=12)],
+        )
+        # The first window ends after the start, the last one at the end
+        self.assertEqual(
+            windows(START, START + timedelta(hours=10), timedelta(hours=6)),
+            [START + timedelta(hours=4), START + timedelta(hours=10)],
+        )
+        self.assertEqual(windows(START, START, timedelta(hours=6)), [START])
+
+    def test_invalid_ranges(self):
+        with self.assertRaises(ValueError):
+            windows(END, START, timedelta(hours=6))
+        with self.assertRaises(ValueError):
+            windows(START, END, timedelta(0))
+
+
+class TestBackfill(unittest.TestCase):
+    def setUp(self):
+        CALLS.clear()
+        FAILING_TARGET_DATETIMES.clear()
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.manifest_path = Path(directory.name).joinpath("manifest.jsonl")
+        self.logger = getLogger("test_backfill")
+        self.logger.setLevel(ERROR)
+
+    def backfill(self, jobs, **kwargs):
+        return backfill(jobs, START, END, parsers=PARSERS, logger=self.logger, **kwargs)
+
+    def test_backfill(self):
+        result = self.backfill(
+            [FetchJob("A", "production"), FetchJob("A->B", "exchange")], batch_size=2
+        )
+        self.assertEqual(result.failures, [])
+        # 5 windows of 6 hours for production, 2 of a day by default for exchanges
+        self.assertEqual(len(CALLS), 7)
+        production = result.data[FetchJob("A", "production")]
+        self.assertEqual(
+            [point["datetime"] for point in production],
+            [START + timedelta(hours=hours) for hours in range(25)],
+        )
+        # Overlapping points are taken from the latest window
+        self.assertEqual(production[6]["production"], {"wind": 12})
+        self.assertEqual(production[7]["production"], {"wind": 12})
+        self.assertEqual(production[24]["production"], {"wind": 0})
+        self.assertEqual(
+            [point["datetime"] for point in result.data[FetchJob("A->B", "exchange")]],
+            [START, END],
+        )
+
+    def test_failed_windows_are_fetched_again(self):
+        FAILING_TARGET_DATETIMES.add(START + timedelta(hours=12))
+        jobs = [FetchJob("A", "production"), FetchJob("B", "production")]
+        result = self.backfill(jobs, manifest_path=self.manifest_path)
+        self.assertEqual(len(CALLS), 10)
+        self.assertEqual(len(result.failures), 2)
+        # 7:00 to 11:00 are missing, the next window has 12:00
+        self.assertEqual(len(result.data[FetchJob("A", "production")]), 20)
+
+        CALLS.clear()
+        FAILING_TARGET_DATETIMES.clear()
+        resumed = self.backfill(jobs, manifest_path=self.manifest_path)
+        self.assertEqual(
+            sorted(CALLS),
+            [("A", START + timedelta(hours=12)), ("B", START + timedelta(hours=12))],
+        )
+        self.assertEqual(resumed.resumed, 8)
+        self.assertEqual(resumed.failures, [])
+
+        CALLS.clear()
+        complete = self.backfill(jobs)
+        self.assertEqual(resumed.data, complete.data)
+
+    def test_interrupted_manifest(self):
+        job = FetchJob("A", "production")
+        self.backfill([job], manifest_path=self.manifest_path)
+        with self.manifest_path.open("a") as f:
+            f.write('{"key": "A", "data_')
+        manifest = BackfillManifest(self.manifest_path, self.logger)
+        self.assertEqual(len(manifest.windows), 5)
+        window = FetchJob("A", "production", END)
+        self.assertEqual(manifest.windows[window][0]["datetime"], END)
+
+    def test_naive_datetimes_are_utc(self):
+        job = FetchJob("A", "production")
+        self.backfill([job], manifest_path=self.manifest_path)
+        window = FetchJob("A", "production", END)
+        # A window recorded with naive datetimes, and a point from another timezone
+        cet = timezone(timedelta(hours=1))
+        data = [
+            {"zoneKey": "A", "datetime": datetime(2022, 1, 2), "production": {}},
+            {"zoneKey": "A", "datetime": END.astimezone(cet), "production": {}},
+        ]
+        BackfillManifest(self.manifest_path).add(
+            window._replace(target_datetime=datetime(2022, 1, 2)), data
+        )
+        manifest = BackfillManifest(self.manifest_path, self.logger)
+        self.assertEqual(manifest.windows[window][0]["datetime"], END)
+        self.assertEqual(manifest.windows[window][0]["datetime"].tzinfo, timezone.utc)
+
+        merged = merge_windows(
+            job, [data], datetime(2022, 1, 1), datetime(2022, 1, 2), self.logger
+        )
+        self.assertEqual(merged, [{**data[1], "datetime": END}])
+        self.assertEqual(merged[0]["datetime"].tzinfo, timezone.utc)
+        self.assertEqual(data[0]["datetime"], datetime(2022, 1, 2))
+
+        CALLS.clear()
+        result = backfill(
+            [job],
+            datetime(2022, 1, 1),
+            datetime(2022, 1, 2),
+            manifest_path=self.manifest_path,
+            parsers=PARSERS,
+            logger=self.logger,
+        )
+        self.assertEqual(CALLS, [])
+        self.assertEqual(result.data[job][-1]["datetime"], END)
+
+    def test_windows_that_cant_be_recorded_fail(self):
+        def fetch_price(zone_key, session=None, target_datetime=None, logger=None):
+            price = Decimal("1.5") if target_datetime == END else 1.5
+            return {"zoneKey": zone_key, "datetime": target_datetime, "price": price}
+
+        job = FetchJob("A", "price")
+        result = backfill(
+            [job],
+            START,
+            END,
+            manifest_path=self.manifest_path,
+            parsers={"price": {"A": fetch_price}},
+            logger=self.logger,
+        )
+        self.assertEqual(len(result.failures), 1)
+        self.assertEqual(result.failures[0].job.target_datetime, END)
+        self.assertIsInstance(result.failures[0].error, TypeError)
+        self.assertEqual([point["datetime"] for point in result.data[job]], [START])
+        manifest = BackfillManifest(self.manifest_path, self.logger)
+        self.assertEqual(list(manifest.windows), [job._replace(target_datetime=START)])
+
+    def test_missing_parsers(self):
+        result = self.backfill([FetchJob("Z", "production")])
+        self.assertEqual(result.data, {})
+        self.assertIsInstance(result.failures[0].error, KeyError)
+
+
+if __name__ == "__main__":
+    unittest.main()
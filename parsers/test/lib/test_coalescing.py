@@ -0,0 +1,114 @@
+import threading
+import time
+import unittest
+
+from requests import Session
+
+from parsers.lib.coalescing import RequestCoalescer, coalescing_session
+from parsers.test.mocks.stub_server import StubServer
+
+
+class TestRequestCoalescer(unittest.TestCase):
+    def setUp(self):
+        self.status_codes = []
+        self.server = StubServer(self.handle).__enter__()
+        self.coalescer = RequestCoalescer()
+        self.session = coalescing_session(self.coalescer)
+
+    def tearDown(self):
+        self.server.__exit__()
+
+    def handle(self, request):
+        time.sleep(0.05)
+        status = self.status_codes.pop(0) if self.status_codes else 200
+        body = f"{request.path} {len(self.server.requests)}"
+        if request.path == "/login":
+            return status, {"Set-Cookie": f"id={len(self.server.requests)}"}, body
+        return status, {}, body
+
+    def test_repeated_requests_share_a_response(self):
+        first = self.session.get(f"{self.server.url}/a", params={"x": 1, "y": 2})
+        second = self.session.get(f"{self.server.url}/a?y=2&x=1")
+        self.assertEqual(first.text, "/a 1")
+        self.assertEqual(second.text, "/a 1")
+        self.assertEqual(len(self.server.requests), 1)
+        self.assertEqual(self.coalescer.stats(), {"hits": 1, "misses": 1})
+        self.assertIsNot(first, second)
+        self.assertEqual(second.request.url, f"{self.server.url}/a?y=2&x=1")
+
+    def test_credentials_are_ignored(self):
+        self.session.get(f"{self.server.url}/a", params={"securityToken": "t1"})
+        self.session.get(f"{self.server.url}/a", params={"securityToken": "t2"})
+        self.session.get(f"{self.server.url}/a", params={"api_key": "k", "x": 1})
+        self.assertEqual(len(self.server.requests), 2)
+
+    def test_headers_and_cookies_are_part_of_the_key(self):
+        self.session.get(f"{self.server.url}/a")
+        self.session.get(f"{self.server.url}/a", headers={"Accept": "text/csv"})
+        self.session.get(f"{self.server.url}/a", headers={"accept": "text/csv"})
+        self.session.cookies.set("id", "1")
+        self.session.get(f"{self.server.url}/a")
+        self.session.cookies.set("id", "2")
+        self.session.get(f"{self.server.url}/a")
+        self.assertEqual(len(self.server.requests), 4)
+
+    def test_shared_responses_are_copied(self):
+        first = self.session.get(f"{self.server.url}/a")
+        first.headers["X-Parsed"] = "1"
+        first.cookies.set("id", "1")
+        second = self.session.get(f"{self.server.url}/a")
+        self.assertNotIn("X-Parsed", second.headers)
+        self.assertNotIn("id", second.cookies)
+
+    def test_responses_setting_cookies_are_not_shared(self):
+        sessions = [self.session, coalescing_session(self.coalescer)]
+        for session in sessions:
+            session.get(f"{self.server.url}/login")
+        self.assertEqual(len(self.server.requests), 2)
+        self.assertEqual(
+            [session.cookies.get("id") for session in sessions], ["1", "2"]
+        )
+
+    def test_sessions_share_a_coalescer(self):
+        self.session.get(f"{self.server.url}/a")
+        coalescing_session(self.coalescer).get(f"{self.server.url}/a")
+        Session().get(f"{self.server.url}/a")
+        self.assertEqual(len(self.server.requests), 2)
+
+    def test_concurrent_requests_share_a_call(self):
+        responses = []
+
+        def get():
+            responses.append(self.session.get(f"{self.server.url}/a").text)
+
+        threads = [threading.Thread(target=get) for _ in range(8)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self.assertEqual(responses, ["/a 1"] * 8)
+        self.assertEqual(len(self.server.requests), 1)
+        self.assertEqual(self.coalescer.stats(), {"hits": 7, "misses": 1})
+
+    def test_failed_responses_are_not_shared(self):
+        self.status_codes = [429]
+        self.assertEqual(self.session.get(f"{self.server.url}/a").status_code, 429)
+        self.assertEqual(self.session.get(f"{self.server.url}/a").status_code, 200)
+        self.assertEqual(self.session.get(f"{self.server.url}/a").status_code, 200)
+        self.assertEqual(len(self.server.requests), 2)
+
+    def test_posts_are_not_coalesced(self):
+        self.session.post(f"{self.server.url}/a", data={"x": 1})
+        self.session.post(f"{self.server.url}/a", data={"x": 1})
+        self.assertEqual(len(self.server.requests), 2)
+        self.assertEqual(self.coalescer.stats(), {"hits": 0, "misses": 0})
+
+    def test_clear(self):
+        self.session.get(f"{self.server.url}/a")
+        self.coalescer.clear()
+        self.session.get(f"{self.server.url}/a")
+        self.assertEqual(len(self.server.requests), 2)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,133 @@
+import json
+import time
+import unittest
+from logging import ERROR, getLogger
+
+from parsers.lib.coalescing import RequestCoalescer
+from parsers.lib.fetch import FetchJob, fetch_all
+from parsers.lib.web import get_response
+from parsers.test.mocks.stub_server import StubServer
+
+SERVER_URL = ""
+SESSIONS = []
+
+
+def fetch_production(zone_key, session=None, target_datetime=None, logger=None):
+    SESSIONS.append(session)
+    return get_response(zone_key, f"{SERVER_URL}/production/{zone_key}", session).json()
+
+
+def fetch_exchange(
+    zone_key1, zone_key2, session=None, target_datetime=None, logger=None
+):
+    url = f"{SERVER_URL}/exchange/{zone_key1}/{zone_key2}"
+    return get_response(zone_key1, url, session).json()
+
+
+def fetch_production_slowly(zone_key, session=None, target_datetime=None, logger=None):
+    time.sleep(1)
+    return fetch_production(zone_key, session, target_datetime, logger)
+
+
+def handle(request):
+    _, data_type, *keys = request.path.split("/")
+    if keys[0] == "SLOW":
+        time.sleep(1)
+    elif keys[0] == "BROKEN":
+        return 500, {}, "error"
+    else:
+        time.sleep(0.05)
+    body = [{"zoneKey": "->".join(keys), "dataType": data_type}]
+    return 200, {"Content-Type": "application/json"}, json.dumps(body)
+
+
+PARSERS = {
+    "production": {
+        "A": fetch_production,
+        "B": fetch_production,
+        "C": fetch_production,
+        "D": fetch_production,
+        "BROKEN": fetch_production,
+        "SLOW": fetch_production,
+        "SLEEPY": fetch_production_slowly,
+    },
+    "exchange": {"A->B": fetch_exchange},
+}
+
+
+class TestFetchAll(unittest.TestCase):
+    def setUp(self):
+        global SERVER_URL
+        self.server = StubServer(handle).__enter__()
+        SERVER_URL = self.server.url
+        SESSIONS.clear()
+        self.logger = getLogger("test_fetch")
+        self.logger.setLevel(ERROR)
+
+    def tearDown(self):
+        self.server.__exit__()
+
+    def fetch_all(self, jobs, **kwargs):
+        return fetch_all(jobs, parsers=PARSERS, logger=self.logger, **kwargs)
+
+    def test_results(self):
+        jobs = [FetchJob("A", "production"), FetchJob("A->B", "exchange")]
+        results = self.fetch_all(jobs)
+        self.assertEqual([result.job for result in results], jobs)
+        self.assertTrue(all(result.ok for result in results))
+        self.assertEqual(results[0].data, [{"zoneKey": "A", "dataType": "production"}])
+        self.assertEqual(results[1].data, [{"zoneKey": "A->B", "dataType": "exchange"}])
+        self.assertEqual(results[0].source, __name__)
+        self.assertGreaterEqual(results[0].run_time, 0.05)
+        self.assertGreaterEqual(results[0].wait_time, 0)
+
+    def test_errors_are_returned(self):
+        results = self.fetch_all(
+            [FetchJob("BROKEN", "production"), FetchJob("Z", "production")]
+        )
+        self.assertIn("Response code: 500", str(results[0].error))
+        self.assertIsInstance(results[1].error, KeyError)
+        self.assertIsNone(results[1].run_time)
+
+    def test_per_source_limit(self):
+        jobs = [FetchJob(key, "production") for key in "ABCD"]
+        results = self.fetch_all(jobs, max_workers=8, max_workers_per_source=2)
+        self.assertTrue(all(result.ok for result in results))
+        self.assertEqual(self.server.max_concurrent_requests, 2)
+
+        self.server.max_concurrent_requests = 0
+        results = self.fetch_all(jobs, max_workers=8, source_limits={__name__: 4})
+        self.assertEqual(self.server.max_concurrent_requests, 4)
+
+    def test_sources_share_a_session(self):
+        self.fetch_all([FetchJob(key, "production") for key in "ABCD"])
+        self.assertEqual(len(SESSIONS), 4)
+        self.assertEqual(len(set(map(id, SESSIONS))), 1)
+
+    def test_identical_requests_are_shared(self):
+        coalescer = RequestCoalescer()
+        jobs = [FetchJob("A", "production"), FetchJob("A->B", "exchange")]
+        self.fetch_all(jobs, coalescer=coalescer)
+        self.fetch_all(jobs, coalescer=coalescer)
+        self.assertEqual(len(self.server.requests), 2)
+        self.assertEqual(coalescer.stats(), {"hits": 2, "misses": 2})
+
+    def test_timeout(self):
+        start = time.monotonic()
+        results = self.fetch_all(
+            [
+                FetchJob("SLOW", "production"),
+                FetchJob("SLEEPY", "production"),
+                FetchJob("A", "production"),
+            ],
+            timeout=0.3,
+        )
+        self.assertLess(time.monotonic() - start, 0.9)
+        # Requests time out on their own, parsers are abandoned.
+        self.assertIn("Read timed out", str(results[0].error))
+        self.assertIsInstance(results[1].error, TimeoutError)
+        self.assertTrue(results[2].ok)
+
+
+if __name__ == "__main__":
+    unittest.main()
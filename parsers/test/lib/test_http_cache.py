@@ -0,0 +1,164 @@
+import os
+import pickle
+import tempfile
+import unittest
+from pathlib import Path
+from unittest.mock import patch
+
+from requests import Session
+
+from parsers.lib import web
+from parsers.lib.http_cache import CachedResponse, HTTPCache
+from parsers.test.mocks.stub_server import StubServer
+
+DOCUMENTS = {}
+
+
+def handle(request):
+    if request.path not in DOCUMENTS:
+        return 404, {}, "not found"
+    version, body = DOCUMENTS[request.path]
+    etag = f'"{version}"'
+    if request.headers.get("If-None-Match") == etag:
+        return 304, {"ETag": etag}, ""
+    headers = {"ETag": etag}
+    if request.path == "/private":
+        headers["Cache-Control"] = "no-store"
+    return 200, headers, body
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 1_000_000.0
+
+    def __call__(self):
+        return self.now
+
+
+class TestHTTPCache(unittest.TestCase):
+    def setUp(self):
+        DOCUMENTS.clear()
+        DOCUMENTS["/document"] = (1, "first version")
+        self.server = StubServer(handle).__enter__()
+        self.addCleanup(self.server.__exit__)
+        self.session = Session()
+        self.clock = FakeClock()
+        self.cache = HTTPCache(ttl=60, clock=self.clock)
+
+    def get(self, path, cache=None):
+        return (cache or self.cache).get(self.session, f"{self.server.url}{path}")
+
+    def test_fresh_responses_are_served_from_the_cache(self):
+        self.assertEqual(self.get("/document").text, "first version")
+        self.clock.now += 30
+        response = self.get("/document")
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.text, "first version")
+        self.assertEqual(response.headers["etag"], '"1"')
+        self.assertEqual(len(self.server.requests), 1)
+        self.assertEqual(self.cache.stats()["hits"], 1)
+
+    def test_stale_responses_are_revalidated(self):
+        self.get("/document")
+        self.clock.now += 61
+        self.assertEqual(self.get("/document").text, "first version")
+        self.assertEqual(len(self.server.requests), 2)
+        self.assertEqual(self.server.requests[1].headers["If-None-Match"], '"1"')
+        self.assertEqual(self.cache.stats()["revalidated"], 1)
+        # The revalidated response is fresh again
+        self.get("/document")
+        self.assertEqual(len(self.server.requests), 2)
+
+        DOCUMENTS["/document"] = (2, "second version")
+        self.clock.now += 61
+        self.assertEqual(self.get("/document").text, "second version")
+        self.assertEqual(self.get("/document").text, "second version")
+        self.assertEqual(len(self.server.requests), 3)
+
+    def test_ttl_per_host(self):
+        cache = HTTPCache(ttl=60, ttls={"127.0.0.1": 0}, clock=self.clock)
+        self.get("/document", cache)
+        self.get("/document", cache)
+        self.assertEqual(len(self.server.requests), 2)
+
+    def test_uncacheable_responses(self):
+        DOCUMENTS["/private"] = (1, "private")
+        self.assertEqual(self.get("/missing").status_code, 404)
+        self.get("/missing")
+        self.get("/private")
+        self.get("/private")
+        self.assertEqual(len(self.server.requests), 4)
+        self.assertEqual(self.cache.stats()["misses"], 4)
+
+    def test_memory_eviction(self):
+        DOCUMENTS["/other"] = (1, "other document")
+        cache = HTTPCache(max_memory_size=20, clock=self.clock)
+        self.get("/document", cache)
+        self.get("/other", cache)
+        self.assertEqual(cache.stats()["evictions"], 1)
+        self.assertEqual(cache.stats()["memory_size"], len("other document"))
+        self.get("/document", cache)
+        self.assertEqual(len(self.server.requests), 3)
+
+    def test_disk_cache(self):
+        with tempfile.TemporaryDirectory() as directory:
+            self.get("/document", HTTPCache(directory, clock=self.clock))
+            cache = HTTPCache(directory, clock=self.clock)
+            self.assertEqual(self.get("/document", cache).text, "first version")
+            self.assertEqual(len(self.server.requests), 1)
+
+            DOCUMENTS["/other"] = (1, "other document")
+            cache = HTTPCache(directory, max_disk_size=1, clock=self.clock)
+            self.get("/other", cache)
+            self.assertEqual(cache.stats()["evictions"], 2)
+
+    def test_unreadable_files_are_misses(self):
+        with tempfile.TemporaryDirectory() as directory:
+            self.get("/document", HTTPCache(directory, clock=self.clock))
+            (path,) = Path(directory).glob("*.pickle")
+            # Pickled by a version of the cache with another CachedResponse class
+            path.write_bytes(
+                pickle.dumps(CachedResponse).replace(
+                    b"CachedResponse", b"RemovedResponse"
+                )
+            )
+            cache = HTTPCache(directory, clock=self.clock)
+            self.assertEqual(self.get("/document", cache).text, "first version")
+            self.assertEqual(len(self.server.requests), 2)
+            self.assertEqual(cache.stats()["misses"], 1)
+            # Replaced by the new response
+            self.assertIsInstance(pickle.loads(path.read_bytes()), CachedResponse)
+
+    def test_disk_size_is_tracked_incrementally(self):
+        for path in ["/first", "/second", "/third"]:
+            DOCUMENTS[path] = (1, "x" * 1000)
+        with tempfile.TemporaryDirectory() as directory:
+            cache = HTTPCache(directory, max_disk_size=3000, clock=self.clock)
+            with patch("os.scandir", wraps=os.scandir) as scandir:
+                for path in ["/first", "/second", "/third"]:
+                    self.get(path, cache)
+                    self.clock.now += 1
+            self.assertEqual(scandir.call_count, 1)
+            self.assertEqual(cache.stats()["evictions"], 1)
+            self.assertEqual(len(list(Path(directory).glob("*.pickle"))), 2)
+
+    def test_web_helpers(self):
+        web.enable_http_cache()
+        self.addCleanup(web.disable_http_cache)
+        url = f"{self.server.url}/document"
+        self.assertEqual(web.get_response_text("XX", url), "first version")
+        self.assertEqual(web.get_response_text("XX", url), "first version")
+        self.assertEqual(len(self.server.requests), 1)
+        self.assertEqual(web.HTTP_CACHE.stats()["hits"], 1)
+
+    def test_web_helpers_dont_share_cookies(self):
+        def handle(request):
+            return 200, {"Set-Cookie": "id=1"}, request.headers.get("Cookie", "")
+
+        with StubServer(handle) as server:
+            web.get_response("XX", f"{server.url}/login")
+            self.assertEqual(web.get(f"{server.url}/document").text, "")
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,114 @@
+import time
+import unittest
+from concurrent.futures import ThreadPoolExecutor
+from io import BytesIO
+from logging import ERROR, getLogger
+
+from PIL import Image
+
+from parsers.lib.ocr import OCRError, OCRService
+
+ENGINE_CALLS = []
+
+
+def describe(image: Image.Image, lang: str, config: str) -> str:
+    ENGINE_CALLS.append(image.size)
+    return f"{image.size} {image.mode} {lang} {config}"
+
+
+def describe_slowly(image: Image.Image, lang: str, config: str) -> str:
+    time.sleep(0.2)
+    return describe(image, lang, config)
+
+
+def fail(image: Image.Image, lang: str, config: str) -> str:
+    raise RuntimeError("Unreadable")
+
+
+def grayscale(image: Image.Image) -> Image.Image:
+    return image.convert("L")
+
+
+def png(width: int, height: int, color: str = "black") -> bytes:
+    buffer = BytesIO()
+    Image.new("RGB", (width, height), color).save(buffer, format="PNG")
+    return buffer.getvalue()
+
+
+class TestOCRService(unittest.TestCase):
+    def setUp(self):
+        ENGINE_CALLS.clear()
+        self.logger = getLogger("test_ocr")
+        self.logger.setLevel(ERROR)
+
+    def service(self, **kwargs) -> OCRService:
+        kwargs = {"processes": False, "engine": describe, **kwargs}
+        return OCRService(logger=self.logger, **kwargs)
+
+    def test_unchanged_images_are_read_once(self):
+        ocr = self.service()
+        image = png(100, 50)
+        self.assertEqual(ocr.image_to_string(image), "(100, 50) RGB eng ")
+        self.assertEqual(ocr.image_to_string(image), "(100, 50) RGB eng ")
+        # The same image, encoded again
+        self.assertEqual(ocr.image_to_string(png(100, 50)), "(100, 50) RGB eng ")
+        self.assertEqual(len(ENGINE_CALLS), 1)
+        stats = ocr.stats()
+        self.assertEqual((stats["hits"], stats["misses"]), (2, 1))
+        self.assertAlmostEqual(stats["hit_rate"], 2 / 3)
+        self.assertGreaterEqual(stats["max_ocr_time"], stats["mean_ocr_time"])
+
+    def test_regions_and_options_are_cached_separately(self):
+        ocr = self.service()
+        image = png(100, 50)
+        self.assertEqual(
+            ocr.image_to_string(image, box=(0, 0, 10, 20), preprocess=grayscale),
+            "(10, 20) L eng ",
+        )
+        self.assertEqual(
+            ocr.image_to_string(image, box=(0, 0, 10, 20)), "(10, 20) RGB eng "
+        )
+        self.assertEqual(
+            ocr.image_to_string(image, box=(0, 0, 10, 20), lang="jpn", config="-x"),
+            "(10, 20) RGB jpn -x",
+        )
+        ocr.image_to_string(png(100, 50, "white"), box=(0, 0, 10, 20))
+        self.assertEqual(len(ENGINE_CALLS), 4)
+
+    def test_least_recently_used_results_are_evicted(self):
+        ocr = self.service(max_entries=2)
+        images = [png(10, 10), png(20, 20), png(30, 30)]
+        for image in [images[0], images[1], images[0], images[2], images[0]]:
+            ocr.image_to_string(image)
+        self.assertEqual(ENGINE_CALLS, [(10, 10), (20, 20), (30, 30)])
+
+    def test_errors_are_not_cached(self):
+        ocr = self.service(engine=fail)
+        for _ in range(2):
+            with self.assertRaisesRegex(OCRError, "RuntimeError: Unreadable"):
+                ocr.image_to_string(png(10, 10))
+        self.assertEqual(ocr.stats()["errors"], 2)
+
+    def test_concurrent_reads_are_shared(self):
+        ocr = self.service(engine=describe_slowly)
+        with ThreadPoolExecutor(4) as executor:
+            texts = list(executor.map(ocr.image_to_string, [png(10, 10)] * 4))
+        self.assertEqual(texts, ["(10, 10) RGB eng "] * 4)
+        self.assertEqual(len(ENGINE_CALLS), 1)
+
+    def test_process_pool(self):
+        ocr = self.service(processes=True, max_workers=1)
+        self.addCleanup(ocr.shutdown)
+        image = png(100, 50)
+        text = ocr.image_to_string(image, box=(0, 0, 10, 20), preprocess=grayscale)
+        self.assertEqual(text, "(10, 20) L eng ")
+        failing = self.service(processes=True, max_workers=1, engine=fail)
+        self.addCleanup(failing.shutdown)
+        with self.assertRaisesRegex(OCRError, "Unreadable"):
+            failing.image_to_string(image)
+        # The engine ran in another process
+        self.assertEqual(ENGINE_CALLS, [])
+
+
+if __name__ == "__main__":
+    unittest.main()
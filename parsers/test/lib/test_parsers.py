@@ -0,0 +1,46 @@
+import subprocess
+import sys
+import unittest
+
+from parsers.lib.parsers import PARSER_KEY_TO_DICT, LazyParserDict, preload
+
+
+class TestLazyParserDict(unittest.TestCase):
+    def setUp(self):
+        self.parsers = LazyParserDict()
+        self.parsers.paths["FR"] = "ENTSOE.fetch_production"
+        self.parsers.paths["XX"] = "MISSING_MODULE.fetch_production"
+
+    def test_parsers_are_resolved_on_access(self):
+        from parsers import ENTSOE
+
+        self.assertIn("XX", self.parsers)
+        self.assertEqual(list(self.parsers), ["FR", "XX"])
+        self.assertIs(self.parsers["FR"], ENTSOE.fetch_production)
+        self.assertIs(self.parsers.get("FR"), ENTSOE.fetch_production)
+        self.assertIsNone(self.parsers.get("DE"))
+        with self.assertRaises(ImportError):
+            self.parsers["XX"]
+
+    def test_registry(self):
+        self.assertIsInstance(PARSER_KEY_TO_DICT["production"], LazyParserDict)
+        self.assertEqual(
+            PARSER_KEY_TO_DICT["production"].paths["FR"], "FR.fetch_production"
+        )
+        self.assertEqual(
+            preload(["FR", "DE->FR"], ["production", "exchange", "price"]), []
+        )
+
+    def test_parser_modules_are_not_imported_with_the_registry(self):
+        code = (
+            "import sys; import parsers.lib.parsers; "
+            "print(len([m for m in sys.modules if m in {'parsers.ENTSOE', 'pandas'}]))"
+        )
+        output = subprocess.run(
+            [sys.executable, "-c", code], check=True, capture_output=True, text=True
+        ).stdout
+        self.assertEqual(output.strip(), "0")
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,115 @@
+import os
+import unittest
+from unittest.mock import patch
+
+from parsers.lib.token_pool import TokenPool, TokensUnavailable, get_token_pool
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+        self.sleeps = []
+
+    def __call__(self):
+        return self.now
+
+    def sleep(self, seconds):
+        self.sleeps.append(seconds)
+        self.now += seconds
+
+
+class TestTokenPool(unittest.TestCase):
+    def setUp(self):
+        self.clock = FakeClock()
+
+    def pool(self, tokens, **kwargs):
+        return TokenPool(tokens, clock=self.clock, sleep=self.clock.sleep, **kwargs)
+
+    def test_least_recently_used_token_is_picked(self):
+        pool = self.pool(["a", "b", "c"], rate=60, burst=10)
+        tokens = []
+        for _ in range(6):
+            tokens.append(pool.acquire())
+            self.clock.now += 0.1
+        self.assertEqual(tokens, ["a", "b", "c", "a", "b", "c"])
+        self.assertEqual(self.clock.sleeps, [])
+
+    def test_rate_limit(self):
+        # 2 requests per second, bursts of 2
+        pool = self.pool(["a"], rate=2, period=1, burst=2)
+        pool.acquire()
+        pool.acquire()
+        self.assertEqual(self.clock.sleeps, [])
+        pool.acquire()
+        self.assertEqual(self.clock.sleeps, [0.5])
+        self.clock.now += 10
+        pool.acquire()
+        self.assertEqual(self.clock.sleeps, [0.5])
+
+    def test_available_token_is_preferred_over_waiting(self):
+        pool = self.pool(["a", "b"], rate=1, period=1, burst=1)
+        self.assertEqual(pool.acquire(), "a")
+        self.clock.now += 0.5
+        self.assertEqual(pool.acquire(), "b")
+        self.assertEqual(pool.acquire(), "a")
+        self.assertEqual(self.clock.sleeps, [0.5])
+
+    def test_cooldown(self):
+        pool = self.pool(["a", "b"], rate=60, burst=10, cooldown=60)
+        pool.release(pool.acquire(), 429)
+        self.assertEqual([pool.acquire() for _ in range(3)], ["b", "b", "b"])
+        pool.release("b", 429, retry_after="5")
+        # Waits for b, which cools down first
+        self.assertEqual(pool.acquire(), "b")
+        self.assertEqual(self.clock.sleeps, [5])
+
+    def test_unauthorized_token_cools_down_longer(self):
+        pool = self.pool(["a"], rate=60, burst=10, unauthorized_cooldown=600)
+        pool.release(pool.acquire(), 401)
+        with self.assertRaises(TokensUnavailable):
+            pool.acquire(max_wait=30)
+        self.assertEqual(self.clock.sleeps, [])
+
+    def test_health(self):
+        pool = self.pool(["secret-a", "secret-b"], rate=60, burst=10)
+        pool.release(pool.acquire(), 200)
+        pool.release(pool.acquire(), 429)
+        pool.release(pool.acquire(), 500)
+        self.assertEqual(
+            pool.health(),
+            [
+                {
+                    "token": "...et-a",
+                    "requests": 2,
+                    "failures": 1,
+                    "throttled": 0,
+                    "unauthorized": 0,
+                    "cooldown": 0.0,
+                    "wait": 0.0,
+                },
+                {
+                    "token": "...et-b",
+                    "requests": 1,
+                    "failures": 1,
+                    "throttled": 1,
+                    "unauthorized": 0,
+                    "cooldown": 60.0,
+                    "wait": 60.0,
+                },
+            ],
+        )
+
+    def test_pools_are_shared_by_the_process(self):
+        with patch.dict(os.environ, {"TEST_TOKEN_POOL_TOKEN": "a,b"}):
+            pool = get_token_pool("TEST_TOKEN_POOL_TOKEN", rate=60)
+            self.assertEqual(pool.tokens, ["a", "b"])
+            self.assertIs(get_token_pool("TEST_TOKEN_POOL_TOKEN", rate=60), pool)
+        with patch.dict(os.environ, {"TEST_TOKEN_POOL_TOKEN": "c"}):
+            self.assertEqual(
+                get_token_pool("TEST_TOKEN_POOL_TOKEN", rate=60).tokens, ["c"]
+            )
+        self.assertNotIn("TEST_TOKEN_POOL_TOKEN", os.environ)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,83 @@
+"""A local EIA API v2 to test parsers against, see FakeEIAAPI."""
+
+import json
+import threading
+from typing import Any, Dict, List
+
+from parsers.test.mocks.stub_server import StubRequest, StubResponse, StubServer
+
+# Rows per response at most, as for the real API
+MAX_LENGTH = 5000
+
+
+class FakeEIAAPI:
+    """
+    Serves the data routes of the EIA API v2 (e.g. `{url}/fuel-type-data/data/`) from
+    the rows added to each route, with `facets[...][]` filters, `sort[...]` and
+    `offset`/`length` paging. The `start` and `end` of queries aren't applied.
+
+    with FakeEIAAPI() as api:
+        api.add_rows("fuel-type-data", [{"period": "2022-10-31T11", ...}])
+        requests.get(f"{api.url}/fuel-type-data/data/", params=...)
+    """
+
+    def __init__(self):
+        self.server = StubServer(self.handle)
+        self.url = f"{self.server.url}/v2/electricity/rto"
+        self._lock = threading.Lock()
+        self._rows: Dict[str, List[Dict[str, Any]]] = {}
+
+    @property
+    def requests(self) -> List[StubRequest]:
+        return self.server.requests
+
+    def add_rows(self, route: str, rows: List[Dict[str, Any]]):
+        with self._lock:
+            self._rows.setdefault(route, []).extend(rows)
+
+    def handle(self, request: StubRequest) -> StubResponse:
+        route = request.path.rstrip("/").split("/")[-2]
+        params = request.params
+        if "api_key" not in params:
+            return 403, {}, json.dumps({"error": "No api_key was supplied."})
+        with self._lock:
+            rows = list(self._rows.get(route, []))
+        for name, values in params.items():
+            if name.startswith("facets["):
+                facet = name[len("facets[") : name.index("]")]
+                rows = [row for row in rows if row[facet] in values]
+        # Sorts by the last column first, so that the first column prevails
+        sorts = sorted(
+            (
+                int(name[len("sort[") : name.index("]")]),
+                name.endswith("[column]"),
+                values[0],
+            )
+            for name, values in params.items()
+            if name.startswith("sort[")
+        )
+        columns = {i: value for i, is_column, value in sorts if is_column}
+        directions = {i: value for i, is_column, value in sorts if not is_column}
+        for i in sorted(columns, reverse=True):
+            rows.sort(
+                key=lambda row: row[columns[i]], reverse=directions.get(i) == "desc"
+            )
+        offset = int(params.get("offset", ["0"])[0])
+        length = min(int(params.get("length", [str(MAX_LENGTH)])[0]), MAX_LENGTH)
+        body = {
+            "response": {
+                # The API can send the total as a string
+                "total": str(len(rows)),
+                "dateFormat": 'YYYY-MM-DD"T"HH24',
+                "frequency": "hourly",
+                "data": rows[offset : offset + length],
+            }
+        }
+        return 200, {"Content-Type": "application/json"}, json.dumps(body)
+
+    def __enter__(self) -> "FakeEIAAPI":
+        self.server.__enter__()
+        return self
+
+    def __exit__(self, *args):
+        self.server.__exit__(*args)
@@ -0,0 +1,75 @@
+"""A fake occtonet to test parsers against, see FakeOcctonet."""
+
+import json
+from typing import Dict, List, Set
+from urllib.parse import parse_qs
+
+from requests import Session
+from requests_mock import ANY, GET, POST, Adapter
+
+FORM_URL = "https://occtonet3.occto.or.jp/public/dfw/RP11/OCCTO/SD/CA01S070C"
+
+
+def _header(**values) -> dict:
+    return {name: {"value": value} for name, value in values.items()}
+
+
+def line_csv(flows: List[float], day: str = "2022/10/01") -> bytes:
+    """Download of a line with a flow per hour, and a last hour without flow yet."""
+    rows = ["対象日付,対象時刻,計画潮流(順方向),潮流実績"]
+    for hour, flow in enumerate(flows):
+        rows.append(f"{day},{hour:02d}:00,0,{flow}")
+    rows.append(f"{day},{len(flows):02d}:00,0,")
+    return "\n".join(rows).encode("shift-jis")
+
+
+class FakeOcctonet:
+    """
+    Answers the login, form and download requests of occtonet on the sessions it is
+    mounted on, with the download of `lines[line_id]` for each line.
+
+    occtonet = FakeOcctonet({2: line_csv([100, 101])})
+    occtonet.mount(session)
+    """
+
+    def __init__(self, lines: Dict[int, bytes]):
+        self.lines = lines
+        self.failing_lines: Set[int] = set()
+        self.downloads: List[int] = []
+        self.adapter = Adapter()
+        self.adapter.register_uri(GET, ANY, text="")
+        self.adapter.register_uri(POST, FORM_URL, content=self.respond)
+
+    def mount(self, session: Session):
+        session.mount("http://occtonet", self.adapter)
+        session.mount("https://occtonet3", self.adapter)
+
+    @property
+    def logins(self) -> int:
+        return sum(r.method == GET for r in self.adapter.request_history)
+
+    def respond(self, request, context) -> bytes:
+        form = {name: values[0] for name, values in parse_qs(request.text).items()}
+        line_id = int(form["tgtRkl"])
+        action = form["fwExtention.actionSubType"]
+        if action == "headerInput":
+            values = {
+                "msgArea": "",
+                "searchReqHdn": "",
+                "spcDayHdn": "",
+                "updDaytime": "",
+            }
+            return json.dumps(
+                {"root": {"errMessage": "", "bizRoot": {"header": _header(**values)}}}
+            ).encode()
+        if action == "ok":
+            values = {"downloadKey": f"key{line_id}", "requestToken": "token"}
+            return json.dumps(
+                {"root": {"errFields": "", "bizRoot": {"header": _header(**values)}}}
+            ).encode()
+        assert form["downloadKey"] == f"key{line_id}"
+        self.downloads.append(line_id)
+        if line_id in self.failing_lines or line_id not in self.lines:
+            context.status_code = 500
+            return b"Internal Server Error"
+        return self.lines[line_id]
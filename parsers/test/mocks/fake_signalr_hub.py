@@ -0,0 +1,82 @@
+"""A local SignalR hub to test SignalR clients against, see FakeSignalRHub."""
+
+import json
+import threading
+from typing import Any, Dict, Tuple
+
+from parsers.test.mocks.stub_server import StubRequest, StubResponse, StubServer
+
+# Delay before clients reconnect to the event stream, in milliseconds
+RETRY_MS = 20
+
+
+class FakeSignalRHub:
+    """
+    Serves the SignalR 1.x endpoints (negotiate, connect, start and abort) at
+    `{url}`, with the server-sent events transport.
+    Every event stream sends the current payload of each method of the hubs of the
+    connection, then ends, and the client reconnects to get them again.
+
+    with FakeSignalRHub() as hub:
+        hub.set_payload("TagHub", "Dashboard", {"technologies": []})
+        Connection(hub.url, session)...
+    """
+
+    def __init__(self):
+        self.server = StubServer(self.handle)
+        self.url = f"{self.server.url}/signalr"
+        # Number of negotiations to fail, to test reconnections
+        self.failing_negotiations = 0
+        self.negotiations = 0
+        self._lock = threading.Lock()
+        self._payloads: Dict[Tuple[str, str], Any] = {}
+
+    def set_payload(self, hub: str, method: str, payload: Any):
+        with self._lock:
+            self._payloads[(hub.lower(), method)] = payload
+
+    def handle(self, request: StubRequest) -> StubResponse:
+        action = request.path.rsplit("/", 1)[-1]
+        if action == "negotiate":
+            with self._lock:
+                self.negotiations += 1
+                if self.failing_negotiations > 0:
+                    self.failing_negotiations -= 1
+                    return 503, {}, "Service Unavailable"
+            body = {
+                "Url": "/signalr",
+                "ConnectionToken": "token",
+                "ConnectionId": f"connection-{self.negotiations}",
+                "KeepAliveTimeout": 20.0,
+                "DisconnectTimeout": 30.0,
+                "TryWebSockets": False,
+                "ProtocolVersion": "1.5",
+            }
+            return 200, {"Content-Type": "application/json"}, json.dumps(body)
+        if action == "connect":
+            hubs = {
+                hub["name"].lower()
+                for hub in json.loads(request.params["connectionData"][0])
+            }
+            with self._lock:
+                messages = [
+                    {"H": hub, "M": method, "A": [payload]}
+                    for (hub, method), payload in self._payloads.items()
+                    if hub in hubs
+                ]
+            events = [f"retry: {RETRY_MS}\ndata: initialized\n\n"]
+            if messages:
+                events.append(f"data: {json.dumps({'C': 'cursor', 'M': messages})}\n\n")
+            return 200, {"Content-Type": "text/event-stream"}, "".join(events)
+        if action == "start":
+            return 200, {"Content-Type": "application/json"}, '{"Response": "started"}'
+        if action == "abort":
+            return 200, {}, ""
+        return 404, {}, "Not Found"
+
+    def __enter__(self) -> "FakeSignalRHub":
+        self.server.__enter__()
+        return self
+
+    def __exit__(self, *args):
+        self.server.__exit__(*args)
@@ -0,0 +1,93 @@
+"""A local HTTP server to test parsers against, answering from a handler function."""
+
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Callable, Dict, List, NamedTuple, Tuple, Union
+from urllib.parse import parse_qs, urlsplit
+
+
+class StubRequest(NamedTuple):
+    method: str
+    path: str
+    params: Dict[str, List[str]]
+    headers: Dict[str, str]
+    body: bytes
+
+
+# Returns the status code, the headers and the body of the response
+StubResponse = Tuple[int, Dict[str, str], Union[str, bytes]]
+
+
+class StubServer:
+    """
+    Serves `handler(request)` on a free local port, from a background thread.
+    Records the requests received and the maximum number handled concurrently.
+
+    with StubServer(lambda request: (200, {}, "ok")) as server:
+        requests.get(f"{server.url}/path")
+    """
+
+    def __init__(self, handler: Callable[[StubRequest], StubResponse]):
+        self.handler = handler
+        self.requests: List[StubRequest] = []
+        self.max_concurrent_requests = 0
+        self._concurrent_requests = 0
+        self._lock = threading.Lock()
+        self._server = ThreadingHTTPServer(("127.0.0.1", 0), self._request_handler())
+        self._server.daemon_threads = True
+        # Clients giving up on slow responses (e.g. timeouts) are expected
+        self._server.handle_error = lambda request, client_address: None
+        self.url = f"http://127.0.0.1:{self._server.server_address[1]}"
+
+    def _request_handler(self):
+        server = self
+
+        class RequestHandler(BaseHTTPRequestHandler):
+            def handle_request(self):
+                length = int(self.headers.get("Content-Length") or 0)
+                url = urlsplit(self.path)
+                request = StubRequest(
+                    method=self.command,
+                    path=url.path,
+                    params=parse_qs(url.query),
+                    headers=dict(self.headers),
+                    body=self.rfile.read(length),
+                )
+                with server._lock:
+                    server.requests.append(request)
+                    server._concurrent_requests += 1
+                    server.max_concurrent_requests = max(
+                        server.max_concurrent_requests, server._concurrent_requests
+                    )
+                try:
+                    status, headers, body = server.handler(request)
+                finally:
+                    with server._lock:
+                        server._concurrent_requests -= 1
+                if isinstance(body, str):
+                    body = body.encode("utf-8")
+                self.send_response(status)
+                for key, value in headers.items():
+                    self.send_header(key, value)
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            do_GET = do_POST = handle_request
+
+            def log_message(self, format, *args):
+                pass
+
+        return RequestHandler
+
+    def __enter__(self) -> "StubServer":
+        threading.Thread(
+            target=self._server.serve_forever,
+            kwargs={"poll_interval": 0.05},
+            daemon=True,
+        ).start()
+        return self
+
+    def __exit__(self, *args):
+        self._server.shutdown()
+        self._server.server_close()
@@ -2,6 +2,7 @@
 
 import json
 import unittest
+from datetime import datetime, timezone
 from unittest.mock import patch
 
 from pkg_resources import resource_string
@@ -23,7 +24,7 @@ class TestAusTasKi(unittest.TestCase):
         with open(filename) as f:
             fake_data = json.load(f)
         with patch("parsers.ajenti.SignalR.get_value") as f:
-            f.return_value = fake_data
+            f.return_value = (fake_data, datetime.now(timezone.utc))
             data = ajenti.fetch_production()
 
         self.assertIsNotNone(data["production"])
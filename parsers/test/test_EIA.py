@@ -1,15 +1,29 @@
+import math
 import os
 import unittest
-from datetime import datetime
+from datetime import datetime, timedelta
 from json import loads
+from logging import getLogger
 from typing import Dict, List, Union
+from unittest.mock import patch
 
+from dateutil import parser
 from pkg_resources import resource_string
 from pytz import utc
-from requests import Session
-from requests_mock import ANY, GET, Adapter
+from requests import HTTPError, Session
+from requests_mock import ANY, Adapter
 
 from parsers import EIA
+from parsers.test.mocks.fake_eia_api import FakeEIAAPI
+
+
+def read_rows(filename: str, respondent: str, fueltype: str) -> List[Dict]:
+    """Rows of a mock response, as rows of the respondent and fuel type."""
+    response = loads(resource_string("parsers.test.mocks.EIA", filename))
+    return [
+        {**row, "respondent": respondent, "fueltype": fueltype}
+        for row in response["response"]["data"]
+    ]
 
 
 class TestEIA(unittest.TestCase):
@@ -18,12 +32,19 @@ class TestEIA(unittest.TestCase):
         self.session = Session()
         self.adapter = Adapter()
         self.session.mount("https://", self.adapter)
+        self.api = FakeEIAAPI().__enter__()
+        self.addCleanup(self.api.__exit__)
+        fuel_type_data = patch.object(
+            EIA, "FUEL_TYPE_DATA", f"{self.api.url}/fuel-type-data/data/"
+        )
+        fuel_type_data.start()
+        self.addCleanup(fuel_type_data.stop)
 
     def test_fetch_production_mix(self):
-        wind_avrn_data = resource_string(
-            "parsers.test.mocks.EIA", "US_NW_AVRN-wind.json"
-        )
-        self.adapter.register_uri(GET, ANY, json=loads(wind_avrn_data.decode("utf-8")))
+        for code in EIA.TYPES.values():
+            self.api.add_rows(
+                "fuel-type-data", read_rows("US_NW_AVRN-wind.json", "PGE", code)
+            )
         data_list = EIA.fetch_production_mix("US-NW-PGE", self.session)
         expected = [
             {
@@ -58,33 +79,12 @@ class TestEIA(unittest.TestCase):
         self.check_production_matches(data_list, expected)
 
     def test_US_NW_AVRN_rerouting(self):
-        gas_avrn_data = resource_string("parsers.test.mocks.EIA", "US_NW_AVRN-gas.json")
-        wind_avrn_data = resource_string(
-            "parsers.test.mocks.EIA", "US_NW_AVRN-wind.json"
-        )
-        other_avrn_data = resource_string(
-            "parsers.test.mocks.EIA", "US_NW_AVRN-other.json"
-        )
-        gas_pacw_data = resource_string("parsers.test.mocks.EIA", "US_NW_PACW-gas.json")
-        wind_bpat_data = resource_string(
-            "parsers.test.mocks.EIA", "US_NW_BPAT-wind.json"
-        )
-        gas_avrn_url = EIA.PRODUCTION_MIX.format("AVRN", "NG")
-        wind_avrn_url = EIA.PRODUCTION_MIX.format("AVRN", "WND")
-        gas_pacw_url = EIA.PRODUCTION_MIX.format("PACW", "NG")
-        wind_bpat_url = EIA.PRODUCTION_MIX.format("BPAT", "WND")
-        self.adapter.register_uri(GET, ANY, json=loads(other_avrn_data.decode("utf-8")))
-        self.adapter.register_uri(
-            GET, wind_avrn_url, json=loads(wind_avrn_data.decode("utf-8"))
-        )
-        self.adapter.register_uri(
-            GET, gas_pacw_url, json=loads(gas_pacw_data.decode("utf-8"))
-        )
-        self.adapter.register_uri(
-            GET, wind_bpat_url, json=loads(wind_bpat_data.decode("utf-8"))
-        )
-        self.adapter.register_uri(
-            GET, gas_avrn_url, json=loads(gas_avrn_data.decode("utf-8"))
+        self.api.add_rows(
+            "fuel-type-data",
+            read_rows("US_NW_AVRN-gas.json", "AVRN", "NG")
+            + read_rows("US_NW_AVRN-wind.json", "AVRN", "WND")
+            + read_rows("US_NW_PACW-gas.json", "PACW", "NG")
+            + read_rows("US_NW_BPAT-wind.json", "BPAT", "WND"),
         )
 
         data_list = EIA.fetch_production_mix("US-NW-PACW", self.session)
@@ -113,21 +113,10 @@ class TestEIA(unittest.TestCase):
         self.check_production_matches(data_list, expected)
 
     def test_US_CAR_SC_nuclear_split(self):
-        nuclear_sc_data = resource_string(
-            "parsers.test.mocks.EIA", "US_CAR_SC-nuclear.json"
-        )
-        nuclear_sceg_data = resource_string(
-            "parsers.test.mocks.EIA", "US_CAR_SCEG-nuclear.json"
-        )
-        other_data = resource_string("parsers.test.mocks.EIA", "US_NW_AVRN-other.json")
-        nuclear_sc_url = EIA.PRODUCTION_MIX.format("SC", "NUC")
-        nuclear_sceg_url = EIA.PRODUCTION_MIX.format("SCEG", "NUC")
-        self.adapter.register_uri(GET, ANY, json=loads(other_data.decode("utf-8")))
-        self.adapter.register_uri(
-            GET, nuclear_sceg_url, json=loads(nuclear_sceg_data.decode("utf-8"))
-        )
-        self.adapter.register_uri(
-            GET, nuclear_sc_url, json=loads(nuclear_sc_data.decode("utf-8"))
+        self.api.add_rows(
+            "fuel-type-data",
+            read_rows("US_CAR_SC-nuclear.json", "SC", "NUC")
+            + read_rows("US_CAR_SCEG-nuclear.json", "SCEG", "NUC"),
         )
 
         data_list = EIA.fetch_production_mix("US-CAR-SC", self.session)
@@ -187,10 +176,10 @@ class TestEIA(unittest.TestCase):
                 self.assertEqual(value, expected[i]["production"][key])
 
     def test_fetch_production_mix_discards_null(self):
-        null_avrn_data = resource_string(
-            "parsers.test.mocks.EIA", "US-NW-PGE-with-nulls.json"
-        )
-        self.adapter.register_uri(GET, ANY, json=loads(null_avrn_data.decode("utf-8")))
+        for code in EIA.TYPES.values():
+            self.api.add_rows(
+                "fuel-type-data", read_rows("US-NW-PGE-with-nulls.json", "PGE", code)
+            )
         data_list = EIA.fetch_production_mix("US-NW-PGE", self.session)
         expected = [
             {
@@ -214,5 +203,127 @@ class TestEIA(unittest.TestCase):
         self.check_production_matches(data_list, expected)
 
 
+class TestGetUtcDatetimes(unittest.TestCase):
+    def test_get_utc_datetimes(self):
+        for periods in [
+            ["2022-10-31T00", "2022-03-13T11"],
+            ["2022-10-31T00-05", "2022-03-13T11+01", "2022-03-13T11-00"],
+            # Other formats are parsed point by point
+            ["2022-10-31", "2022-10-31T11"],
+        ]:
+            expected = [
+                EIA._get_utc_datetime_from_datapoint(parser.parse(period))
+                for period in periods
+            ]
+            datetimes = EIA._get_utc_datetimes(periods)
+            self.assertEqual(datetimes, expected)
+            for dt, expected_dt in zip(datetimes, expected):
+                self.assertIs(dt.tzinfo, expected_dt.tzinfo)
+        self.assertEqual(
+            EIA._get_utc_datetimes(["2022-10-31T00-05"]),
+            [datetime(2022, 10, 31, 4, tzinfo=utc)],
+        )
+
+
+class TestFetchFuelTypeData(unittest.TestCase):
+    def setUp(self):
+        os.environ["EIA_KEY"] = "token"
+        self.session = Session()
+        self.api = FakeEIAAPI().__enter__()
+        self.addCleanup(self.api.__exit__)
+        for name, value in [
+            ("FUEL_TYPE_DATA", f"{self.api.url}/fuel-type-data/data/"),
+            ("PAGE_LENGTH", 50),
+            ("MAX_RESPONDENTS_PER_REQUEST", 2),
+        ]:
+            patcher = patch.object(EIA, name, value)
+            patcher.start()
+            self.addCleanup(patcher.stop)
+
+    def add_series(self, respondent: str, fueltype: str, hours: int, value: int):
+        self.api.add_rows(
+            "fuel-type-data",
+            [
+                {
+                    "period": f"2022-10-{1 + hour // 24:02d}T{hour % 24:02d}",
+                    "respondent": respondent,
+                    "fueltype": fueltype,
+                    "value": value + hour,
+                }
+                for hour in range(hours)
+            ],
+        )
+
+    def test_fetch_fuel_type_data(self):
+        for respondent in ["PGE", "PACW", "BPAT"]:
+            for fueltype in ["NG", "WND"]:
+                self.add_series(respondent, fueltype, 30, 100)
+        self.add_series("CISO", "NG", 30, 100)
+        series = EIA.fetch_fuel_type_data(
+            ["PGE", "PACW", "BPAT"],
+            ["NG", "WND"],
+            self.session,
+            datetime(2022, 10, 2, 5, tzinfo=utc),
+        )
+        self.assertEqual(len(series), 6)
+        points = series[("PACW", "WND")]
+        self.assertEqual(len(points), 30)
+        # Periods are the end of their hour
+        self.assertEqual(points[0], (datetime(2022, 9, 30, 23, tzinfo=utc), 100))
+        self.assertEqual(points[-1][1], 129)
+        # 2 requests of 2 pages (120 rows) and 1 request of 2 pages (60 rows)
+        self.assertEqual(len(self.api.requests), 5)
+        params = self.api.requests[0].params
+        self.assertEqual(params["facets[respondent][]"], ["PGE", "PACW"])
+        self.assertEqual(params["facets[fueltype][]"], ["NG", "WND"])
+        self.assertEqual(params["start"], ["2022-10-01T06"])
+        self.assertEqual(params["end"], ["2022-10-02T06"])
+
+    def test_fetch_latest_fuel_type_data(self):
+        self.add_series("PGE", "NG", 30, 100)
+        series = EIA.fetch_fuel_type_data(["PGE"], ["NG"], self.session)
+        # The latest points
+        self.assertEqual(len(series[("PGE", "NG")]), EIA.LATEST_POINTS)
+        self.assertEqual(series[("PGE", "NG")][-1][1], 129)
+        self.assertIn("start", self.api.requests[0].params)
+
+    def test_fetch_latest_fuel_type_data_of_lagging_respondents(self):
+        self.add_series("PGE", "NG", 30, 100)
+        with self.assertLogs(EIA.__name__, "WARNING"):
+            series = EIA.fetch_fuel_type_data(
+                ["PGE", "BPAT"], ["NG"], self.session, logger=getLogger(EIA.__name__)
+            )
+        self.assertEqual(list(series), [("PGE", "NG")])
+        series = EIA.fetch_fuel_type_data(
+            ["PGE"], ["NG"], self.session, latest_hours=24 * 7
+        )
+        start = datetime.strptime(
+            self.api.requests[-1].params["start"][0], EIA.EIA_TS_FORMAT
+        )
+        self.assertGreater(datetime.utcnow() - start, timedelta(days=6))
+
+    def test_failed_requests_raise(self):
+        adapter = Adapter()
+        adapter.register_uri(ANY, ANY, status_code=500, json={})
+        self.session.mount(self.api.url, adapter)
+        with self.assertRaises(HTTPError):
+            EIA.fetch_fuel_type_data(["PGE"], ["NG"], self.session)
+
+    def test_zones_share_a_download(self):
+        for zone_key, respondent in EIA.REGIONS.items():
+            if zone_key.startswith("US-"):
+                self.add_series(respondent, "NG", 2, 10)
+        for zone_key in ["US-NW-PGE", "US-TEN-TVA", "US-MIDA-PJM"]:
+            data = EIA.fetch_production_mix(zone_key, self.session)
+            self.assertEqual(data[-1]["production"], {"gas": 11})
+        # The paged requests of the first zone serve all the zones
+        self.assertEqual(
+            len(self.api.requests),
+            math.ceil(
+                len(EIA.PRODUCTION_MIX_RESPONDENTS) / EIA.MAX_RESPONDENTS_PER_REQUEST
+            ),
+        )
+
+
 if __name__ == "__main__":
     unittest.main()
@@ -0,0 +1,91 @@
+import unittest
+from datetime import date, datetime, timezone
+
+from pkg_resources import resource_string
+
+from parsers import ELEXON
+
+
+def read_mock(filename: str) -> str:
+    return resource_string("parsers.test.mocks.ELEXON", filename).decode("utf-8")
+
+
+class TestSettlementPeriods(unittest.TestCase):
+    def test_datetime_from_date_sp(self):
+        self.assertEqual(
+            ELEXON.datetime_from_date_sp(date(2022, 11, 1), 3),
+            datetime(2022, 11, 1, 1, tzinfo=timezone.utc),
+        )
+        self.assertEqual(
+            ELEXON.datetime_from_date_sp(date(2022, 6, 1), 1),
+            datetime(2022, 5, 31, 23, tzinfo=timezone.utc),
+        )
+
+    def test_datetime_from_date_sp_on_dst_changes(self):
+        # Clocks go forward from 1:00 to 2:00, the day has 46 periods.
+        self.assertEqual(
+            ELEXON.datetime_from_date_sp(date(2022, 3, 27), 3),
+            datetime(2022, 3, 27, 1, tzinfo=timezone.utc),
+        )
+        self.assertEqual(
+            ELEXON.datetime_from_date_sp(date(2022, 3, 27), 46),
+            datetime(2022, 3, 27, 22, 30, tzinfo=timezone.utc),
+        )
+        # Clocks go back from 2:00 to 1:00, the day has 50 periods.
+        self.assertEqual(
+            ELEXON.datetime_from_date_sp(date(2022, 10, 30), 5),
+            datetime(2022, 10, 30, 1, tzinfo=timezone.utc),
+        )
+        self.assertEqual(
+            ELEXON.datetime_from_date_sp(date(2022, 10, 30), 50),
+            datetime(2022, 10, 30, 23, 30, tzinfo=timezone.utc),
+        )
+
+
+class TestParseProduction(unittest.TestCase):
+    def test_parse_production(self):
+        data = ELEXON.parse_production(read_mock("B1620_2022-03-27.csv"))
+        self.assertEqual(len(data), 46)
+        self.assertEqual(
+            data[0]["datetime"], datetime(2022, 3, 27, tzinfo=timezone.utc)
+        )
+        self.assertEqual(
+            data[2]["datetime"], datetime(2022, 3, 27, 1, tzinfo=timezone.utc)
+        )
+        self.assertEqual(
+            data[-1]["datetime"], datetime(2022, 3, 27, 22, 30, tzinfo=timezone.utc)
+        )
+        # Wind onshore and offshore are summed
+        self.assertEqual(data[0]["production"]["wind"], 846.0 + 947.125)
+        self.assertEqual(data[0]["production"]["biomass"], 37.0)
+        # ELEXON storage is positive when discharging
+        self.assertEqual(data[0]["storage"], {"hydro": -441.5})
+        self.assertEqual(data[0]["zoneKey"], "GB")
+        self.assertEqual(data[0]["source"], "bmreports.com")
+
+    def test_parse_production_FUELINST(self):
+        data = ELEXON.parse_production_FUELINST(read_mock("FUELINST_2022-10-30.csv"))
+        self.assertEqual(len(data), 50)
+        self.assertEqual(
+            data[4]["datetime"], datetime(2022, 10, 30, 1, tzinfo=timezone.utc)
+        )
+        # The last instant of each settlement period is kept, CCGT and OCGT are gas.
+        self.assertEqual(
+            data[0]["production"],
+            {
+                "biomass": 2803,
+                "coal": 482,
+                "gas": 60 + 1537,
+                "hydro": 1326,
+                "nuclear": 693,
+                "oil": 271,
+                "solar": 1115,
+                "unknown": 1748,
+                "wind": 904,
+            },
+        )
+        self.assertEqual(data[0]["storage"], {})
+
+
+if __name__ == "__main__":
+    unittest.main()
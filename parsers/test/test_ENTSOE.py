@@ -0,0 +1,350 @@
+#!/usr/bin/env python3
+
+import logging
+import os
+import re
+import unittest
+from datetime import datetime, timezone
+from unittest.mock import patch
+
+from pkg_resources import resource_string
+from requests import Session
+from requests_mock import ANY, GET, Adapter
+
+from parsers import ENTSOE
+from parsers.lib.exceptions import ParserException
+from parsers.lib.token_pool import TOKEN_POOLS
+from parsers.test.mocks.stub_server import StubServer
+
+
+def read_mock(filename: str) -> str:
+    return resource_string("parsers.test.mocks.ENTSOE", filename).decode("utf-8")
+
+
+class TestIterTimeseriesPoints(unittest.TestCase):
+    def test_production_document(self):
+        points = list(ENTSOE.iter_timeseries_points(read_mock("FR_production.xml")))
+        self.assertEqual(len(points), 636)
+
+        timeseries, position, quantity = points[0]
+        self.assertEqual(timeseries.resolution, "PT60M")
+        self.assertEqual(
+            timeseries.datetime_start.datetime,
+            datetime(2022, 10, 10, 8, tzinfo=timezone.utc),
+        )
+        self.assertTrue(timeseries.in_bidding_zone)
+        self.assertFalse(timeseries.out_bidding_zone)
+        self.assertEqual(timeseries.psr_type, "B01")
+        self.assertIsNone(timeseries.unit_key)
+        self.assertIsNone(timeseries.currency)
+        self.assertEqual((position, quantity), (1, 482.0))
+        # All points of a TimeSeries share their metadata.
+        self.assertIs(points[1][0], timeseries)
+
+    def test_production_per_units_document(self):
+        timeseries, _, _ = next(
+            ENTSOE.iter_timeseries_points(read_mock("FR_production_per_units.xml"))
+        )
+        self.assertEqual(timeseries.psr_type, "B14")
+        self.assertEqual(timeseries.unit_key, "17W100P100P0081Q")
+        self.assertEqual(timeseries.unit_name, "BELLEVILLE 1")
+
+    def test_price_document(self):
+        timeseries, position, price = next(
+            ENTSOE.iter_timeseries_points(read_mock("FR_price.xml"))
+        )
+        self.assertEqual(timeseries.currency, "EUR")
+        self.assertEqual((position, price), (1, 76.54))
+
+    def test_points_without_value(self):
+        points = ENTSOE.iter_timeseries_points(
+            "<GL_MarketDocument><TimeSeries><Period>"
+            "<timeInterval><start>2022-10-10T08:00Z</start></timeInterval>"
+            "<resolution>PT60M</resolution>"
+            "<Point><position>1</position></Point>"
+            "<Point><position>2</position><quantity/></Point>"
+            "<Point><position>3</position><quantity>7</quantity></Point>"
+            "</Period></TimeSeries></GL_MarketDocument>"
+        )
+        self.assertEqual([point[1:] for point in points], [(3, 7.0)])
+
+    def test_malformed_document(self):
+        with self.assertRaises(ParserException):
+            list(ENTSOE.iter_timeseries_points("<GL_MarketDocument><TimeSeries>"))
+
+
+class TestParse(unittest.TestCase):
+    def test_parse_production(self):
+        productions, datetimes = ENTSOE.parse_production(read_mock("FR_production.xml"))
+        self.assertEqual(len(datetimes), 52)
+        self.assertEqual(datetimes[0], datetime(2022, 10, 10, 8, tzinfo=timezone.utc))
+        # Storage consumption is subtracted, self-consumption (B04 out) is ignored.
+        self.assertEqual(productions[0]["B10"], 524.0)
+        self.assertEqual(productions[0]["B04"], 1821.0)
+        # B20 is only reported for the last hours.
+        self.assertNotIn("B20", productions[0])
+        self.assertEqual(productions[40]["B20"], 12.0)
+
+    def test_parse_price_without_currency(self):
+        xml_text = read_mock("FR_price.xml")
+        xml_text = re.sub(r"<currency_Unit.name>\w+</currency_Unit.name>", "", xml_text)
+        with self.assertRaises(ParserException):
+            ENTSOE.parse_price(xml_text)
+
+    def test_parse_self_consumption(self):
+        self_consumption = ENTSOE.parse_self_consumption(read_mock("FR_production.xml"))
+        self.assertEqual(len(self_consumption), 12)
+        self.assertEqual(
+            self_consumption[datetime(2022, 10, 10, 11, tzinfo=timezone.utc)], 144.0
+        )
+
+    def test_parse_scalar(self):
+        values, datetimes = ENTSOE.parse_scalar(
+            read_mock("FR_load.xml"), only_outBiddingZone_Domain=True
+        )
+        self.assertEqual(len(values), 48)
+        self.assertEqual(values[:2], [41238.0, 43571.0])
+        self.assertEqual(
+            ENTSOE.parse_scalar(
+                read_mock("FR_load.xml"), only_inBiddingZone_Domain=True
+            ),
+            ([], []),
+        )
+
+    def test_parse_exchange(self):
+        quantities, datetimes = ENTSOE.parse_exchange(
+            read_mock("FR_ES_exchange.xml"), is_import=True
+        )
+        # Only the A05 contract TimeSeries is used.
+        self.assertEqual(len(quantities), 48)
+        self.assertEqual(quantities[:2], [2779.0, 1431.0])
+        quantities, datetimes = ENTSOE.parse_exchange(
+            read_mock("ES_FR_exchange.xml"),
+            is_import=False,
+            quantities=quantities,
+            datetimes=datetimes,
+        )
+        self.assertEqual(len(quantities), 48)
+        self.assertEqual(quantities[:2], [1864.0, -339.0])
+
+    def test_parse_price(self):
+        prices, currencies, datetimes = ENTSOE.parse_price(read_mock("FR_price.xml"))
+        self.assertEqual(len(prices), 48)
+        self.assertEqual(prices[:2], [76.54, 318.98])
+        self.assertEqual(set(currencies), {"EUR"})
+        self.assertEqual(datetimes[24], datetime(2022, 10, 11, 8, tzinfo=timezone.utc))
+
+    def test_parse_production_per_units(self):
+        units = list(
+            ENTSOE.parse_production_per_units(read_mock("FR_production_per_units.xml"))
+        )
+        self.assertEqual(len(units), 72)
+        self.assertEqual(
+            units[0],
+            {
+                "datetime": datetime(2022, 10, 10, 8, tzinfo=timezone.utc),
+                "production": 962.0,
+                "productionType": "nuclear",
+                "unitKey": "17W100P100P0081Q",
+                "unitName": "BELLEVILLE 1",
+            },
+        )
+
+    def test_empty_document(self):
+        self.assertIsNone(ENTSOE.parse_production(""))
+        self.assertIsNone(ENTSOE.parse_price(None))
+
+
+class TestFetchProduction(unittest.TestCase):
+    def setUp(self):
+        os.environ["ENTSOE_TOKEN"] = "token"
+        self.session = Session()
+        self.adapter = Adapter()
+        self.session.mount("https://", self.adapter)
+
+    def test_fetch_production(self):
+        self.adapter.register_uri(GET, ANY, text=read_mock("FR_production.xml"))
+        data = ENTSOE.fetch_production("FR", self.session)
+        self.assertEqual(len(data), 52)
+        self.assertEqual(
+            data[0],
+            {
+                "zoneKey": "FR",
+                "datetime": datetime(2022, 10, 10, 8, tzinfo=timezone.utc),
+                "production": {
+                    "biomass": 3639.0,
+                    "coal": 1679.0,
+                    "gas": 1821.0,
+                    "geothermal": None,
+                    "hydro": 2187.0,
+                    "nuclear": 2278.0,
+                    "oil": 225.0,
+                    "solar": 2787.0,
+                    "wind": 1090.0,
+                    "unknown": None,
+                },
+                "storage": {"hydro": -524.0},
+                "source": "entsoe.eu",
+            },
+        )
+        self.assertEqual(data[-1]["production"]["unknown"], 24.0)
+        self.assertIsNone(data[-1]["production"]["nuclear"])
+        self.assertIsNone(data[-1]["storage"]["hydro"])
+
+    def test_fetch_production_sets_small_negative_values_to_zero(self):
+        xml_text = read_mock("FR_production.xml").replace(
+            "<quantity>482</quantity>", "<quantity>-12</quantity>"
+        )
+        self.adapter.register_uri(GET, ANY, text=xml_text)
+        data = ENTSOE.fetch_production("FR", self.session)
+        # biomass is B01 (-12) + B17 (3157)
+        self.assertEqual(data[0]["production"]["biomass"], 3145.0)
+
+        xml_text = xml_text.replace(
+            "<quantity>3157</quantity>", "<quantity>2</quantity>"
+        )
+        self.adapter.register_uri(GET, ANY, text=xml_text)
+        with self.assertLogs(logging.getLogger(ENTSOE.__name__), "WARNING") as logs:
+            data = ENTSOE.fetch_production("FR", self.session)
+        self.assertEqual(data[0]["production"]["biomass"], 0)
+        self.assertEqual(
+            logs.output,
+            [f"WARNING:{ENTSOE.__name__}:Setting small value of biomass (-10.0) to 0."],
+        )
+
+
+def handle_entsoe_request(request):
+    """A fake ENTSOE API, rejecting tokens by name."""
+    token = request.params["securityToken"][0]
+    if token.startswith("invalid"):
+        return 401, {}, "<html><body>Unauthorized</body></html>"
+    if token.startswith("throttled"):
+        return 429, {"Retry-After": "30"}, "Too many requests"
+    if request.params.get("in_Domain") == ["NO_DATA"]:
+        return (
+            400,
+            {},
+            "<Acknowledgement_MarketDocument><Reason><text>No matching data found</text></Reason></Acknowledgement_MarketDocument>",
+        )
+    return 200, {}, read_mock("FR_load.xml")
+
+
+class TestMergeProductionOutputs(unittest.TestCase):
+    @staticmethod
+    def point(hour: int, production: dict, storage: dict) -> dict:
+        return {
+            "datetime": datetime(2022, 10, 1, hour, tzinfo=timezone.utc),
+            "production": production,
+            "storage": storage,
+            "source": "entsoe.eu",
+        }
+
+    def test_merge_production_outputs(self):
+        data = ENTSOE.merge_production_outputs(
+            [
+                [
+                    self.point(0, {"wind": 1, "solar": None}, {"hydro": -2}),
+                    self.point(1, {"wind": 3, "solar": None}, {}),
+                ],
+                [
+                    self.point(1, {"wind": 4, "gas": None}, {"battery": 1}),
+                    self.point(2, {"wind": 5}, {}),
+                ],
+                [
+                    self.point(0, {"gas": None, "coal": 2}, {}),
+                    self.point(1, {"solar": None, "gas": 6}, {"hydro": None}),
+                ],
+            ],
+            "DK",
+        )
+        # Datetimes missing in an output are dropped
+        self.assertEqual(len(data), 1)
+        self.assertEqual(
+            data[0]["datetime"], datetime(2022, 10, 1, 1, tzinfo=timezone.utc)
+        )
+        # Modes that are None everywhere stay None, other None values count as 0,
+        # modes that are only None in other outputs are dropped
+        self.assertEqual(data[0]["production"], {"wind": 7, "solar": None, "gas": 6})
+        self.assertEqual(data[0]["storage"], {"battery": 1})
+        self.assertEqual(data[0]["zoneKey"], "DK")
+        self.assertEqual(data[0]["source"], "entsoe.eu")
+
+    def test_merge_single_output(self):
+        output = [
+            self.point(0, {"wind": 1, "solar": None}, {}),
+            self.point(1, {}, {"hydro": None}),
+        ]
+        data = ENTSOE.merge_production_outputs([output], "DK", "eia.gov")
+        self.assertEqual(
+            [(point["production"], point["storage"]) for point in data],
+            [({"wind": 1, "solar": None}, {}), ({}, {"hydro": None})],
+        )
+        self.assertEqual(data[0]["source"], "eia.gov")
+
+
+class TestQueryENTSOE(unittest.TestCase):
+    def setUp(self):
+        TOKEN_POOLS.clear()
+        self.server = StubServer(handle_entsoe_request).__enter__()
+        endpoint = patch.object(ENTSOE, "ENTSOE_ENDPOINT", f"{self.server.url}/api")
+        endpoint.start()
+        self.addCleanup(endpoint.stop)
+        self.addCleanup(self.server.__exit__)
+        self.session = Session()
+
+    def query(self, domain="FR"):
+        return ENTSOE.query_ENTSOE(
+            self.session, {"documentType": "A65", "in_Domain": domain}
+        )
+
+    def used_tokens(self):
+        return [request.params["securityToken"][0] for request in self.server.requests]
+
+    def test_tokens_are_rotated(self):
+        os.environ["ENTSOE_TOKEN"] = "token-a,token-b,token-c"
+        for _ in range(4):
+            self.assertEqual(self.query(), read_mock("FR_load.xml"))
+        self.assertEqual(
+            self.used_tokens(), ["token-a", "token-b", "token-c", "token-a"]
+        )
+
+    def test_rejected_tokens_cool_down(self):
+        os.environ["ENTSOE_TOKEN"] = "invalid-1,throttled-2,token-3"
+        self.query()
+        self.assertEqual(self.used_tokens(), ["invalid-1", "throttled-2", "token-3"])
+        self.query()
+        self.query()
+        self.assertEqual(self.used_tokens()[3:], ["token-3", "token-3"])
+
+        pool = ENTSOE.get_token_pool("ENTSOE_TOKEN", rate=ENTSOE.ENTSOE_TOKEN_RATE)
+        health = {metrics["token"]: metrics for metrics in pool.health()}
+        self.assertEqual(health["...id-1"]["unauthorized"], 1)
+        self.assertGreater(health["...id-1"]["cooldown"], 500)
+        self.assertEqual(health["...ed-2"]["throttled"], 1)
+        self.assertLessEqual(health["...ed-2"]["cooldown"], 30)
+        self.assertEqual(health["...en-3"]["requests"], 3)
+        self.assertEqual(health["...en-3"]["failures"], 0)
+
+    def test_all_tokens_rejected(self):
+        os.environ["ENTSOE_TOKEN"] = "invalid-token"
+        with self.assertRaises(ParserException) as context:
+            self.query()
+        self.assertIn("Unauthorized", str(context.exception))
+        # The token is cooling down, ENTSOE isn't queried
+        with self.assertRaises(ParserException) as context:
+            self.query()
+        self.assertIn("No token available", str(context.exception))
+        self.assertEqual(len(self.server.requests), 1)
+
+    def test_request_errors_are_not_retried(self):
+        os.environ["ENTSOE_TOKEN"] = "token-a,token-b"
+        with self.assertRaises(ParserException) as context:
+            self.query("NO_DATA")
+        self.assertEqual(
+            str(context.exception), "ENTSOE.py Parser: No matching data found"
+        )
+        self.assertEqual(len(self.server.requests), 1)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,120 @@
+import json
+import unittest
+from datetime import datetime, timedelta, timezone
+
+from requests import Session
+from requests_mock import POST, Adapter
+
+from parsers import IN_WE
+
+STATES = ["Gujarat", "Maharashtra"]
+
+
+def timestamp(dt: datetime) -> str:
+    """Timestamps of the source, with the hour in 12 hour format."""
+    return f"{dt:%Y-%d-%m} {dt.hour % 12 or 12:02d}:{dt:%M:%S}"
+
+
+def day_rows(kind: str, date: str) -> list:
+    """Rows of a day, with 2 values per hour for each plant, region or state."""
+    day = datetime.strptime(date, "%Y-%m-%d")
+    rows = []
+    for minute in range(0, 24 * 60, 30):
+        dt = timestamp(day + timedelta(minutes=minute, seconds=10))
+        value = minute // 30
+        if kind == "production":
+            names = {plant: "State_Name" for plant in IN_WE.POWER_PLANT_MAPPING}
+            values = {"Actual": value, "lastUpdate": dt}
+        elif kind == "exchange":
+            names = {region: "Region_Name" for region in IN_WE.EXCHANGES_MAPPING}
+            values = {"Current_Loading": value, "lastUpdate": dt}
+        else:
+            names = {state: "StateName" for state in STATES}
+            values = {"Act_Drawal": value, "current_datetime": dt}
+        for name, column in names.items():
+            rows.append({"Id": len(rows) + 1, column: name, **values})
+    return rows
+
+
+class TestIN_WE(unittest.TestCase):
+    def setUp(self):
+        self.session = Session()
+        self.adapter = Adapter()
+        self.session.mount("https://", self.adapter)
+        for kind, config in IN_WE.KIND_MAPPING.items():
+            self.adapter.register_uri(
+                POST,
+                config["url"],
+                json=lambda request, context, kind=kind: {
+                    "d": json.dumps(day_rows(kind, request.json()["date"]))
+                },
+            )
+
+    def posted_days(self):
+        return [request.json()["date"] for request in self.adapter.request_history]
+
+    def test_fetch_data_rounds_datetimes(self):
+        self.adapter.register_uri(
+            POST,
+            IN_WE.CONSUMPTION_URL,
+            json={
+                "d": json.dumps(
+                    [
+                        {"current_datetime": "2023-04-03 01:10:29"},
+                        {"current_datetime": "2023-04-03 01:10:30"},
+                        {"current_datetime": "2023-04-03 12:59:45"},
+                    ]
+                )
+            },
+        )
+        df = IN_WE.fetch_data(
+            kind="consumption",
+            session=self.session,
+            target_datetime=datetime(2023, 3, 4),
+        )
+        self.assertEqual(
+            [dt.strftime("%H:%M") for dt in df["current_datetime"]],
+            ["01:10", "01:11", "13:00"],
+        )
+
+    def test_fetch_consumption(self):
+        data = IN_WE.fetch_consumption(
+            "IN-WE", self.session, datetime(2023, 3, 4, 5, tzinfo=timezone.utc)
+        )
+        self.assertEqual(len(data), 24)
+        self.assertEqual(data[0]["datetime"].hour, 0)
+        self.assertEqual(data[-1]["datetime"].hour, 23)
+        # Mean of the 2 values of the hour, summed over the states
+        self.assertEqual(data[1]["consumption"], 2 * 2.5)
+        self.assertEqual(data[13]["consumption"], 2 * 26.5)
+        self.assertEqual(self.posted_days(), ["2023-03-04"])
+
+    def test_exchanges_share_the_data_of_the_day(self):
+        target_datetime = datetime(2023, 3, 4, 5, tzinfo=timezone.utc)
+        for sorted_zone_keys in IN_WE.EXCHANGES_MAPPING.values():
+            data = IN_WE.fetch_exchange(
+                *sorted_zone_keys.split("->"), self.session, target_datetime
+            )
+            self.assertEqual(len(data), 24)
+            self.assertEqual(data[0]["sortedZoneKeys"], sorted_zone_keys)
+            self.assertEqual(data[2]["netFlow"], -4.5)
+        self.assertEqual(self.posted_days(), ["2023-03-04"])
+
+    def test_fetch_range(self):
+        start = datetime(2023, 3, 4, 22, 30, tzinfo=timezone.utc)
+        end = datetime(2023, 3, 5, 3, tzinfo=timezone.utc)
+        data = IN_WE.fetch_range("production", start, end, session=self.session)
+        self.assertEqual(
+            [point["datetime"].hour for point in data], [22, 23, 0, 1, 2, 3]
+        )
+        self.assertEqual(self.posted_days(), ["2023-03-04", "2023-03-05"])
+        # The same data points as the fetches of whole days
+        day = IN_WE.fetch_production(
+            "IN-WE", self.session, datetime(2023, 3, 5, tzinfo=timezone.utc)
+        )
+        self.assertEqual(data[2:], day[:4])
+        self.assertEqual(len(self.posted_days()), 2)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,136 @@
+import re
+import unittest
+from collections import defaultdict
+
+import numpy as np
+from requests import Session
+from requests_mock import GET, Adapter
+
+from parsers import JP, occtonet
+from parsers.lib.exceptions import ParserException
+from parsers.test.mocks.fake_occtonet import FakeOcctonet, line_csv
+
+# Parts of the URLs of the consumption file of each zone
+CONSUMPTION_FILES = {
+    "JP-HKD": "juyo_01",
+    "JP-TH": "juyo_02",
+    "JP-TK": "juyo-d-j",
+    "JP-HR": "juyo_05",
+    "JP-CB": "juyo_cepco003",
+    "JP-KN": "juyo1_kansai",
+    "JP-CG": "juyo_07",
+    "JP-SK": "juyo_shikoku",
+    "JP-KY": "juyo-hourly",
+    "JP-ON": "juyo_10",
+}
+
+
+def consumption_csv(zone_key: str, repeated_hours: int = 0) -> bytes:
+    """
+    A consumption file with 4 hours of consumption and solar production, in 万kW, and
+    the first `repeated_hours` listed twice.
+    """
+    lines = ["header"] * (57 if zone_key == "JP-KN" else 54)
+    if zone_key == "JP-TH":
+        lines.append("DATE,TIME,当日実績(万kW),太陽光発電実績(万kW),風力発電実績(万kW)")
+    else:
+        lines.append("DATE,TIME,当日実績(万kW),太陽光発電実績(万kW)")
+    seed = len(zone_key) * 7 + sum(map(ord, zone_key)) % 50
+    for hour in [*range(repeated_hours), *range(4)]:
+        row = f"2022/10/1,{hour}:00,{1000 + seed + hour},{seed + 2 * hour}"
+        lines.append(row + (",5" if zone_key == "JP-TH" else ""))
+    return "\n".join(lines).encode("shift-jis")
+
+
+class TestGridProduction(unittest.TestCase):
+    def setUp(self):
+        self.occtonet = FakeOcctonet(
+            {
+                line_id: line_csv([10 * line_id - hour for hour in range(3)])
+                for line_id in occtonet.LINE_IDS
+            }
+        )
+        self.consumption = Adapter()
+        for zone_key, filename in CONSUMPTION_FILES.items():
+            self.consumption.register_uri(
+                GET, re.compile(filename), content=consumption_csv(zone_key)
+            )
+
+    def session(self) -> Session:
+        session = Session()
+        session.mount("http://", self.consumption)
+        session.mount("https://", self.consumption)
+        self.occtonet.mount(session)
+        return session
+
+    def test_grid_matches_zones(self):
+        productions = JP.fetch_grid_production_df(self.session())
+        self.assertEqual(set(productions), set(JP.EXCHANGE_MAP))
+        for zone_key in JP.EXCHANGE_MAP:
+            expected = JP.fetch_production_df(zone_key, self.session())
+            df = productions[zone_key]
+            # The exchanges have 3 hours of data, JP-ON doesn't have exchanges
+            self.assertEqual(len(df), 4 if zone_key == "JP-ON" else 3)
+            self.assertEqual(list(df["datetime"]), list(expected["datetime"]))
+            for column in ["solar", "imports", "unknown"]:
+                np.testing.assert_allclose(df[column], expected[column])
+
+    def test_zones_share_downloads(self):
+        session = self.session()
+        for zone_key in JP.EXCHANGE_MAP:
+            data = JP.fetch_production(zone_key, session)
+            self.assertEqual(data[0]["zoneKey"], zone_key)
+        # Each consumption file and line is downloaded once
+        self.assertEqual(self.consumption.call_count, len(CONSUMPTION_FILES))
+        self.assertEqual(sorted(self.occtonet.downloads), occtonet.LINE_IDS)
+        # One login per worker, for all the exchanges
+        self.assertEqual(self.occtonet.logins, occtonet.DEFAULT_MAX_WORKERS)
+
+    def test_failures_only_fail_their_zones(self):
+        self.consumption.register_uri(GET, re.compile("juyo_07"), status_code=404)
+        self.occtonet.failing_lines.add(1)
+        productions = JP.fetch_grid_production_df(self.session())
+        for zone_key in ["JP-CG", "JP-HKD", "JP-TH"]:
+            self.assertIsInstance(productions[zone_key], Exception)
+        self.assertEqual(len(productions["JP-KN"]), 3)
+        with self.assertRaises(Exception):
+            JP.fetch_production("JP-HKD", self.session())
+
+    def test_errors_are_shared(self):
+        self.consumption.register_uri(GET, re.compile("juyo_07"), status_code=404)
+        self.occtonet.failing_lines.add(1)
+        session = self.session()
+        errors = defaultdict(list)
+        for _ in range(2):
+            for zone_key in JP.EXCHANGE_MAP:
+                try:
+                    JP.fetch_production(zone_key, session)
+                except ParserException as e:
+                    errors[zone_key].append(e)
+        self.assertEqual(sorted(errors), ["JP-CG", "JP-HKD", "JP-TH"])
+        # Each call raises its own exception
+        self.assertIsNot(errors["JP-CG"][0], errors["JP-CG"][1])
+        # The grid with failed zones is computed once for the cycle
+        self.assertEqual(self.consumption.call_count, len(CONSUMPTION_FILES))
+        self.assertEqual(sorted(self.occtonet.downloads), occtonet.LINE_IDS)
+        self.assertEqual(self.occtonet.logins, occtonet.DEFAULT_MAX_WORKERS)
+
+    def test_repeated_datetimes(self):
+        seed = len("JP-CG") * 7 + sum(map(ord, "JP-CG")) % 50
+        self.consumption.register_uri(
+            GET, re.compile("juyo_07"), content=consumption_csv("JP-CG", 2)
+        )
+        productions = JP.fetch_grid_production_df(self.session())
+        self.assertEqual(set(productions), set(JP.EXCHANGE_MAP))
+        for zone_key in JP.EXCHANGE_MAP:
+            self.assertEqual(
+                len(productions[zone_key]), 4 if zone_key == "JP-ON" else 3
+            )
+        self.assertEqual(
+            list(productions["JP-CG"]["cons"]),
+            [10 * (1000 + seed + hour) for hour in range(3)],
+        )
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -1,23 +1,32 @@
 import unittest
-from datetime import datetime
+from datetime import datetime, timedelta
+from unittest.mock import patch
 
 from pytz import timezone
 from requests import Session
 from requests_mock import ANY, Adapter
 
 from parsers import NTESMO
+from parsers.lib.exceptions import ParserException
 
 australia = timezone("Australia/Darwin")
 
 
 class TestNTESMO(unittest.TestCase):
     def setUp(self):
+        for name, cache in [
+            ("_YEAR_INDEXES", NTESMO.YearIndexCache()),
+            ("_WORKBOOKS", NTESMO.WorkbookCache()),
+        ]:
+            patcher = patch.object(NTESMO, name, cache)
+            patcher.start()
+            self.addCleanup(patcher.stop)
         self.session = Session()
         self.adapter = Adapter()
         self.session.mount("https://", self.adapter)
         data = open("parsers/test/mocks/AUS/NTESMO.xlsx", "rb")
         self.adapter.register_uri(ANY, ANY, content=data.read())
-        index_page = """<div class="smp-tiles-article__item">
+        self.index_page = index_page = """<div class="smp-tiles-article__item">
                 <a href="https://ntesmo.com.au/__data/assets/excel_doc/0013/116113/Market-Information_System-Control-daily-trading-day_220401.xlsx">
                     <div class="smp-tiles-article__title">01 December 2022</div>
 
@@ -117,3 +126,111 @@ class TestNTESMO(unittest.TestCase):
             data_list[-1]["datetime"],
             australia.localize(datetime(year=2022, month=12, day=2, hour=4, minute=00)),
         )
+
+    def requested_urls(self):
+        return [request.url for request in self.adapter.request_history]
+
+    def test_fetches_share_the_index_and_workbook(self):
+        target_datetime = datetime(year=2022, month=12, day=1)
+        NTESMO.fetch_production_mix("AU-NT", self.session, target_datetime)
+        NTESMO.fetch_consumption("AU-NT", self.session, target_datetime)
+        NTESMO.fetch_price("AU-NT", self.session, target_datetime)
+        self.assertEqual(len(self.requested_urls()), 2)
+        self.assertIn(NTESMO.INDEX_URL.format(2022), self.requested_urls())
+
+    def test_cached_workbook_is_not_modified(self):
+        target_datetime = datetime(year=2022, month=12, day=1)
+        first = NTESMO.fetch_production_mix("AU-NT", self.session, target_datetime)
+        second = NTESMO.fetch_production_mix("AU-NT", self.session, target_datetime)
+        self.assertEqual(first, second)
+
+    def test_index_of_current_month_is_refreshed(self):
+        now = australia.localize(datetime(year=2022, month=12, day=3, hour=10))
+
+        def clock():
+            return now
+
+        patcher = patch.object(
+            NTESMO, "_YEAR_INDEXES", NTESMO.YearIndexCache(clock=clock)
+        )
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        NTESMO.fetch_consumption("AU-NT", self.session, datetime(2022, 12, 1))
+        # Not published yet, and the index was fetched too recently to fetch it again
+        with self.assertRaises(ParserException):
+            NTESMO.fetch_consumption("AU-NT", self.session, datetime(2022, 12, 2))
+        self.assertEqual(len(self.requested_urls()), 2)
+
+        now += timedelta(seconds=NTESMO.INDEX_REFRESH_INTERVAL)
+        self.adapter.register_uri(
+            ANY,
+            NTESMO.INDEX_URL.format(2022),
+            text=self.index_page.replace("01 December", "02 December"),
+        )
+        data_list = NTESMO.fetch_consumption(
+            "AU-NT", self.session, datetime(2022, 12, 2)
+        )
+        self.assertEqual(len(data_list), 48)
+        # Both days share the same workbook in this test
+        self.assertEqual(len(self.requested_urls()), 3)
+        # Days are kept from the previous fetches of the index
+        NTESMO.fetch_consumption("AU-NT", self.session, datetime(2022, 12, 1))
+        self.assertEqual(len(self.requested_urls()), 3)
+
+    def index_page_of(self, days: list) -> str:
+        """The index page, with a link to the workbook for each day."""
+        tile = self.index_page.split('<a href="')[1].split("</a>")[0]
+        link = tile.split('"')[0]
+        return "".join(
+            f'<a href="{link}?day={day:%d}"'
+            + tile[len(link) + 1 :].replace("01 December 2022", f"{day:%d %B %Y}")
+            + "</a>"
+            for day in days
+        )
+
+    def test_index_of_complete_months_is_not_refreshed(self):
+        NTESMO._YEAR_INDEXES.refresh_interval = 0
+        november = [datetime(2022, 11, day) for day in range(1, 31)]
+        self.adapter.register_uri(
+            ANY, NTESMO.INDEX_URL.format(2022), text=self.index_page_of(november)
+        )
+        NTESMO.fetch_consumption("AU-NT", self.session, datetime(2022, 11, 5))
+        with self.assertRaises(ParserException):
+            NTESMO.fetch_consumption("AU-NT", self.session, datetime(2022, 12, 5))
+        self.assertEqual(len(self.requested_urls()), 3)
+
+        # December isn't complete, November is
+        self.adapter.register_uri(
+            ANY, NTESMO.INDEX_URL.format(2022), text=self.index_page_of([])
+        )
+        NTESMO.fetch_consumption("AU-NT", self.session, datetime(2022, 11, 6))
+        with self.assertRaises(ParserException):
+            NTESMO.fetch_consumption("AU-NT", self.session, datetime(2022, 12, 5))
+        index_url = NTESMO.INDEX_URL.format(2022)
+        self.assertEqual(self.requested_urls().count(index_url), 3)
+
+    def test_days_of_past_months_published_late_are_found(self):
+        now = australia.localize(datetime(year=2023, month=1, day=10))
+
+        def clock():
+            return now
+
+        patcher = patch.object(
+            NTESMO, "_YEAR_INDEXES", NTESMO.YearIndexCache(clock=clock)
+        )
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        NTESMO.fetch_consumption("AU-NT", self.session, datetime(2022, 12, 1))
+        with self.assertRaises(ParserException):
+            NTESMO.fetch_consumption("AU-NT", self.session, datetime(2022, 12, 31))
+
+        now += timedelta(seconds=NTESMO.INDEX_REFRESH_INTERVAL)
+        self.adapter.register_uri(
+            ANY,
+            NTESMO.INDEX_URL.format(2022),
+            text=self.index_page_of([datetime(2022, 12, 31)]),
+        )
+        data_list = NTESMO.fetch_consumption(
+            "AU-NT", self.session, datetime(2022, 12, 31)
+        )
+        self.assertEqual(len(data_list), 48)
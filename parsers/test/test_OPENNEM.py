@@ -1,11 +1,22 @@
+import json
 import unittest
 from datetime import datetime
+from unittest.mock import patch
 
 import arrow
 import numpy as np
 import pandas as pd
+from requests import Session
+from requests_mock import ANY, GET, Adapter
 
-from parsers.OPENNEM import filter_production_objs, process_solar_rooftop, sum_vector
+from parsers import OPENNEM
+from parsers.OPENNEM import (
+    compile_categories,
+    filter_production_objs,
+    process_solar_rooftop,
+    sum_categories,
+    sum_vector,
+)
 
 
 class TestOPENNEM(unittest.TestCase):
@@ -66,6 +77,37 @@ class TestOPENNEM(unittest.TestCase):
         assert sum_solar_ignore_nans == sum(values_solar[:1])
         assert sum_wind == sum(values_wind)
 
+    def test_sum_categories(self):
+        emap_to_parser = {
+            "coal": ["COAL_a", "COAL_b"],
+            "solar": ["SOLAR_1", "SOLAR_2"],
+            "wind": ["WIND"],
+            "nuclear": ["NUCLEAR"],
+        }
+        df = pd.DataFrame(
+            {
+                "COAL_a": [1.0, 2.0],
+                "SOLAR_1": [4.0, np.nan],
+                "COAL_b": [2.0, 3.0],
+                "SOLAR_2": [np.nan, np.nan],
+                "WIND": [1.0, 5.0],
+                "OTHER": [7.0, 7.0],
+            }
+        )
+        column_modes = compile_categories(emap_to_parser)
+
+        # Every row is summed like sum_vector does
+        for ignore_nans in [False, True]:
+            sums = sum_categories(df, column_modes, ignore_nans=ignore_nans)
+            assert list(sums.columns) == ["coal", "solar", "wind", "nuclear"]
+            for i, row in df.iterrows():
+                for mode, keys in emap_to_parser.items():
+                    expected = sum_vector(row, keys, ignore_nans=ignore_nans)
+                    if expected is None:
+                        assert np.isnan(sums.loc[i, mode])
+                    else:
+                        assert sums.loc[i, mode] == expected
+
     def test_filter_production_objs(self):
         now = arrow.utcnow()
         objs = [
@@ -95,5 +137,74 @@ class TestOPENNEM(unittest.TestCase):
         assert len(filtered_objs) == 1
 
 
+def power_dataset(region: str, fueltech: str, values: list) -> dict:
+    return {
+        "id": f"au.nem.{region.lower()}.fuel_tech.{fueltech.lower()}.power",
+        "type": "power",
+        "data_type": "power",
+        "region": region,
+        "x_capacity_at_present": 100.0,
+        "history": {
+            "start": "2022-10-01T00:00:00+10:00",
+            "last": f"2022-10-01T00:{5 * (len(values) - 1):02d}:00+10:00",
+            "interval": "5m",
+            "data": values,
+        },
+    }
+
+
+class TestDatasetIndex(unittest.TestCase):
+    def setUp(self):
+        self.adapter = Adapter()
+        payload = {
+            "data": [
+                power_dataset("NSW1", "COAL_BLACK", [1.0, 2.0, 3.0]),
+                power_dataset("QLD1", "COAL_BLACK", [4.0, 5.0, 6.0]),
+                power_dataset("NSW1", "WIND", [7.0, 8.0, 9.0]),
+                # Datapoints without solar production are discarded
+                power_dataset("NSW1", "SOLAR_UTILITY", [0.0, 0.0, 0.0]),
+                power_dataset("QLD1", "SOLAR_UTILITY", [0.0, 0.0, 0.0]),
+            ]
+        }
+        self.adapter.register_uri(GET, ANY, text=json.dumps(payload))
+        self.session = self.mocked_session()
+
+    def mocked_session(self) -> Session:
+        session = Session()
+        session.mount("https://", self.adapter)
+        return session
+
+    def test_select(self):
+        datasets = [
+            power_dataset("NSW1", "COAL_BLACK", [1.0]),
+            power_dataset("QLD1", "COAL_BLACK", [1.0]),
+            power_dataset("NSW1", "WIND", [1.0]),
+        ]
+        index = OPENNEM.DatasetIndex(datasets)
+        self.assertEqual(index.select("power", region="NSW1"), [0, 2])
+        self.assertEqual(index.select("price", region="NSW1"), [])
+        self.assertEqual(index.select("power", flow_id="wind"), [2])
+        self.assertIs(index.frame(2), index.frame(2))
+        self.assertEqual(list(index.frame(2).columns), ["WIND"])
+
+    def test_zones_share_one_download(self):
+        nsw = OPENNEM.fetch_production("AUS-NSW", self.session)
+        qld = OPENNEM.fetch_production("AUS-QLD", self.session)
+        self.assertEqual(self.adapter.call_count, 1)
+        self.assertEqual([obj["production"]["coal"] for obj in nsw], [1.0, 2.0, 3.0])
+        self.assertEqual([obj["production"]["wind"] for obj in nsw], [7.0, 8.0, 9.0])
+        self.assertEqual([obj["production"]["coal"] for obj in qld], [4.0, 5.0, 6.0])
+        # The shared frames are not modified by the parsers
+        self.assertEqual(OPENNEM.fetch_production("AUS-NSW", self.session), nsw)
+        self.assertEqual(self.adapter.call_count, 1)
+
+    def test_downloads_are_not_shared_across_sessions_or_after_max_age(self):
+        OPENNEM.fetch_production("AUS-NSW", self.session)
+        OPENNEM.fetch_production("AUS-NSW", self.mocked_session())
+        with patch.object(OPENNEM, "OPENNEM_INDEX_MAX_AGE", 0):
+            OPENNEM.fetch_production("AUS-NSW", self.session)
+        self.assertEqual(self.adapter.call_count, 3)
+
+
 if __name__ == "__main__":
     unittest.main()
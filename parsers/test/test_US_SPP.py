@@ -8,7 +8,7 @@ from datetime import datetime
 from unittest.mock import patch
 
 from arrow import get
-from pandas import read_pickle
+from pandas import read_pickle, to_datetime
 from testfixtures import LogCapture
 
 from parsers import US_SPP
@@ -69,6 +69,40 @@ class TestUSSPP(unittest.TestCase):
                 )
             )
 
+    def test_data_processor_merges_market_and_self(self):
+        fake_data = read_pickle("parsers/test/mocks/US_SPP_Gen_Mix.pkl")
+        fake_data["GMT MKT Interval"] = to_datetime(fake_data["GMT MKT Interval"])
+        fake_data = fake_data.rename(
+            columns={" Coal": "Coal Market", " Natural Gas": "Natural Gas Market"}
+        )
+        fake_data["Coal Self"] = 1.5
+        fake_data["Gas Self"] = 2.5
+
+        with LogCapture():
+            data = US_SPP.data_processor(fake_data, logging.getLogger("test"))
+
+        dt, production = data[0]
+        self.assertEqual(dt, get(datetime(2018, 7, 27, 9, 55), "UTC").datetime)
+        self.assertEqual(production["coal"], 15552.6 + 1.5)
+        self.assertEqual(
+            production["gas"], fake_data["Natural Gas Market"].iloc[0] + 2.5
+        )
+        self.assertNotIn("Coal Self", production)
+
+    def test_data_processor_keeps_rows_of_filtered_data(self):
+        """Historical data is filtered by datetime, which doesn't reset the index."""
+        fake_data = read_pickle("parsers/test/mocks/US_SPP_Gen_Mix.pkl")
+        fake_data["GMT MKT Interval"] = to_datetime(fake_data["GMT MKT Interval"])
+
+        with LogCapture():
+            data = US_SPP.data_processor(fake_data[20:], logging.getLogger("test"))
+
+        self.assertEqual(len(data), 3)
+        self.assertEqual(
+            data[-1][0], get(datetime(2018, 7, 27, 11, 45), "UTC").datetime
+        )
+        self.assertEqual(round(data[-1][1]["unknown"], 2), 33.1)
+
 
 if __name__ == "__main__":
     unittest.main(buffer=True)
@@ -0,0 +1,110 @@
+import json
+import time
+import unittest
+from datetime import datetime, timedelta, timezone
+from logging import ERROR, getLogger
+from unittest.mock import Mock, patch
+
+from parsers import ajenti
+from parsers.lib.exceptions import ParserException
+from parsers.test.mocks.fake_signalr_hub import FakeSignalRHub
+
+
+def read_payload(filename: str) -> dict:
+    with open(f"parsers/test/mocks/{filename}") as f:
+        return json.load(f)
+
+
+class TestSignalR(unittest.TestCase):
+    def setUp(self):
+        self.hub = FakeSignalRHub().__enter__()
+        self.addCleanup(self.hub.__exit__)
+        self.now = 0.0
+        logger = getLogger("test_ajenti")
+        logger.setLevel(ERROR)
+        self.signalr = ajenti.SignalR(
+            self.hub.url,
+            min_reconnect_delay=0.01,
+            max_reconnect_delay=0.05,
+            clock=lambda: self.now,
+            logger=logger,
+        )
+        # Cleanups run in reverse order, the hub stops last
+        self.addCleanup(self.signalr.close, 5)
+
+    def wait_for_payload(self, hub: str, method: str, payload: dict):
+        deadline = time.monotonic() + 5
+        while self.signalr.get_value(hub, method)[0] != payload:
+            self.assertLess(time.monotonic(), deadline, "Payload not received")
+            time.sleep(0.01)
+
+    def test_fetch_production_is_served_from_memory(self):
+        self.hub.set_payload(
+            "TagHub", "Dashboard", read_payload("AUS_TAS_KI_payload1.json")
+        )
+        with patch.object(ajenti, "AJENTI_SIGNALR", self.signalr):
+            data = ajenti.fetch_production("AUS-TAS-KI")
+            start = time.monotonic()
+            data = ajenti.fetch_production("AUS-TAS-KI")
+            self.assertLess(time.monotonic() - start, 0.5)
+        self.assertEqual(data["production"]["wind"], 1.024)
+        self.assertEqual(data["storage"]["battery"], 0.149)
+        self.assertEqual(self.hub.negotiations, 1)
+
+    def test_islands_are_subscribed_to_separately(self):
+        self.hub.set_payload("TagHub", "Dashboard", {"island": "KI"})
+        self.hub.set_payload("HogsHub", "SendDashboard", {"island": "RI"})
+        self.assertEqual(
+            self.signalr.get_value("TagHub", "Dashboard")[0], {"island": "KI"}
+        )
+        self.assertEqual(
+            self.signalr.get_value("HogsHub", "SendDashboard")[0], {"island": "RI"}
+        )
+        self.assertEqual(self.hub.negotiations, 2)
+
+    def test_latest_payload_is_kept(self):
+        self.hub.set_payload("TagHub", "Dashboard", {"value": 1})
+        self.wait_for_payload("TagHub", "Dashboard", {"value": 1})
+        self.hub.set_payload("TagHub", "Dashboard", {"value": 2})
+        self.wait_for_payload("TagHub", "Dashboard", {"value": 2})
+
+    def test_reconnects_after_failures(self):
+        self.hub.failing_negotiations = 3
+        self.hub.set_payload("TagHub", "Dashboard", {"value": 1})
+        self.assertEqual(self.signalr.get_value("TagHub", "Dashboard")[0], {"value": 1})
+        self.assertEqual(self.hub.negotiations, 4)
+        self.assertEqual(self.signalr.subscriber("TagHub", "Dashboard").connections, 1)
+
+    def test_stale_payloads_are_rejected(self):
+        self.hub.set_payload("TagHub", "Dashboard", {"value": 1})
+        subscriber = self.signalr.subscriber("TagHub", "Dashboard")
+        payload, received_at = subscriber.latest(timeout=5, max_age=60)
+        self.assertEqual(payload, {"value": 1})
+        subscriber.stop(5)
+        self.now += 30
+        self.assertEqual(subscriber.latest(timeout=5, max_age=60)[1], received_at)
+        self.now += 31
+        with self.assertRaisesRegex(ParserException, "too long ago"):
+            subscriber.latest(timeout=0.1, max_age=60)
+
+    def test_no_payload(self):
+        with self.assertRaisesRegex(ParserException, "never"):
+            self.signalr.get_value("TagHub", "Dashboard", timeout=0.2)
+
+
+class TestFetchProduction(unittest.TestCase):
+    def test_datetime_is_the_receive_time(self):
+        received_at = datetime(2022, 10, 1, 1, 2, 3, tzinfo=timezone.utc)
+        signalr = Mock()
+        signalr.get_value.return_value = (
+            read_payload("AUS_TAS_KI_payload1.json"),
+            received_at,
+        )
+        with patch.object(ajenti, "AJENTI_SIGNALR", signalr):
+            data = ajenti.fetch_production("AUS-TAS-KI")
+        self.assertEqual(data["datetime"], received_at)
+        self.assertEqual(data["datetime"].utcoffset(), timedelta(hours=10))
+
+
+if __name__ == "__main__":
+    unittest.main()
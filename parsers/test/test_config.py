@@ -2,8 +2,13 @@
 
 """Tests for config/__init__.py."""
 import unittest
+from datetime import date, datetime, timezone
 
-from electricitymap.contrib.config import emission_factors
+from electricitymap.contrib.config import (
+    ZONES_CONFIG,
+    emission_factors,
+    emission_factors_by_zone,
+)
 
 
 class EmissionFactorTestCase(unittest.TestCase):
@@ -50,6 +55,34 @@ class EmissionFactorTestCase(unittest.TestCase):
         }
         self.assertEqual(emission_factors("FR"), expected)  # type: ignore
 
+    def test_emission_factors_at_datetime(self):
+        """Test that emission_factors uses the yearly values applying at a datetime."""
+        dt = datetime(2016, 6, 1, 12, tzinfo=timezone.utc)
+        factors = emission_factors("KR", dt)  # type: ignore
+        # 2016 default
+        self.assertEqual(factors["battery discharge"], 490.36674359237577)
+        self.assertEqual(factors["coal"], 820)
+        # Values on and after the last year are the most recent ones
+        self.assertEqual(
+            emission_factors("KR", date(2030, 1, 1)),  # type: ignore
+            emission_factors("KR"),  # type: ignore
+        )
+        # Before the first year, the first values apply
+        self.assertEqual(
+            emission_factors("KR", date(2000, 1, 1))["battery discharge"],  # type: ignore
+            490.36144312742397,
+        )
+
+    def test_emission_factors_are_copies(self):
+        emission_factors("KR")["coal"] = 0  # type: ignore
+        self.assertEqual(emission_factors("KR")["coal"], 820)  # type: ignore
+
+    def test_emission_factors_by_zone(self):
+        factors = emission_factors_by_zone(["FR", "KR"])  # type: ignore
+        self.assertEqual(factors["FR"], emission_factors("FR"))  # type: ignore
+        self.assertEqual(factors["KR"], emission_factors("KR"))  # type: ignore
+        self.assertEqual(len(emission_factors_by_zone()), len(ZONES_CONFIG))
+
 
 if __name__ == "__main__":
     unittest.main()
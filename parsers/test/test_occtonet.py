@@ -0,0 +1,142 @@
+import itertools
+import threading
+import time
+import unittest
+from collections import defaultdict
+from datetime import datetime, timedelta, timezone
+from typing import Dict
+from unittest.mock import patch
+
+import pandas as pd
+from requests import Session
+
+from parsers import occtonet
+from parsers.lib.coalescing import RequestCoalescer
+from parsers.lib.exceptions import ParserException
+from parsers.lib.fetch import create_session
+from parsers.test.mocks.fake_occtonet import FakeOcctonet, line_csv
+from parsers.test.mocks.stub_server import StubServer
+
+JST = timezone(timedelta(hours=9))
+
+
+class TestOcctonet(unittest.TestCase):
+    def setUp(self):
+        self.session = Session()
+        # 3 hours of data for each line, 2 for line 11
+        self.occtonet = FakeOcctonet(
+            {
+                line_id: line_csv([100 * line_id + hour for hour in range(3)])
+                for line_id in occtonet.LINE_IDS
+            }
+        )
+        self.occtonet.lines[11] = line_csv([1100, 1101])
+        self.occtonet.mount(self.session)
+
+    def test_fetch_exchange(self):
+        data = occtonet.fetch_exchange(
+            "JP-TH", "JP-TK", self.session, datetime(2022, 10, 1, 12, tzinfo=JST)
+        )
+        self.assertEqual(len(data), 3)
+        self.assertEqual(data[0]["sortedZoneKeys"], "JP-TH->JP-TK")
+        self.assertEqual(data[0]["datetime"], datetime(2022, 10, 1, tzinfo=JST))
+        self.assertEqual([point["netFlow"] for point in data], [200, 201, 202])
+        self.assertEqual(data[0]["source"], "occtonet.occto.or.jp")
+
+    def test_exchanges_share_a_download(self):
+        target_datetime = datetime(2022, 10, 1, 12, tzinfo=JST)
+        for sorted_zone_keys in occtonet.EXCHANGE_MAPPING:
+            occtonet.fetch_exchange(
+                *sorted_zone_keys.split("->"), self.session, target_datetime
+            )
+            occtonet.fetch_exchange_forecast(
+                *sorted_zone_keys.split("->"), self.session, target_datetime
+            )
+        self.assertEqual(sorted(self.occtonet.downloads), occtonet.LINE_IDS)
+        # One login per worker, for all the exchanges
+        self.assertEqual(self.occtonet.logins, occtonet.DEFAULT_MAX_WORKERS)
+
+    def test_workers_have_their_own_sessions(self):
+        # The form flow of a line is stateful, a session must not run two at once
+        active: Dict[int, int] = defaultdict(int)
+        overlaps = []
+        lock = threading.Lock()
+        fetch_line = occtonet._fetch_line
+
+        def _fetch_line(session, line_id, day):
+            with lock:
+                active[id(session)] += 1
+                overlaps.append(active[id(session)] > 1)
+            try:
+                time.sleep(0.01)
+                return fetch_line(session, line_id, day)
+            finally:
+                with lock:
+                    active[id(session)] -= 1
+
+        with patch.object(occtonet, "_fetch_line", _fetch_line):
+            lines = occtonet.fetch_lines(self.session, "2022/10/01")
+        self.assertEqual(sorted(lines), occtonet.LINE_IDS)
+        self.assertEqual(len(overlaps), len(occtonet.LINE_IDS))
+        self.assertFalse(any(overlaps))
+
+    def test_workers_log_in_through_a_coalescing_session(self):
+        session_ids = itertools.count(1)
+
+        def login(request):
+            return 200, {"Set-Cookie": f"JSESSIONID=s{next(session_ids)}"}, ""
+
+        cookies = []
+
+        def _fetch_line(session, line_id, day):
+            cookies.append(session.cookies.get("JSESSIONID"))
+            return pd.DataFrame()
+
+        with StubServer(login) as server, patch.object(
+            occtonet, "LOGIN_URL", f"{server.url}/login"
+        ), patch.object(occtonet, "_fetch_line", _fetch_line):
+            session = create_session(5, 4, RequestCoalescer())
+            occtonet.fetch_lines(session, "2022/10/01", [1, 2, 3, 4])
+        self.assertEqual(len(server.requests), 4)
+        self.assertEqual(sorted(cookies), ["s1", "s2", "s3", "s4"])
+
+    def test_failed_lines_are_shared(self):
+        self.occtonet.failing_lines.add(3)
+        target_datetime = datetime(2022, 10, 1, 12, tzinfo=JST)
+        errors = []
+        for sorted_zone_keys in occtonet.EXCHANGE_MAPPING:
+            try:
+                occtonet.fetch_exchange(
+                    *sorted_zone_keys.split("->"), self.session, target_datetime
+                )
+            except ParserException as e:
+                errors.append(e)
+        # Each line is downloaded once, the failed line only fails its exchange
+        self.assertEqual(sorted(self.occtonet.downloads), occtonet.LINE_IDS)
+        self.assertEqual(self.occtonet.logins, occtonet.DEFAULT_MAX_WORKERS)
+        self.assertEqual([e.zone_key for e in errors], ["JP-CB->JP-TK"])
+        with self.assertRaises(ParserException) as context:
+            occtonet.fetch_exchange("JP-CB", "JP-TK", self.session, target_datetime)
+        self.assertIsNot(context.exception, errors[0])
+
+    def test_lines_are_summed_over_common_times(self):
+        data = occtonet.fetch_exchange(
+            "JP-CB",
+            "JP-HR",
+            self.session,
+            datetime(2022, 10, 1, 12, tzinfo=JST),
+        )
+        # Line 11 only has 2 hours of data
+        self.assertEqual([point["netFlow"] for point in data], [500 + 1100, 501 + 1101])
+
+    def test_failed_line_only_fails_its_exchanges(self):
+        self.occtonet.failing_lines.add(3)
+        target_datetime = datetime(2022, 10, 1, 12, tzinfo=JST)
+        with self.assertRaises(ParserException):
+            occtonet.fetch_exchange("JP-CB", "JP-TK", self.session, target_datetime)
+        data = occtonet.fetch_exchange("JP-CB", "JP-KN", self.session, target_datetime)
+        self.assertEqual(len(data), 3)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,54 @@
+#!/usr/bin/env python3
+"""
+Measures the conversion of EIA periods to UTC datetimes, point by point with dateutil
+and arrow and for whole responses with EIA._get_utc_datetimes, on a year of hourly
+periods of a series (e.g. a fuel type of a balancing authority).
+
+Usage: poetry run python -m scripts.benchmarks.EIA_timestamps --days 365
+"""
+
+import argparse
+from datetime import datetime, timedelta
+
+from dateutil import parser as dateutil_parser
+
+from parsers import EIA
+from scripts.benchmarks import measure
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--days", type=int, default=365)
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    start = datetime(2022, 1, 1)
+    periods = [
+        (start + timedelta(hours=hour)).strftime(EIA.EIA_TS_FORMAT)
+        for hour in range(args.days * 24)
+    ]
+    local_periods = [f"{period}-05" for period in periods]
+
+    print(f"{len(periods)} hourly periods")
+    measure(
+        "_get_utc_datetime_from_datapoint (each period)",
+        lambda: [
+            EIA._get_utc_datetime_from_datapoint(dateutil_parser.parse(period))
+            for period in periods
+        ],
+        repeat=args.repeat,
+    )
+    measure(
+        "_get_utc_datetimes (UTC periods)",
+        lambda: EIA._get_utc_datetimes(periods),
+        repeat=args.repeat,
+    )
+    measure(
+        "_get_utc_datetimes (periods with UTC offset)",
+        lambda: EIA._get_utc_datetimes(local_periods),
+        repeat=args.repeat,
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,169 @@
+#!/usr/bin/env python3
+"""
+Measures ELEXON parse_production (B1620) and parse_production_FUELINST on synthetic
+reports spanning several days, against the previous row-wise implementation.
+
+Usage: poetry run python -m scripts.benchmarks.ELEXON_settlement_periods --days 7
+"""
+
+import argparse
+from datetime import date, datetime, timedelta
+from io import StringIO
+from typing import List
+
+import pandas as pd
+
+from electricitymap.contrib.config.constants import PRODUCTION_MODES
+from parsers import ELEXON
+from scripts.benchmarks import measure
+
+B1620_HEADER = (
+    "*Document Type,Business Type,Process Type,Time Series ID,Quantity,Curve Type,"
+    "Resolution,Settlement Date,Settlement Period,Power System Resource  Type,"
+    "Active Flag,Document ID,Document RevNum"
+)
+
+
+def settlement_periods(day: date) -> int:
+    """Number of settlement periods of the day: 46 or 50 on DST changes, 48 otherwise."""
+    midnights = pd.DatetimeIndex([day, day + timedelta(days=1)]).tz_localize(
+        ELEXON.ELEXON_TIMEZONE
+    )
+    return int((midnights[1] - midnights[0]) / pd.Timedelta(minutes=30))
+
+
+def b1620_csv(start: date, days: int) -> str:
+    lines = ["*", "*", "*Actual Aggregated Generation Per Type (B1620) Data", "*"]
+    lines.append(B1620_HEADER)
+    for day in (start + timedelta(days=i) for i in range(days)):
+        for sp in range(1, settlement_periods(day) + 1):
+            for i, resource_type in enumerate(ELEXON.RESOURCE_TYPE_TO_FUEL):
+                quantity = (sp * 37 + i * 101) % 5000 + 0.125 * i
+                lines.append(
+                    f"Actual generation per type,Generation,Realised,TS-{i},{quantity},"
+                    f"Sequential fixed size block,PT30M,{day:%Y-%m-%d},{sp},"
+                    f"{resource_type},Y,DOC-{i},1"
+                )
+    lines.append("<EOF>")
+    return "\n".join(lines)
+
+
+def fuelinst_csv(start: date, days: int, spot_times_per_period: int = 6) -> str:
+    lines = ["HDR,FUELINST"]
+    for day in (start + timedelta(days=i) for i in range(days)):
+        for sp in range(1, settlement_periods(day) + 1):
+            for spot in range(spot_times_per_period):
+                spot_time = datetime.combine(day, datetime.min.time()) + timedelta(
+                    minutes=30 * (sp - 1) + 5 * spot
+                )
+                values = [
+                    (sp * 53 + spot * 7 + i * 211) % 9000
+                    for i in range(len(ELEXON.FUEL_INST_MAPPING))
+                ]
+                lines.append(
+                    f"FUELINST,{day:%Y%m%d},{sp},{spot_time:%Y%m%d%H%M%S},"
+                    + ",".join(map(str, values))
+                )
+    lines.append(f"FTR,{len(lines) - 1}")
+    return "\n".join(lines)
+
+
+def reference_parse_production(csv_text: str) -> List[dict]:
+    """The previous implementation of parse_production, row by row."""
+    df = pd.read_csv(StringIO(csv_text), skiprows=4)
+    df = df.iloc[:-1, [7, 8, 9, 4]]
+    df["Settlement Date"] = df["Settlement Date"].apply(
+        lambda x: datetime.strptime(x, "%Y-%m-%d")
+    )
+    df["Settlement Period"] = df["Settlement Period"].astype(int)
+    df["datetime"] = df.apply(
+        lambda x: ELEXON.datetime_from_date_sp(
+            x["Settlement Date"], x["Settlement Period"]
+        ),
+        axis=1,
+    )
+    fuel_column = "Power System Resource  Type"
+    df[fuel_column] = df[fuel_column].apply(lambda x: ELEXON.RESOURCE_TYPE_TO_FUEL[x])
+    data_points = []
+    for time in pd.unique(df["datetime"]):
+        time_df = df[df["datetime"] == time]
+        data_point = {"datetime": time, "production": {}, "storage": {}}
+        for row in time_df.iterrows():
+            fields = row[1].to_dict()
+            fuel, quantity = fields[fuel_column], fields["Quantity"]
+            if "storage" in fuel:
+                data_point["storage"][fuel.replace("storage", "").strip()] = -quantity
+            else:
+                production = data_point["production"]
+                production[fuel] = production.get(fuel, 0) + quantity
+        data_points.append(data_point)
+    return data_points
+
+
+def reference_parse_production_FUELINST(csv_text: str) -> List[dict]:
+    """The previous implementation of parse_production_FUELINST, row by row."""
+    df = pd.read_csv(
+        StringIO(csv_text), skiprows=1, skipfooter=1, header=None, engine="python"
+    )
+    mapping = {1: "Settlement Date", 2: "Settlement Period", 3: "Spot Time"}
+    for index, fuel in enumerate(ELEXON.FUEL_INST_MAPPING.values()):
+        mapping[index + 4] = fuel
+    df.rename(columns=mapping, inplace=True)
+    df["Settlement Date"] = df["Settlement Date"].apply(
+        lambda x: datetime.strptime(str(x), "%Y%m%d")
+    )
+    df["datetime"] = df.apply(
+        lambda x: ELEXON.datetime_from_date_sp(
+            x["Settlement Date"], x["Settlement Period"]
+        ),
+        axis=1,
+    )
+    df = df.T.groupby(level=0, sort=True).sum().T
+    data_points = []
+    for time in pd.unique(df["datetime"]):
+        time_df = df[df["datetime"] == time]
+        data_point = {"datetime": time, "production": {}}
+        for row in time_df.iterrows():
+            for key, value in row[1].to_dict().items():
+                if key in PRODUCTION_MODES:
+                    data_point["production"][key] = value
+        data_points.append(data_point)
+    return data_points
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--days", type=int, default=7)
+    # The week of the autumn DST change, with a 50 period day
+    parser.add_argument("--start", type=date.fromisoformat, default=date(2022, 10, 27))
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    b1620 = b1620_csv(args.start, args.days)
+    fuelinst = fuelinst_csv(args.start, args.days)
+    print(
+        f"{args.days} days from {args.start}: B1620 {len(b1620.splitlines())} rows, "
+        f"FUELINST {len(fuelinst.splitlines())} rows"
+    )
+    measure(
+        "parse_production (row-wise reference)",
+        lambda: reference_parse_production(b1620),
+        repeat=args.repeat,
+    )
+    measure(
+        "parse_production", lambda: ELEXON.parse_production(b1620), repeat=args.repeat
+    )
+    measure(
+        "parse_production_FUELINST (row-wise reference)",
+        lambda: reference_parse_production_FUELINST(fuelinst),
+        repeat=args.repeat,
+    )
+    measure(
+        "parse_production_FUELINST",
+        lambda: ELEXON.parse_production_FUELINST(fuelinst),
+        repeat=args.repeat,
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,94 @@
+#!/usr/bin/env python3
+"""
+Measures how ENTSOE parse_production and parse_exchange scale with the resolution and
+the span of a document, on synthetic documents with one TimeSeries per PSR type.
+
+Usage: poetry run python -m scripts.benchmarks.ENTSOE_bucketing --resolutions 60 15 --spans 24 72
+"""
+
+import argparse
+from datetime import datetime, timedelta
+from typing import List
+
+from parsers import ENTSOE
+from scripts.benchmarks import measure
+
+PERIOD_START = datetime(2022, 10, 10)
+
+
+def timeseries(
+    tags: str, resolution: int, span: int, minutes_offset: int = 0
+) -> List[str]:
+    start = PERIOD_START + timedelta(minutes=minutes_offset)
+    end = start + timedelta(hours=span)
+    lines = [
+        "<TimeSeries>",
+        tags,
+        "<Period><timeInterval>",
+        f"<start>{start:%Y-%m-%dT%H:%MZ}</start><end>{end:%Y-%m-%dT%H:%MZ}</end>",
+        f"</timeInterval><resolution>PT{resolution}M</resolution>",
+    ]
+    for position in range(1, span * 60 // resolution + 1):
+        lines.append(
+            f"<Point><position>{position}</position><quantity>{position % 97}</quantity></Point>"
+        )
+    lines.append("</Period></TimeSeries>")
+    return lines
+
+
+def production_document(resolution: int, span: int, psr_types: int) -> str:
+    lines = ["<GL_MarketDocument>"]
+    for psr_type in list(ENTSOE.ENTSOE_PARAMETER_DESC)[:psr_types]:
+        lines += timeseries(
+            "<inBiddingZone_Domain.mRID>10YFR-RTE------C</inBiddingZone_Domain.mRID>"
+            f"<MktPSRType><psrType>{psr_type}</psrType></MktPSRType>",
+            resolution,
+            span,
+        )
+    lines.append("</GL_MarketDocument>")
+    return "\n".join(lines)
+
+
+def exchange_document(resolution: int, span: int, minutes_offset: int) -> str:
+    lines = ["<Publication_MarketDocument>"]
+    lines += timeseries(
+        "<contract_MarketAgreement.type>A05</contract_MarketAgreement.type>",
+        resolution,
+        span,
+        minutes_offset,
+    )
+    lines.append("</Publication_MarketDocument>")
+    return "\n".join(lines)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--resolutions", type=int, nargs="+", default=[60, 30, 15])
+    parser.add_argument("--spans", type=int, nargs="+", default=[24, 48, 72])
+    parser.add_argument("--psr-types", type=int, default=20)
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    for resolution in args.resolutions:
+        for span in args.spans:
+            production = production_document(resolution, span, args.psr_types)
+            exports = exchange_document(resolution, span, 0)
+            # Shifted by half the span so that half of the datetimes are merged
+            imports = exchange_document(resolution, span, span * 30)
+            print(f"PT{resolution}M over {span}h ({span * 60 // resolution} points)")
+            measure(
+                f"  parse_production ({args.psr_types} PSR types)",
+                lambda: ENTSOE.parse_production(production),
+                repeat=args.repeat,
+            )
+            measure(
+                "  parse_exchange (import + export)",
+                lambda: ENTSOE.parse_exchange(
+                    exports, False, *ENTSOE.parse_exchange(imports, True)
+                ),
+                repeat=args.repeat,
+            )
+
+
+if __name__ == "__main__":
+    main()
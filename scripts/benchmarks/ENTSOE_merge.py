@@ -0,0 +1,54 @@
+#!/usr/bin/env python3
+"""
+Measures ENTSOE merge_production_outputs on EIA-like outputs, one list of hourly points
+per fuel type with some None values, as merged by EIA fetch_production_mix.
+
+Usage: poetry run python -m scripts.benchmarks.ENTSOE_merge --days 30 --modes 8
+"""
+
+import argparse
+from datetime import datetime, timedelta, timezone
+from typing import Any, Dict, List
+
+from parsers import ENTSOE
+from scripts.benchmarks import measure
+
+MODES = ["coal", "gas", "oil", "nuclear", "hydro", "solar", "wind", "unknown"]
+
+
+def mode_output(mode: str, hours: int) -> List[Dict[str, Any]]:
+    start = datetime(2022, 10, 1, tzinfo=timezone.utc)
+    output = []
+    for hour in range(hours):
+        value = None if hour % 101 == 0 else float((hour * 7 + len(mode)) % 500)
+        # Negative hydro is storage, as in EIA
+        is_storage = mode == "hydro" and hour % 5 == 0
+        output.append(
+            {
+                "datetime": start + timedelta(hours=hour),
+                "production": {} if is_storage else {mode: value},
+                "storage": {mode: value} if is_storage else {},
+                "source": "eia.gov",
+            }
+        )
+    return output
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--days", type=int, default=30)
+    parser.add_argument("--modes", type=int, default=len(MODES))
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    outputs = [mode_output(mode, args.days * 24) for mode in MODES[: args.modes]]
+    print(f"{args.modes} outputs of {args.days * 24} points")
+    measure(
+        "merge_production_outputs",
+        lambda: ENTSOE.merge_production_outputs(outputs, "US-MIDA-PJM"),
+        repeat=args.repeat,
+    )
+
+
+if __name__ == "__main__":
+    main()
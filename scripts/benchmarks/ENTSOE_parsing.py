@@ -0,0 +1,83 @@
+#!/usr/bin/env python3
+"""
+Compares the streaming ENTSOE document parser with a BeautifulSoup based extraction
+of the same (timeseries, position, quantity) tuples, on the ENTSOE mocks.
+
+Usage: poetry run python -m scripts.benchmarks.ENTSOE_parsing --scale 4
+"""
+
+import argparse
+import re
+from pathlib import Path
+
+import arrow
+from bs4 import BeautifulSoup
+
+from parsers import ENTSOE
+from scripts.benchmarks import MOCKS_PATH, measure
+
+FIXTURES = [
+    "FR_production.xml",
+    "DE_production.xml",
+    "FR_load.xml",
+    "FR_price.xml",
+    "FR_ES_exchange.xml",
+]
+
+
+def soup_points(xml_text: str):
+    """The former BeautifulSoup extraction, kept as the reference to compare against."""
+    soup = BeautifulSoup(xml_text, "html.parser")
+    points = []
+    for timeseries in soup.find_all("timeseries"):
+        resolution = str(timeseries.find_all("resolution")[0].contents[0])
+        datetime_start = arrow.get(timeseries.find_all("start")[0].contents[0])
+        for entry in timeseries.find_all("point"):
+            position = int(entry.find_all("position")[0].contents[0])
+            value = entry.find_all("quantity") or entry.find_all("price.amount")
+            points.append(
+                (resolution, datetime_start, position, float(value[0].contents[0]))
+            )
+    return points
+
+
+def streaming_points(xml_text: str):
+    return [
+        (timeseries.resolution, timeseries.datetime_start, position, value)
+        for timeseries, position, value in ENTSOE.iter_timeseries_points(xml_text)
+    ]
+
+
+def scale_document(xml_text: str, scale: int) -> str:
+    """Repeats the TimeSeries of a document `scale` times."""
+    match = re.search(r"(\s*<TimeSeries>.*</TimeSeries>)", xml_text, re.DOTALL)
+    if match is None or scale <= 1:
+        return xml_text
+    return xml_text.replace(match.group(1), match.group(1) * scale)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--scale", type=int, default=1)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    for fixture in FIXTURES:
+        xml_text = scale_document(
+            Path(MOCKS_PATH, "ENTSOE", fixture).read_text(), args.scale
+        )
+        assert soup_points(xml_text) == streaming_points(xml_text)
+        print(f"{fixture} ({len(xml_text) / 1024:.0f} kB)")
+        soup = measure(
+            "  BeautifulSoup", lambda: soup_points(xml_text), repeat=args.repeat
+        )
+        stream = measure(
+            "  iter_timeseries_points",
+            lambda: streaming_points(xml_text),
+            repeat=args.repeat,
+        )
+        print(f"  speedup: {soup / stream:.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,110 @@
+#!/usr/bin/env python3
+"""
+Measures OPENNEM fetch_production for every NEM region on a synthetic OpenNEM payload
+of 5-minute fueltech power series, served from memory, with a new session for each
+zone (one download each) and with a session shared by all zones (one download).
+
+Usage: poetry run python -m scripts.benchmarks.OPENNEM_production --days 7
+"""
+
+import argparse
+import json
+from datetime import datetime, timedelta, timezone
+from typing import Any, Dict, List
+
+from requests import Session
+from requests_mock import ANY, GET, Adapter
+
+from parsers import OPENNEM
+from scripts.benchmarks import measure
+
+NEM_TIMEZONE = timezone(timedelta(hours=10))
+FUELTECHS = [
+    column
+    for columns in [
+        *OPENNEM.OPENNEM_PRODUCTION_CATEGORIES.values(),
+        *OPENNEM.OPENNEM_STORAGE_CATEGORIES.values(),
+    ]
+    for column in columns
+    if column != "SOLAR_ROOFTOP"
+]
+
+
+def power_dataset(
+    region: str, fueltech: str, start: datetime, interval: int, points: int
+) -> Dict[str, Any]:
+    seed = sum(map(ord, region + fueltech))
+    data = [
+        # Some values are missing
+        None if (i + seed) % 997 == 0 else round((i * 7 + seed) % 1500 + 0.25, 2)
+        for i in range(points)
+    ]
+    return {
+        "id": f"au.nem.{region.lower()}.fuel_tech.{fueltech.lower()}.power",
+        "type": "power",
+        "data_type": "power",
+        "region": region,
+        "x_capacity_at_present": float(seed % 2000),
+        "history": {
+            "start": start.isoformat(),
+            "last": (start + timedelta(minutes=interval * (points - 1))).isoformat(),
+            "interval": f"{interval}m",
+            "data": data,
+        },
+    }
+
+
+def opennem_payload(regions: List[str], days: int) -> Dict[str, Any]:
+    start = datetime(2022, 10, 1, tzinfo=NEM_TIMEZONE)
+    datasets = []
+    for region in regions:
+        for fueltech in FUELTECHS:
+            datasets.append(power_dataset(region, fueltech, start, 5, days * 288))
+        datasets.append(power_dataset(region, "SOLAR_ROOFTOP", start, 30, days * 48))
+    return {"data": datasets}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--days", type=int, default=7)
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    zone_keys = [
+        zone_key
+        for zone_key, network in OPENNEM.ZONE_KEY_TO_NETWORK.items()
+        if network == "NEM"
+    ]
+    regions = [OPENNEM.ZONE_KEY_TO_REGION[zone_key] for zone_key in zone_keys]
+    payload = json.dumps(opennem_payload(regions, args.days))
+    adapter = Adapter()
+    adapter.register_uri(GET, ANY, text=payload)
+
+    def mocked_session() -> Session:
+        session = Session()
+        session.mount("https://", adapter)
+        return session
+
+    print(f"{args.days} days of {len(FUELTECHS)} fueltechs for {', '.join(zone_keys)}")
+    measure(
+        "fetch_production (all NEM zones, a session each)",
+        lambda: [
+            OPENNEM.fetch_production(zone_key, mocked_session())
+            for zone_key in zone_keys
+        ],
+        repeat=args.repeat,
+    )
+    measure(
+        "fetch_production (all NEM zones, shared session)",
+        # A new shared session for every run, so that each run downloads the file once
+        lambda: [
+            OPENNEM.fetch_production(zone_key, session)
+            for session in [mocked_session()]
+            for zone_key in zone_keys
+        ],
+        repeat=args.repeat,
+    )
+
+
+if __name__ == "__main__":
+    main()
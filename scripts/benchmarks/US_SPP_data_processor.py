@@ -0,0 +1,69 @@
+#!/usr/bin/env python3
+"""
+Measures US_SPP data_processor on the generation mix mock, repeated to cover a year of
+5 minute intervals as in the historical files, with and without production split into
+'Market' and 'Self' columns.
+
+Usage: poetry run python -m scripts.benchmarks.US_SPP_data_processor --days 365
+"""
+
+import argparse
+from logging import getLogger
+
+import pandas as pd
+
+from parsers import US_SPP
+from scripts.benchmarks import MOCKS_PATH, measure
+
+
+def scaled_gen_mix(days: int) -> pd.DataFrame:
+    """The mock, repeated for `days` days of 5 minute intervals."""
+    mock = pd.read_pickle(f"{MOCKS_PATH}/US_SPP_Gen_Mix.pkl")
+    intervals = days * 24 * 12
+    df = pd.concat([mock] * (intervals // len(mock) + 1), ignore_index=True)
+    df = df.iloc[:intervals].copy()
+    df["GMT MKT Interval"] = pd.date_range(
+        "2021-01-01", periods=intervals, freq="5min", tz="UTC"
+    )
+    return df
+
+
+def split_market_self(df: pd.DataFrame) -> pd.DataFrame:
+    """Splits the production of each mode into 'Market' and 'Self' columns."""
+    columns = {}
+    for col in df.columns:
+        name = col.strip()
+        if name in US_SPP.MAPPING:
+            columns[f"{name} Market"] = df[col] * 0.9
+            columns[f"{name} Self"] = df[col] * 0.1
+        else:
+            columns[col] = df[col]
+    return pd.DataFrame(columns)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--days", type=int, default=365)
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    logger = getLogger(__name__)
+    logger.disabled = True
+    df = scaled_gen_mix(args.days)
+    split_df = split_market_self(df)
+
+    print(f"{len(df)} intervals")
+    measure(
+        "data_processor",
+        lambda: US_SPP.data_processor(df, logger),
+        repeat=args.repeat,
+    )
+    measure(
+        "data_processor (Market and Self columns)",
+        lambda: US_SPP.data_processor(split_df, logger),
+        repeat=args.repeat,
+    )
+
+
+if __name__ == "__main__":
+    main()
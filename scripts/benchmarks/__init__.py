@@ -0,0 +1,16 @@
+"""
+Micro-benchmarks for the hot paths of the parsers.
+
+Run from the repository root, e.g. `poetry run python -m scripts.benchmarks.ENTSOE_parsing`.
+"""
+import timeit
+from typing import Callable
+
+MOCKS_PATH = "parsers/test/mocks"
+
+
+def measure(label: str, func: Callable[[], object], number: int = 1, repeat: int = 5):
+    """Prints and returns the best mean time per call of `func` over `repeat` runs."""
+    best = min(timeit.repeat(func, number=number, repeat=repeat)) / number
+    print(f"{label:<60} {best * 1000:10.2f} ms")
+    return best
@@ -0,0 +1,58 @@
+"""
+Loading time of the zone and exchange config: YAML files with the pure Python and C
+parsers, the config snapshot, and a full `import electricitymap.contrib.config` in a
+fresh interpreter (which uses the snapshot if it is up to date).
+"""
+
+import argparse
+import subprocess
+import sys
+
+import yaml
+
+from electricitymap.contrib.config import CONFIG_DIR
+from electricitymap.contrib.config.snapshot import (
+    build_snapshot,
+    config_files,
+    load_snapshot,
+    read_yaml_config,
+)
+from scripts.benchmarks import measure
+
+
+def import_config():
+    subprocess.run(
+        [sys.executable, "-c", "import electricitymap.contrib.config"], check=True
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    if load_snapshot(CONFIG_DIR) is None:
+        print(f"Building the config snapshot (config {build_snapshot(CONFIG_DIR)})")
+
+    files = config_files(CONFIG_DIR)
+    print(f"{len(files)} YAML files")
+    measure(
+        "yaml.safe_load",
+        lambda: [yaml.safe_load(path.read_text(encoding="utf-8")) for path in files],
+        repeat=1,
+    )
+    measure(
+        "read_yaml_config", lambda: read_yaml_config(CONFIG_DIR), repeat=args.repeat
+    )
+    measure("load_snapshot", lambda: load_snapshot(CONFIG_DIR), repeat=args.repeat)
+
+    # Includes the interpreter startup
+    measure(
+        "import electricitymap.contrib.config (new interpreter)",
+        import_config,
+        repeat=args.repeat,
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,77 @@
+"""
+Cold start time and memory of the parser registry, in fresh interpreters: lazy (the
+default), with the parsers of a few zones preloaded, and with every parser preloaded
+(as the registry used to do on import).
+
+Exits with an error if the lazy startup exceeds the --max-seconds or --max-rss-mb
+budget, e.g. `python -m scripts.benchmarks.parsers_import --max-seconds 10`.
+"""
+
+import argparse
+import json
+import subprocess
+import sys
+from typing import Dict, List
+
+MEASURE = """
+import json, resource, sys, time
+start = time.perf_counter()
+from parsers.lib import parsers
+failures = parsers.preload(*{preload_args})
+print(json.dumps({{
+    "seconds": time.perf_counter() - start,
+    "rss_mb": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024,
+    "modules": len(sys.modules),
+    "failures": len(failures),
+}}))
+"""
+
+
+def measure_startup(preload_args: str, repeat: int) -> Dict[str, float]:
+    """Returns the fastest of `repeat` startups, each in a new interpreter."""
+    runs: List[Dict[str, float]] = []
+    for _ in range(repeat):
+        output = subprocess.run(
+            [sys.executable, "-c", MEASURE.format(preload_args=preload_args)],
+            check=True,
+            capture_output=True,
+            text=True,
+        ).stdout
+        runs.append(json.loads(output.splitlines()[-1]))
+    return min(runs, key=lambda run: run["seconds"])
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--preload", nargs="+", default=["FR", "DE", "US-CAL-CISO"])
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--max-seconds", type=float)
+    parser.add_argument("--max-rss-mb", type=float)
+    args = parser.parse_args()
+
+    scenarios = {
+        "lazy": "([], [])",
+        f"preload {' '.join(args.preload)}": f"({args.preload!r},)",
+        "preload all": "()",
+    }
+    results = {}
+    print(f"{'':<40} {'time':>10} {'max RSS':>10} {'modules':>8} {'failures':>8}")
+    for label, preload_args in scenarios.items():
+        result = results[label] = measure_startup(preload_args, args.repeat)
+        print(
+            f"{label:<40} {result['seconds'] * 1000:7.0f} ms {result['rss_mb']:7.1f} MB"
+            f" {result['modules']:>8} {result['failures']:>8}"
+        )
+
+    lazy = results["lazy"]
+    over_budget = []
+    if args.max_seconds is not None and lazy["seconds"] > args.max_seconds:
+        over_budget.append(f"{lazy['seconds']:.2f}s > {args.max_seconds}s")
+    if args.max_rss_mb is not None and lazy["rss_mb"] > args.max_rss_mb:
+        over_budget.append(f"{lazy['rss_mb']:.1f} MB > {args.max_rss_mb} MB")
+    if over_budget:
+        sys.exit(f"Lazy startup over budget: {', '.join(over_budget)}")
+
+
+if __name__ == "__main__":
+    main()
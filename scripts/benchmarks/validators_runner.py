@@ -0,0 +1,70 @@
+#!/usr/bin/env python3
+"""
+Measures the production validators on a batch of synthetic events of many zones, run
+zone by zone on a DataFrame per zone and by ValidatorRunner on one shared DataFrame.
+
+Usage: poetry run python -m scripts.benchmarks.validators_runner --zones 64 --hours 168
+"""
+
+import argparse
+from datetime import datetime, timedelta, timezone
+
+from scripts.benchmarks import measure
+from validators.lib.runner import ValidatorRunner, flatten_events, is_validator_for_zone
+
+MODES = [
+    "biomass",
+    "coal",
+    "gas",
+    "hydro",
+    "nuclear",
+    "oil",
+    "solar",
+    "wind",
+    "unknown",
+]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--zones", type=int, default=64)
+    parser.add_argument("--hours", type=int, default=168)
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    start = datetime(2022, 1, 1, tzinfo=timezone.utc)
+    events = [
+        {
+            "zoneKey": f"Z{zone}",
+            "datetime": start + timedelta(hours=hour),
+            "production": {
+                mode: None if (hour + zone + i) % 13 == 0 else (hour * zone + i) % 900
+                for i, mode in enumerate(MODES)
+            },
+            "storage": {"hydro": -(hour % 50)},
+            "source": "benchmark",
+        }
+        for zone in range(args.zones)
+        for hour in range(args.hours)
+    ]
+    runner = ValidatorRunner()
+    validators = runner.validators["production"]
+
+    def per_zone():
+        frame = flatten_events(events)
+        for zone_key, zone_events in frame.groupby("zoneKey"):
+            for validator in validators:
+                if is_validator_for_zone(validator, zone_key):
+                    validator(zone_events)
+
+    print(f"{args.zones} zones of {args.hours} events, {len(validators)} validators")
+    measure("validators per zone", per_zone, repeat=args.repeat)
+    measure(
+        "ValidatorRunner.run",
+        lambda: runner.run("production", events),
+        repeat=args.repeat,
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,25 @@
+#!/usr/bin/env python3
+"""
+python scripts/build_config_snapshot.py
+poetry run build-config-snapshot
+"""
+import sys
+from pathlib import Path
+
+# The repository root, when run as a plain script rather than from the installed package
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from electricitymap.contrib.config import CONFIG_DIR  # noqa: E402
+from electricitymap.contrib.config.snapshot import (  # noqa: E402
+    SNAPSHOT_FILENAME,
+    build_snapshot,
+)
+
+
+def main():
+    content_hash = build_snapshot(CONFIG_DIR)
+    print(f"Wrote {CONFIG_DIR.joinpath(SNAPSHOT_FILENAME)} (config {content_hash})")
+
+
+if __name__ == "__main__":
+    main()
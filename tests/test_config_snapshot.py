@@ -0,0 +1,80 @@
+import os
+import shutil
+import tempfile
+import unittest
+from pathlib import Path
+
+from pydantic import ValidationError
+
+from electricitymap.contrib.config import CONFIG_DIR
+from electricitymap.contrib.config.snapshot import (
+    SNAPSHOT_FILENAME,
+    build_snapshot,
+    load_snapshot,
+    read_yaml_config,
+)
+
+
+class ConfigSnapshotTestcase(unittest.TestCase):
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.config_dir = Path(directory.name)
+        for name in ["defaults.yaml", "zones/DE.yaml", "zones/FR.yaml"]:
+            self.copy(name)
+        self.copy("exchanges/DE_FR.yaml")
+
+    def copy(self, name: str):
+        self.config_dir.joinpath(name).parent.mkdir(exist_ok=True)
+        shutil.copy(CONFIG_DIR.joinpath(name), self.config_dir.joinpath(name))
+
+    def set_mtime(self, name: str, delta: float):
+        path = self.config_dir.joinpath(name)
+        mtime = path.stat().st_mtime + delta
+        os.utime(path, (mtime, mtime))
+
+    def test_snapshot(self):
+        self.assertIsNone(load_snapshot(self.config_dir))
+        content_hash = build_snapshot(self.config_dir)
+        self.assertEqual(len(content_hash), 64)
+        snapshot = load_snapshot(self.config_dir)
+        self.assertEqual(snapshot, read_yaml_config(self.config_dir))
+        self.assertEqual(sorted(snapshot.zones), ["DE", "FR"])
+        self.assertEqual(list(snapshot.exchanges), ["DE_FR"])
+        self.assertIn("emissionFactors", snapshot.defaults)
+        # The content doesn't depend on the modification times
+        self.set_mtime("zones/FR.yaml", -10)
+        self.assertEqual(build_snapshot(self.config_dir), content_hash)
+
+    def test_snapshot_is_ignored_when_a_file_changes(self):
+        build_snapshot(self.config_dir)
+        path = self.config_dir.joinpath("zones/FR.yaml")
+        path.write_text(path.read_text() + "\n# Changed\n")
+        # Even if its modification time is older than the snapshot
+        self.set_mtime("zones/FR.yaml", -3600)
+        self.assertIsNone(load_snapshot(self.config_dir))
+
+    def test_invalid_config_is_not_snapshotted(self):
+        path = self.config_dir.joinpath("zones/FR.yaml")
+        path.write_text(path.read_text() + "\nnot_a_zone_field: 1\n")
+        with self.assertRaises(ValidationError):
+            build_snapshot(self.config_dir)
+        self.assertFalse(self.config_dir.joinpath(SNAPSHOT_FILENAME).exists())
+
+    def test_snapshot_is_ignored_when_files_are_added_or_removed(self):
+        build_snapshot(self.config_dir)
+        self.copy("zones/ES.yaml")
+        self.set_mtime("zones/ES.yaml", -3600)
+        self.assertIsNone(load_snapshot(self.config_dir))
+
+        build_snapshot(self.config_dir)
+        self.config_dir.joinpath("zones/ES.yaml").unlink()
+        self.assertIsNone(load_snapshot(self.config_dir))
+
+    def test_corrupted_snapshot_is_ignored(self):
+        self.config_dir.joinpath(SNAPSHOT_FILENAME).write_bytes(b"not a pickle")
+        self.assertIsNone(load_snapshot(self.config_dir))
+
+
+if __name__ == "__main__":
+    unittest.main()
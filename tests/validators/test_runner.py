@@ -0,0 +1,98 @@
+from datetime import datetime, timezone
+
+import numpy as np
+import pandas as pd
+
+from validators import sanity_checks, zone_specific_checks
+from validators.lib.config import validator
+from validators.lib.runner import ValidatorRunner, discover_validators, flatten_events
+
+from .lib.fixtures import load_fixture
+
+
+def production_event(zone_key, hour, **production):
+    return {
+        "zoneKey": zone_key,
+        "datetime": datetime(2022, 1, 1, hour, tzinfo=timezone.utc),
+        "production": production,
+        "storage": {},
+        "source": "test",
+    }
+
+
+def test_discover_validators():
+    validators = discover_validators()
+    assert sanity_checks.validate_positive_production in validators
+    assert zone_specific_checks.validate_production_has_fossil_fuel in validators
+    assert all(v.IS_VALIDATOR for v in validators)
+
+
+def test_flatten_events_matches_fixtures():
+    events = [
+        production_event("DE", 0, gas=131.0),
+        production_event("DE", 1, gas=-129.0),
+        production_event("DE", 2, gas=0),
+    ]
+    frame = flatten_events(events)
+    fixture = load_fixture("production_negative_values")
+    pd.testing.assert_series_equal(
+        frame["production.gas"], fixture["production.gas"], check_names=False
+    )
+
+
+def test_run_production_over_zones():
+    events = [
+        production_event("DE", 0, gas=131.0, wind=10),
+        production_event("CH", 0, hydro=100),
+        production_event("DE", 1, gas=-129.0),
+        production_event("CH", 1, hydro=600000),
+        production_event("DE", 2),
+    ]
+    result = ValidatorRunner().run("production", events)
+    scores = result.scores
+    assert list(scores["validate_positive_production"]) == [1, 1, 0, 1, 1]
+    assert list(scores["validate_production_one_non_nan_value"]) == [1, 1, 1, 1, 0]
+    assert list(scores["validate_production_is_plausible"]) == [1, 1, 1, 0, 1]
+    # Fossil fuel production isn't required in CH
+    np.testing.assert_array_equal(
+        scores["validate_production_has_fossil_fuel"], [1, np.nan, 0, np.nan, 0]
+    )
+    assert list(result.score) == [1, 1, 0, 0, 0]
+    assert set(result.timings) == set(scores.columns)
+
+
+def test_run_exchange_per_zone():
+    events = [
+        {
+            "sortedZoneKeys": "DK-DK1->DK-DK2",
+            "datetime": datetime(2022, 1, 1, tzinfo=timezone.utc),
+            "netFlow": 100000,
+            "source": "test",
+        },
+        {
+            "sortedZoneKeys": "DE->FR",
+            "datetime": datetime(2022, 1, 1, tzinfo=timezone.utc),
+            "netFlow": 10,
+            "source": "test",
+        },
+    ]
+    calls = []
+
+    @validator(kind="exchange", zone_keys=["DE->FR", "DK-DK1->DK-DK2"])
+    def validate_zone(events: pd.DataFrame, zone_key: str) -> pd.Series:
+        calls.append(zone_key)
+        return (events["netFlow"] < 1000).astype(int)
+
+    runner = ValidatorRunner(
+        [sanity_checks.validate_exchange_netflow_is_plausible, validate_zone]
+    )
+    scores = runner.run("exchange", events).scores
+    assert list(scores["validate_exchange_netflow_is_plausible"]) == [0, 1]
+    assert list(scores["validate_zone"]) == [0, 1]
+    assert calls == ["DK-DK1->DK-DK2", "DE->FR"]
+
+
+def test_run_without_events():
+    result = ValidatorRunner().run("production", [])
+    assert len(result.scores) == 0
+    assert "validate_positive_production" in result.scores
@@ -1,3 +1,4 @@
+from functools import wraps
 from typing import Callable, List
 
 
@@ -24,6 +25,7 @@ def validator(
     assert isinstance(kind, str)
 
     def wrap(f):
+        @wraps(f)
         def wrapped_f(*args, **kwargs):
             result = f(*args, **kwargs)
             return result
@@ -0,0 +1,155 @@
+"""
+Runs the validators (see `validators.lib.config.validator`) over batches of events.
+
+The events of a batch are flattened once into a DataFrame with a column per value (e.g.
+"production.gas", "storage.hydro", "netFlow"), which all the validators of their kind
+share. Validators can take the columns of a group as a `<group>_cols` argument (e.g.
+`production_cols`) rather than scanning the columns of the events.
+
+Validators that don't take a `zone_key` argument must score each row on its own,
+treating NaN as a missing value: they are called once for all the zones of the batch.
+The others are called once per zone.
+"""
+
+import time
+from collections import defaultdict
+from types import ModuleType
+from typing import Any, Callable, Dict, Iterable, List, NamedTuple, Optional
+
+import numpy as np
+import pandas as pd
+
+from validators import sanity_checks, zone_specific_checks
+
+VALIDATOR_MODULES = [sanity_checks, zone_specific_checks]
+# Column with the zone (or exchange) key of the events of each kind
+ZONE_KEY_COLUMNS = {"exchange": "sortedZoneKeys"}
+DEFAULT_ZONE_KEY_COLUMN = "zoneKey"
+
+
+def discover_validators(
+    modules: Iterable[ModuleType] = VALIDATOR_MODULES,
+) -> List[Callable]:
+    """Returns the validators defined in the modules, in order of definition."""
+    return [
+        value
+        for module in modules
+        for value in vars(module).values()
+        if getattr(value, "IS_VALIDATOR", False)
+    ]
+
+
+def flatten_events(events: List[Dict[str, Any]]) -> pd.DataFrame:
+    """
+    Returns the events as a DataFrame indexed by datetime (in UTC), with nested values
+    in columns named after their path, e.g. "production.gas".
+    """
+    frame = pd.json_normalize(events)
+    if frame.empty:
+        return frame
+    frame.index = pd.DatetimeIndex(pd.to_datetime(frame.pop("datetime"), utc=True))
+    return frame
+
+
+def column_groups(columns: Iterable[str]) -> Dict[str, List[str]]:
+    """Columns by their top level key, e.g. "production" -> ["production.gas", ...]."""
+    groups = defaultdict(list)
+    for column in columns:
+        groups[column.split(".", 1)[0]].append(column)
+    return dict(groups)
+
+
+def is_validator_for_zone(validator: Callable, zone_key: str) -> bool:
+    if validator.zone_keys is not None and zone_key not in validator.zone_keys:
+        return False
+    if validator.not_zone_keys is not None and zone_key in validator.not_zone_keys:
+        return False
+    return True
+
+
+class ValidationResult(NamedTuple):
+    # Score of each event (in the order of the batch) by each validator, NaN where the
+    # validator doesn't apply to the zone
+    scores: pd.DataFrame
+    # Seconds spent in each validator
+    timings: Dict[str, float]
+
+    @property
+    def score(self) -> pd.Series:
+        """Lowest score of each event."""
+        return self.scores.min(axis=1)
+
+
+class ValidatorRunner:
+    """Validators of each kind, discovered once and run over batches of events."""
+
+    def __init__(self, validators: Optional[Iterable[Callable]] = None):
+        if validators is None:
+            validators = discover_validators()
+        self.validators: Dict[str, List[Callable]] = defaultdict(list)
+        for validator in validators:
+            self.validators[validator.VALIDATOR_KIND].append(validator)
+
+    def run(self, kind: str, events: List[Dict[str, Any]]) -> ValidationResult:
+        """Scores events of a kind, e.g. "production", of any number of zones."""
+        validators = self.validators.get(kind, [])
+        frame = flatten_events(events)
+        scores = np.full((len(events), len(validators)), np.nan)
+        timings = {validator.__name__: 0.0 for validator in validators}
+        if events:
+            zone_key_column = ZONE_KEY_COLUMNS.get(kind, DEFAULT_ZONE_KEY_COLUMN)
+            # Positions of the events of each zone
+            zone_positions = {
+                zone_key: np.sort(positions)
+                for zone_key, positions in frame.groupby(
+                    zone_key_column, sort=False
+                ).indices.items()
+            }
+            groups = column_groups(frame.columns)
+            arguments = {f"{group}_cols": columns for group, columns in groups.items()}
+            for i, validator in enumerate(validators):
+                start = time.perf_counter()
+                zone_keys = [
+                    zone_key
+                    for zone_key in zone_positions
+                    if is_validator_for_zone(validator, zone_key)
+                ]
+                if "zone_key" in validator.args:
+                    for zone_key in zone_keys:
+                        positions = zone_positions[zone_key]
+                        scores[positions, i] = self._call(
+                            validator, frame, positions, arguments, zone_key=zone_key
+                        )
+                elif zone_keys:
+                    positions = np.sort(
+                        np.concatenate([zone_positions[key] for key in zone_keys])
+                    )
+                    scores[positions, i] = self._call(
+                        validator, frame, positions, arguments
+                    )
+                timings[validator.__name__] += time.perf_counter() - start
+        return ValidationResult(
+            scores=pd.DataFrame(
+                scores, columns=[validator.__name__ for validator in validators]
+            ),
+            timings=timings,
+        )
+
+    @staticmethod
+    def _call(
+        validator: Callable,
+        frame: pd.DataFrame,
+        positions: np.ndarray,
+        arguments: Dict[str, Any],
+        **kwargs,
+    ) -> np.ndarray:
+        events = frame if len(positions) == len(frame) else frame.iloc[positions]
+        kwargs = {
+            **{
+                name: value
+                for name, value in arguments.items()
+                if name in validator.args
+            },
+            **kwargs,
+        }
+        return np.asarray(validator(events, **kwargs), dtype=float)
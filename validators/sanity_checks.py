@@ -1,4 +1,5 @@
 from datetime import datetime
+from typing import List, Optional
 
 import numpy as np
 import pandas as pd
@@ -8,32 +9,41 @@ from validators.lib.config import validator
 
 
 @validator(kind="production")
-def validate_positive_production(events: pd.DataFrame) -> pd.Series:
+def validate_positive_production(
+    events: pd.DataFrame, production_cols: Optional[List[str]] = None
+) -> pd.Series:
     """
     Validate that the production is positive. (Allows nan values)
     """
-    production_cols = [col for col in events if col.startswith("production")]
+    if production_cols is None:
+        production_cols = [col for col in events if col.startswith("production")]
     res = 1 - (events[production_cols] < 0).any(axis=1).astype(int)
     return res
 
 
 @validator(kind="production")
-def validate_production_one_non_nan_value(events: pd.DataFrame) -> pd.Series:
+def validate_production_one_non_nan_value(
+    events: pd.DataFrame, production_cols: Optional[List[str]] = None
+) -> pd.Series:
     """
     Validate that the production has at least one non-nan value.
     """
-    production_cols = [col for col in events if col.startswith("production")]
+    if production_cols is None:
+        production_cols = [col for col in events if col.startswith("production")]
     res = events[production_cols].notnull().any(axis=1).astype(int)
     return res
 
 
 @validator(kind="production")
-def validate_production_is_plausible(events: pd.DataFrame) -> pd.Series:
+def validate_production_is_plausible(
+    events: pd.DataFrame, production_cols: Optional[List[str]] = None
+) -> pd.Series:
     """
     Validates that the production doesn't exceed 500GW
     """
-    production_cols = [col for col in events if col.startswith("production")]
-    res = (events.fillna(0)[production_cols] < 500000).all(axis=1).astype(int)
+    if production_cols is None:
+        production_cols = [col for col in events if col.startswith("production")]
+    res = 1 - (events[production_cols] >= 500000).any(axis=1).astype(int)
     return res
 
 
@@ -34,9 +34,7 @@ def validate_production_has_fossil_fuel(events: pd.DataFrame) -> pd.Series:
         "production.oil",
         "production.gas",
     ]
-    fossil_fuel_cols_in_event = set.intersection(
-        set(fossil_fuel_cols), set(events.columns)
-    )
+    fossil_fuel_cols_in_event = [col for col in fossil_fuel_cols if col in events]
 
     res = (events[fossil_fuel_cols_in_event] > 0).any(axis=1).astype(int)
     return res